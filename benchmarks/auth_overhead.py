@@ -0,0 +1,120 @@
+"""Mikrobenchmark kosztu uwierzytelnienia jednego żądania (z pamięcią podręczną i bez)
+
+Mierzy samo dekodowanie tokena (get_user_id_from_token) oraz pełną zależność
+get_current_user na tymczasowej bazie SQLite, dla wielu klientów wysyłających
+w kółko te same tokeny.
+
+Uruchomienie:
+    python -m benchmarks.auth_overhead --users 1000 --iterations 50000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+# Baza tymczasowa i hashowanie w bieżącym procesie - ustawiane przed importem aplikacji
+_directory = tempfile.mkdtemp(prefix="bench_auth_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_directory}/bench.db")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+from src.auth.dependencies import (  # noqa: E402
+    create_access_token,
+    get_current_user,
+    get_user_id_from_token,
+)
+from src.auth.principal_cache import principal_cache  # noqa: E402
+from src.auth.token_cache import token_cache  # noqa: E402
+from src.database.models import Base, SessionLocal, User, engine  # noqa: E402
+from src.database.slow_queries import percentile  # noqa: E402
+
+
+def prepare_users(count: int) -> List[str]:
+    """Użytkownicy testowi i ich access tokeny"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add_all(
+            User(
+                email=f"auth{i}@example.com",
+                hashed_password="-",
+                is_active=True,
+                is_admin=False,
+            )
+            for i in range(count)
+        )
+        db.commit()
+        user_ids = [user_id for (user_id,) in db.query(User.id).all()]
+    finally:
+        db.close()
+    return [create_access_token(data={"sub": str(user_id)}) for user_id in user_ids]
+
+
+def measure(call: Callable[[str], object], tokens: List[str], iterations: int):
+    """Czas pojedynczego wywołania (µs) przy cyklicznym przechodzeniu po tokenach"""
+    # Rozgrzewka: każdy token raz (wypełnienie pamięci podręcznych)
+    for token in tokens:
+        call(token)
+
+    samples = []
+    for i in range(iterations):
+        token = tokens[i % len(tokens)]
+        started = time.perf_counter()
+        call(token)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return {
+        "mean_us": round(sum(samples) / len(samples), 2),
+        "p50_us": round(percentile(samples, 50), 2),
+        "p99_us": round(percentile(samples, 99), 2),
+    }
+
+
+def current_user(token: str):
+    db = SessionLocal()
+    try:
+        return get_current_user(token=token, db=db)
+    finally:
+        db.close()
+
+
+def run(users: int, iterations: int) -> Dict[str, Dict[str, float]]:
+    tokens = prepare_users(users)
+    token_cache_size, principal_cache_size = (
+        token_cache.max_size,
+        principal_cache.max_size,
+    )
+    results = {}
+
+    for cached in (False, True):
+        label = "cache" if cached else "bez cache"
+        token_cache.max_size = token_cache_size if cached else 0
+        principal_cache.max_size = principal_cache_size if cached else 0
+        token_cache.clear()
+        principal_cache.clear()
+
+        results[f"dekodowanie tokena ({label})"] = measure(
+            get_user_id_from_token, tokens, iterations
+        )
+        results[f"get_current_user ({label})"] = measure(
+            current_user, tokens, iterations
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    results = run(args.users, args.iterations)
+    print(f"\n{'pomiar':<36}{'średnio µs':>12}{'p50 µs':>10}{'p99 µs':>10}")
+    for name, item in results.items():
+        print(
+            f"{name:<36}{item['mean_us']:>12}{item['p50_us']:>10}{item['p99_us']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,479 @@
+"""Benchmark endpointów API (in-process) z budżetami względem wyników bazowych
+
+Każdy zbiór danych uruchamiany jest w osobnym procesie z własną bazą SQLite,
+wypełnioną generatorem danych syntetycznych.
+
+Uruchomienie:
+    python -m benchmarks.endpoints --datasets small,medium --update-baseline
+    python -m benchmarks.endpoints --datasets small --tolerance 0.5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Różnice p99 poniżej tej wartości traktowane są jako szum pomiarowy
+LATENCY_NOISE_MS = 5.0
+# Liczba żądań w pomiarze pamięci (tracemalloc spowalnia wykonanie)
+MEMORY_SAMPLES = 3
+
+
+class Scenario:
+    """Jedno żądanie mierzone w pętli; setup wykonywany poza pomiarem czasu"""
+
+    def __init__(
+        self,
+        name: str,
+        method: str,
+        path: Callable[[Dict], str],
+        auth: Optional[str] = None,
+        body: Optional[Callable[[Dict, int], Dict]] = None,
+        setup: Optional[Callable[[Any, Dict, int], None]] = None,
+    ):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.auth = auth
+        self.body = body
+        self.setup = setup
+
+    def request(self, client, state: Dict, iteration: int):
+        if self.setup:
+            self.setup(client, state, iteration)
+        kwargs: Dict[str, Any] = {}
+        if self.auth:
+            kwargs["headers"] = state["headers"][self.auth]
+        if self.body:
+            kwargs["json"] = self.body(state, iteration)
+        started = time.perf_counter()
+        response = client.request(self.method, self.path(state), **kwargs)
+        return response, (time.perf_counter() - started) * 1000
+
+
+def _add_to_cart(client, state: Dict, iteration: int) -> None:
+    client.post(
+        "/cart/add",
+        json={"product_id": state["product_ids"][iteration % 10], "quantity": 1},
+        headers=state["headers"]["buyer"],
+    )
+
+
+def _cart_item(client, state: Dict, iteration: int) -> None:
+    """Nowa pozycja w koszyku użytkownika "cart" (do zmiany lub usunięcia)"""
+    response = client.post(
+        "/cart/add",
+        json={"product_id": state["product_ids"][iteration % 10], "quantity": 1},
+        headers=state["headers"]["cart"],
+    )
+    state["cart_item_id"] = response.json()["id"]
+
+
+def _pending_order(client, state: Dict, iteration: int) -> None:
+    """Zamówienie kupującego w statusie pending (do anulowania)"""
+    _add_to_cart(client, state, iteration)
+    response = client.post(
+        "/orders/create",
+        json={"shipping_address": "ul. Benchmarkowa 1, Warszawa"},
+        headers=state["headers"]["buyer"],
+    )
+    state["pending_order_id"] = response.json()["id"]
+
+
+def _new_product(client, state: Dict, iteration: int) -> None:
+    """Produkt bez zamówień i pozycji koszyka (do usunięcia)"""
+    response = client.post(
+        "/products/admin/",
+        json=_product_body(state, iteration),
+        headers=state["headers"]["admin"],
+    )
+    state["new_product_id"] = response.json()["id"]
+
+
+def _product_body(state: Dict, iteration: int) -> Dict[str, Any]:
+    # Nazwy produktów muszą być unikalne we wszystkich scenariuszach
+    state["products_created"] = state.get("products_created", 0) + 1
+    return {
+        "name": f"Produkt benchmarku {state['run_id']}-{state['products_created']}",
+        "description": "Produkt tworzony przez benchmark endpointów",
+        "price": 10 + iteration % 90,
+        "stock_quantity": 100,
+        "category_id": state["category_id"],
+    }
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("products_list", "GET", lambda s: "/products/?limit=100"),
+    Scenario(
+        "products_filtered",
+        "GET",
+        lambda s: f"/products/?category_id={s['category_id']}&min_price=10&max_price=200",
+    ),
+    Scenario("product_detail", "GET", lambda s: f"/products/{s['product_ids'][0]}"),
+    Scenario("products_search", "GET", lambda s: "/products/search?q=produkt"),
+    Scenario("categories", "GET", lambda s: "/products/categories/"),
+    Scenario(
+        "product_create",
+        "POST",
+        lambda s: "/products/admin/",
+        auth="admin",
+        body=_product_body,
+    ),
+    Scenario(
+        "product_update",
+        "PUT",
+        lambda s: f"/products/admin/{s['product_ids'][-1]}",
+        auth="admin",
+        body=lambda s, i: {"stock_quantity": 1000 + i % 10},
+    ),
+    Scenario(
+        "product_delete",
+        "DELETE",
+        lambda s: f"/products/{s['new_product_id']}",
+        auth="admin",
+        setup=_new_product,
+    ),
+    Scenario("cart_get", "GET", lambda s: "/cart/", auth="shopper"),
+    Scenario(
+        "cart_add",
+        "POST",
+        lambda s: "/cart/add",
+        auth="shopper",
+        body=lambda s, i: {"product_id": s["product_ids"][i % 10], "quantity": 1},
+    ),
+    Scenario(
+        "cart_update",
+        "PUT",
+        lambda s: f"/cart/items/{s['cart_item_id']}",
+        auth="cart",
+        body=lambda s, i: {"quantity": 1 + i % 3},
+        setup=_cart_item,
+    ),
+    Scenario(
+        "cart_remove",
+        "DELETE",
+        lambda s: f"/cart/items/{s['cart_item_id']}",
+        auth="cart",
+        setup=_cart_item,
+    ),
+    Scenario(
+        "cart_clear",
+        "DELETE",
+        lambda s: "/cart/clear",
+        auth="cart",
+        body=lambda s, i: {"confirm": True},
+        setup=_cart_item,
+    ),
+    Scenario(
+        "order_create",
+        "POST",
+        lambda s: "/orders/create",
+        auth="buyer",
+        body=lambda s, i: {"shipping_address": "ul. Benchmarkowa 1, Warszawa"},
+        setup=_add_to_cart,
+    ),
+    Scenario("orders_list", "GET", lambda s: "/orders/", auth="shopper"),
+    Scenario(
+        "order_detail", "GET", lambda s: f"/orders/{s['order_id']}", auth="shopper"
+    ),
+    Scenario(
+        "order_cancel",
+        "PUT",
+        lambda s: f"/orders/{s['pending_order_id']}/cancel",
+        auth="buyer",
+        setup=_pending_order,
+    ),
+    Scenario("orders_admin", "GET", lambda s: "/orders/admin/all", auth="admin"),
+    Scenario(
+        "order_admin_status",
+        "PUT",
+        lambda s: f"/orders/admin/{s['order_id']}",
+        auth="admin",
+        body=lambda s, i: {"status": ("confirmed", "shipped")[i % 2]},
+    ),
+    Scenario("stats_overview", "GET", lambda s: "/stats/overview", auth="admin"),
+    Scenario("stats_sales", "GET", lambda s: "/stats/sales", auth="admin"),
+    Scenario("stats_users", "GET", lambda s: "/stats/users", auth="admin"),
+    Scenario("stats_products", "GET", lambda s: "/stats/products", auth="admin"),
+    Scenario(
+        "stats_inventory", "GET", lambda s: "/stats/inventory/alerts", auth="admin"
+    ),
+    Scenario(
+        "auth_login",
+        "POST",
+        lambda s: "/auth/login",
+        body=lambda s, i: {"email": s["shopper_email"], "password": s["password"]},
+    ),
+    Scenario(
+        "auth_register",
+        "POST",
+        lambda s: "/auth/register",
+        body=lambda s, i: {
+            "email": f"bench{i}_{s['run_id']}@example.com",
+            "password": "benchmark1",
+        },
+    ),
+    Scenario("auth_me", "GET", lambda s: "/auth/me", auth="shopper"),
+]
+
+
+def prepare_state(client) -> Dict[str, Any]:
+    """Tokeny i identyfikatory używane przez scenariusze"""
+    from sqlalchemy import func, select
+
+    from src.database.generator import SYNTHETIC_PASSWORD
+    from src.database.models import SessionLocal, Order, Product, User
+
+    db = SessionLocal()
+    try:
+        # Najaktywniejszy klient - najcięższy przypadek dla koszyka i zamówień
+        shopper_id, order_id = db.execute(
+            select(Order.user_id, func.max(Order.id))
+            .group_by(Order.user_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).one()
+        shopper_email = db.get(User, shopper_id).email
+        products = db.execute(
+            select(Product.id, Product.category_id)
+            .where(Product.is_active == True, Product.stock_quantity > 100)
+            .limit(10)
+        ).all()
+    finally:
+        db.close()
+
+    def login(email: str, password: str) -> Dict[str, str]:
+        token = client.post(
+            "/auth/login", json={"email": email, "password": password}
+        ).json()
+        return {"Authorization": f"Bearer {token['access_token']}"}
+
+    def register(name: str) -> Dict[str, str]:
+        token = client.post(
+            "/auth/register",
+            json={"email": f"{name}_{run_id}@example.com", "password": "benchmark1"},
+        ).json()
+        return {"Authorization": f"Bearer {token['access_token']}"}
+
+    run_id = int(time.time())
+    admin = client.post("/auth/get-admin-token").json()
+    return {
+        "run_id": run_id,
+        "password": SYNTHETIC_PASSWORD,
+        "shopper_email": shopper_email,
+        "order_id": order_id,
+        "product_ids": [row.id for row in products],
+        "category_id": products[0].category_id,
+        "headers": {
+            "shopper": login(shopper_email, SYNTHETIC_PASSWORD),
+            "buyer": register("buyer"),
+            # Osobny koszyk dla scenariuszy zmiany, usuwania i czyszczenia pozycji
+            "cart": register("cart"),
+            "admin": {"Authorization": f"Bearer {admin['access_token']}"},
+        },
+    }
+
+
+def measure(client, scenario: Scenario, state: Dict, iterations: int, warmup: int):
+    """Opóźnienia, przepustowość, liczba zapytań SQL i szczyt pamięci"""
+    from src.database.slow_queries import percentile
+
+    for i in range(warmup):
+        scenario.request(client, state, i)
+
+    latencies, queries, errors = [], [], 0
+    for i in range(warmup, warmup + iterations):
+        response, elapsed = scenario.request(client, state, i)
+        latencies.append(elapsed)
+        queries.append(int(response.headers.get("x-db-queries", -1)))
+        if response.status_code >= 400:
+            errors += 1
+
+    tracemalloc.start()
+    peak = 0
+    for i in range(MEMORY_SAMPLES):
+        tracemalloc.reset_peak()
+        scenario.request(client, state, warmup + iterations + i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "throughput_rps": round(len(latencies) * 1000 / sum(latencies), 1),
+        "sql_queries": int(statistics.median(queries)),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "errors": errors,
+    }
+
+
+def run_dataset(dataset: str, iterations: int, warmup: int) -> Dict[str, Any]:
+    """Pomiar wszystkich scenariuszy na jednym zbiorze danych (bieżący proces)"""
+    from fastapi.testclient import TestClient
+
+    from src.database.generator import DATASET_SIZES, generate_synthetic_data
+    from src.main import app
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        generate_synthetic_data(seed=42, **DATASET_SIZES[dataset])
+        state = prepare_state(client)
+        results = {}
+        for scenario in SCENARIOS:
+            results[scenario.name] = measure(
+                client, scenario, state, iterations, warmup
+            )
+            print(f"⏱️ {dataset}/{scenario.name}: {results[scenario.name]}")
+    return {"dataset": dataset, "iterations": iterations, "endpoints": results}
+
+
+def run_dataset_process(dataset: str, iterations: int, warmup: int) -> Dict[str, Any]:
+    """Uruchomienie zbioru danych w osobnym procesie z czystą bazą"""
+    with tempfile.TemporaryDirectory(prefix=f"bench_{dataset}_") as directory:
+        output = os.path.join(directory, "result.json")
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{directory}/bench.db",
+            PYTHONPATH=REPO_ROOT,
+            BACKUP_SCHEDULE_ENABLED="0",
+            SQL_INSTRUMENTATION_ENABLED="1",
+            # Scenariusz logowania powtarza próby z jednego adresu i konta
+            LOGIN_THROTTLE_ENABLED="0",
+        )
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.endpoints",
+                "--run-dataset",
+                dataset,
+                "--iterations",
+                str(iterations),
+                "--warmup",
+                str(warmup),
+                "--output",
+                output,
+            ],
+            cwd=directory,
+            env=env,
+            check=True,
+        )
+        with open(output) as f:
+            return json.load(f)
+
+
+def baseline_path(dataset: str) -> str:
+    return os.path.join(BASELINE_DIR, f"endpoints_{dataset}.json")
+
+
+def check_budget(
+    result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Lista przekroczeń budżetu względem wyników bazowych"""
+    violations = []
+    for name, current in result["endpoints"].items():
+        base = baseline["endpoints"].get(name)
+        if base is None:
+            violations.append(f"{name}: brak wyników bazowych (--update-baseline)")
+            continue
+        if base["errors"] > 0:
+            # Błędny endpoint w wynikach bazowych nie może być punktem odniesienia
+            violations.append(f"{name}: błędy w wynikach bazowych ({base['errors']})")
+            continue
+        limit = base["p99_ms"] * (1 + tolerance)
+        if (
+            current["p99_ms"] > limit
+            and current["p99_ms"] - base["p99_ms"] > LATENCY_NOISE_MS
+        ):
+            violations.append(f"{name}: p99 {current['p99_ms']} ms > {limit:.3f} ms")
+        if current["sql_queries"] > base["sql_queries"]:
+            violations.append(
+                f"{name}: zapytania SQL {current['sql_queries']} > {base['sql_queries']}"
+            )
+        memory_limit = base["peak_memory_kb"] * (1 + tolerance)
+        if current["peak_memory_kb"] > memory_limit:
+            violations.append(
+                f"{name}: pamięć {current['peak_memory_kb']} KB > {memory_limit:.1f} KB"
+            )
+        if current["errors"] > base["errors"]:
+            violations.append(f"{name}: błędy {current['errors']} > {base['errors']}")
+    return violations
+
+
+def print_results(result: Dict[str, Any]) -> None:
+    print(f"\nZbiór danych: {result['dataset']}")
+    print(
+        f"{'endpoint':<20}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+        f"{'SQL':>6}{'pamięć KB':>12}{'błędy':>8}"
+    )
+    for name, item in result["endpoints"].items():
+        print(
+            f"{name:<20}{item['p50_ms']:>10}{item['p99_ms']:>10}"
+            f"{item['throughput_rps']:>10}{item['sql_queries']:>6}"
+            f"{item['peak_memory_kb']:>12}{item['errors']:>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", default="small")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--run-dataset", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_dataset:
+        result = run_dataset(args.run_dataset, args.iterations, args.warmup)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        return
+
+    failed = False
+    for dataset in args.datasets.split(","):
+        result = run_dataset_process(dataset, args.iterations, args.warmup)
+        print_results(result)
+
+        path = baseline_path(dataset)
+        if args.update_baseline:
+            broken = [
+                name for name, item in result["endpoints"].items() if item["errors"]
+            ]
+            if broken:
+                print(
+                    f"❌ {dataset}: błędy w {', '.join(broken)} - wyniki nie zapisane"
+                )
+                failed = True
+                continue
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(result, f, indent=2)
+            print(f"✅ Zapisano wyniki bazowe: {path}")
+            continue
+
+        if not os.path.exists(path):
+            print(f"❌ Brak wyników bazowych dla {dataset} (--update-baseline)")
+            failed = True
+            continue
+        with open(path) as f:
+            violations = check_budget(result, json.load(f), args.tolerance)
+        for violation in violations:
+            print(f"❌ {dataset}/{violation}")
+        failed = failed or bool(violations)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark przepustowości odczytu/zapisu dla profili połączeń SQLite
+
+Uruchomienie:
+    python -m benchmarks.sqlite_profile --seconds 5 --readers 4 --writers 2
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict
+
+from src.database.models import (
+    SQLITE_PROFILES,
+    apply_sqlite_pragmas,
+    get_sqlite_pragmas,
+)
+
+
+def prepare_database(path: str, rows: int) -> None:
+    """Tworzenie tabeli testowej z danymi początkowymi"""
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price REAL, stock INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO products (name, price, stock) VALUES (?, ?, ?)",
+        ((f"Produkt {i}", random.uniform(1, 1000), 100) for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_profile(profile: str, seconds: float, readers: int, writers: int, rows: int):
+    """Pomiar liczby operacji dla jednego profilu"""
+    directory = tempfile.mkdtemp(prefix=f"bench_{profile}_")
+    path = os.path.join(directory, "bench.db")
+    prepare_database(path, rows)
+
+    pragmas = get_sqlite_pragmas(profile)
+    counters: Dict[str, int] = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def worker(kind: str) -> None:
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        apply_sqlite_pragmas(conn, pragmas)
+        done = locked = 0
+        while time.perf_counter() < stop_at:
+            product_id = random.randint(1, rows)
+            try:
+                if kind == "reads":
+                    conn.execute(
+                        "SELECT name, price FROM products WHERE id = ?", (product_id,)
+                    ).fetchone()
+                else:
+                    conn.execute(
+                        "UPDATE products SET stock = stock - 1 WHERE id = ?",
+                        (product_id,),
+                    )
+                    conn.commit()
+                done += 1
+            except sqlite3.OperationalError:
+                conn.rollback()
+                locked += 1
+        conn.close()
+        with lock:
+            counters[kind] += done
+            counters["locked"] += locked
+
+    threads = [threading.Thread(target=worker, args=("reads",)) for _ in range(readers)]
+    threads += [
+        threading.Thread(target=worker, args=("writes",)) for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.rmdir(directory)
+
+    return {
+        "profile": profile,
+        "reads_per_second": round(counters["reads"] / seconds, 1),
+        "writes_per_second": round(counters["writes"] / seconds, 1),
+        "locked_errors": counters["locked"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    results = [
+        run_profile(profile, args.seconds, args.readers, args.writers, args.rows)
+        for profile in SQLITE_PROFILES
+    ]
+
+    print(f"{'profil':<14}{'odczyty/s':>12}{'zapisy/s':>12}{'locked':>10}")
+    for result in results:
+        print(
+            f"{result['profile']:<14}{result['reads_per_second']:>12}"
+            f"{result['writes_per_second']:>12}{result['locked_errors']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Generator ruchu: współbieżne sesje klientów wobec działającego serwera
+
+Każda sesja: rejestracja lub logowanie, przeglądanie /products, dodanie do koszyka,
+/orders/create i (czasem) anulowanie zamówienia. Sesje przychodzą losowo (proces
+Poissona) z zadaną intensywnością.
+
+Uruchomienie:
+    python -m benchmarks.traffic --url http://localhost:8000 --rate 20 --duration 60
+    python -m benchmarks.traffic --rate 50 --existing-users 50000 --json wynik.json
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from src.database.generator import SYNTHETIC_EMAIL_DOMAIN, SYNTHETIC_PASSWORD
+from src.database.slow_queries import percentile
+
+# Granice przedziałów histogramu opóźnień (ms)
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+REQUEST_TIMEOUT = 30
+
+
+class StepStats:
+    """Opóźnienia i błędy kroków scenariusza (wspólne dla wszystkich wątków)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.lock_errors: Dict[str, int] = defaultdict(int)
+        self.status_codes: Dict[str, Dict[int, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+
+    def record(self, step: str, elapsed_ms: float, status: int, body: bytes) -> None:
+        with self._lock:
+            self.latencies[step].append(elapsed_ms)
+            self.status_codes[step][status] += 1
+            if status >= 400 or status == 0:
+                self.errors[step] += 1
+            # SQLite zgłasza blokadę zapisu jako "database is locked"
+            if b"locked" in body:
+                self.lock_errors[step] += 1
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        steps = {}
+        with self._lock:
+            for step, latencies in self.latencies.items():
+                histogram = {}
+                lower = 0
+                for upper in HISTOGRAM_BUCKETS_MS + [None]:
+                    label = f"{lower}-{upper}" if upper else f">{lower}"
+                    histogram[label] = sum(
+                        1
+                        for value in latencies
+                        if lower <= value and (upper is None or value < upper)
+                    )
+                    lower = upper
+                steps[step] = {
+                    "requests": len(latencies),
+                    "throughput_rps": round(len(latencies) / duration, 2),
+                    "errors": self.errors[step],
+                    "error_rate": round(self.errors[step] / len(latencies), 4),
+                    "lock_errors": self.lock_errors[step],
+                    "p50_ms": round(percentile(latencies, 50), 2),
+                    "p95_ms": round(percentile(latencies, 95), 2),
+                    "p99_ms": round(percentile(latencies, 99), 2),
+                    "status_codes": dict(self.status_codes[step]),
+                    "histogram_ms": histogram,
+                }
+        return steps
+
+
+class Session:
+    """Jedna sesja klienta z własnym połączeniem keep-alive"""
+
+    def __init__(self, base_url: str, stats: StepStats, rng: random.Random):
+        parts = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(parts.netloc, timeout=REQUEST_TIMEOUT)
+        self.stats = stats
+        self.rng = rng
+        self.headers = {"Content-Type": "application/json"}
+
+    def call(
+        self, step: str, method: str, path: str, payload: Optional[Dict] = None
+    ) -> Optional[Any]:
+        body = json.dumps(payload).encode() if payload is not None else None
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=self.headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            # Zerwane połączenie - kolejne żądanie otworzy nowe
+            self.connection.close()
+            data, status = str(e).encode(), 0
+        self.stats.record(step, (time.perf_counter() - started) * 1000, status, data)
+        if 200 <= status < 300:
+            return json.loads(data) if data else {}
+        return None
+
+    def authenticate(self, existing_users: int, session_id: int) -> bool:
+        if existing_users:
+            user_id = self.rng.randint(1, existing_users)
+            token = self.call(
+                "login",
+                "POST",
+                "/auth/login",
+                {
+                    "email": f"user{user_id}@{SYNTHETIC_EMAIL_DOMAIN}",
+                    "password": SYNTHETIC_PASSWORD,
+                },
+            )
+        else:
+            token = self.call(
+                "register",
+                "POST",
+                "/auth/register",
+                {
+                    "email": f"traffic_{int(time.time())}_{session_id}@example.com",
+                    "password": "traffic123",
+                    "full_name": f"Sesja {session_id}",
+                },
+            )
+        if not token:
+            return False
+        self.headers["Authorization"] = f"Bearer {token['access_token']}"
+        return True
+
+    def run(self, session_id: int, options: argparse.Namespace) -> bool:
+        try:
+            if not self.authenticate(options.existing_users, session_id):
+                return False
+
+            products = self.call(
+                "browse",
+                "GET",
+                f"/products/?skip={self.rng.randrange(options.catalog_pages) * 20}&limit=20",
+            )
+            if not products:
+                products = self.call("browse", "GET", "/products/?limit=20")
+            if not products:
+                return False
+
+            for product in self.rng.sample(products, min(2, len(products))):
+                self.call("product", "GET", f"/products/{product['id']}")
+                time.sleep(options.think_time * self.rng.random())
+
+            in_stock = [p for p in products if p["stock_quantity"] > 0]
+            for product in self.rng.sample(
+                in_stock, min(self.rng.randint(1, 3), len(in_stock))
+            ):
+                self.call(
+                    "cart_add",
+                    "POST",
+                    "/cart/add",
+                    {"product_id": product["id"], "quantity": 1},
+                )
+
+            order = self.call(
+                "order_create",
+                "POST",
+                "/orders/create",
+                {"shipping_address": f"ul. Obciążeniowa {session_id}, 00-001 Warszawa"},
+            )
+            if order and self.rng.random() < options.cancel_ratio:
+                self.call("order_cancel", "PUT", f"/orders/{order['id']}/cancel")
+            return order is not None
+        finally:
+            self.connection.close()
+
+
+def run_traffic(options: argparse.Namespace) -> Dict[str, Any]:
+    """Sesje uruchamiane z zadaną intensywnością przez określony czas"""
+    stats = StepStats()
+    rng = random.Random(options.seed)
+    results = {"started": 0, "completed": 0, "rejected": 0}
+    results_lock = threading.Lock()
+    active = threading.BoundedSemaphore(options.max_sessions)
+
+    def session_task(session_id: int, seed: int) -> None:
+        try:
+            ok = Session(options.url, stats, random.Random(seed)).run(
+                session_id, options
+            )
+            with results_lock:
+                results["completed"] += int(ok)
+        finally:
+            active.release()
+
+    started = time.perf_counter()
+    deadline = started + options.duration
+    with ThreadPoolExecutor(max_workers=options.max_sessions) as executor:
+        session_id = 0
+        next_arrival = started
+        while True:
+            next_arrival += rng.expovariate(options.rate)
+            if next_arrival >= deadline:
+                break
+            time.sleep(max(next_arrival - time.perf_counter(), 0))
+            # Przy nasyceniu sesje są odrzucane zamiast ukrytego spowalniania przybyć
+            if not active.acquire(blocking=False):
+                results["rejected"] += 1
+                continue
+            session_id += 1
+            results["started"] += 1
+            executor.submit(session_task, session_id, rng.random())
+    duration = time.perf_counter() - started
+
+    steps = stats.report(duration)
+    return {
+        "url": options.url,
+        "rate": options.rate,
+        "duration_seconds": round(duration, 2),
+        "sessions": results,
+        "sessions_per_second": round(results["completed"] / duration, 2),
+        "requests": sum(step["requests"] for step in steps.values()),
+        "errors": sum(step["errors"] for step in steps.values()),
+        "lock_errors": sum(step["lock_errors"] for step in steps.values()),
+        "steps": steps,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    sessions = report["sessions"]
+    print(
+        f"\nSesje: {sessions['started']} rozpoczęte, {sessions['completed']} zakończone "
+        f"zamówieniem, {sessions['rejected']} odrzucone "
+        f"({report['sessions_per_second']} sesji/s, {report['duration_seconds']} s)"
+    )
+    print(
+        f"{'krok':<14}{'żądania':>9}{'req/s':>9}{'błędy':>8}{'locked':>8}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for step, item in report["steps"].items():
+        print(
+            f"{step:<14}{item['requests']:>9}{item['throughput_rps']:>9}"
+            f"{item['errors']:>8}{item['lock_errors']:>8}{item['p50_ms']:>10}"
+            f"{item['p95_ms']:>10}{item['p99_ms']:>10}"
+        )
+    for step, item in report["steps"].items():
+        buckets = " ".join(
+            f"{label}:{count}" for label, count in item["histogram_ms"].items() if count
+        )
+        print(f"  {step:<12} {buckets}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument(
+        "--rate", type=float, default=10.0, help="nowe sesje na sekundę"
+    )
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--max-sessions", type=int, default=100)
+    parser.add_argument(
+        "--existing-users",
+        type=int,
+        default=0,
+        help="logowanie jako użytkownicy z generatora danych zamiast rejestracji",
+    )
+    parser.add_argument("--catalog-pages", type=int, default=5)
+    parser.add_argument("--cancel-ratio", type=float, default=0.2)
+    parser.add_argument("--think-time", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="zapis pełnego raportu do pliku")
+    options = parser.parse_args()
+
+    report = run_traffic(options)
+    print_report(report)
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
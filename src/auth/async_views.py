@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+
+from .schemas import UserProfile
+from .dependencies import get_current_user_async
+
+# Asynchroniczne wersje endpointów uwierzytelniania (DATABASE_ASYNC=1)
+async_auth_router = APIRouter(prefix="/auth", tags=["authentication"])
+
+
+@async_auth_router.get("/me", response_model=UserProfile)
+async def get_current_user_profile_async(
+    current_user: UserProfile = Depends(get_current_user_async),
+):
+    """Pobieranie profilu obecnego użytkownika"""
+    return current_user
@@ -0,0 +1,265 @@
+import codecs
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from src.database.models import User, engine, session_gate
+from .hash_worker import hash_password
+from .principal_cache import bump_user_versions
+from .schemas import UserCreate
+
+# Liczba procesów hashujących na czas importu (0 = hashowanie w bieżącym wątku);
+# domyślnie połowa rdzeni - druga połowa zostaje dla puli logowań
+BULK_IMPORT_WORKERS = int(
+    os.getenv("BULK_IMPORT_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+# Liczba jednoczesnych importów w workerze; kolejne dostają 429
+BULK_IMPORT_CONCURRENCY = int(os.getenv("BULK_IMPORT_CONCURRENCY", "1"))
+BULK_IMPORT_RETRY_AFTER = int(os.getenv("BULK_IMPORT_RETRY_AFTER", "5"))
+# Liczba wierszy w jednej partii (jedno zapytanie o duplikaty, jedna transakcja)
+BULK_IMPORT_BATCH = int(os.getenv("BULK_IMPORT_BATCH", "1000"))
+# Maksymalna liczba błędów zwracanych w odpowiedzi (pozostałe są tylko liczone)
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+
+BULK_IMPORT_FORMATS = ("csv", "ndjson")
+
+_import_slots = threading.BoundedSemaphore(max(BULK_IMPORT_CONCURRENCY, 1))
+
+
+@contextmanager
+def import_slot():
+    """Miejsce na import (bez czekania) - ogranicza liczbę procesów hashujących"""
+    if not _import_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Import użytkowników jest już w toku, spróbuj ponownie później",
+            headers={"Retry-After": str(BULK_IMPORT_RETRY_AFTER)},
+        )
+    try:
+        yield
+    finally:
+        _import_slots.release()
+
+
+@contextmanager
+def gated_connection():
+    """Transakcja przez session_gate - przywracanie bazy czeka na zakończenie partii"""
+    session_gate.enter()
+    try:
+        with engine.begin() as connection:
+            yield connection
+    finally:
+        session_gate.leave()
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Podział strumienia bajtów na linie UTF-8 (z końcami linii, dla modułu csv)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_records(
+    lines: Iterable[str], file_format: str
+) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Rekordy (numer wiersza, dane, błąd parsowania) z CSV z nagłówkiem lub NDJSON"""
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # Numer wiersza pliku (nagłówek to wiersz 1)
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Nieprawidłowy JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Wiersz musi być obiektem JSON"
+            continue
+        yield line_number, record, None
+
+
+class BulkUserImport:
+    """Import użytkowników w partiach: walidacja, deduplikacja, równoległe hashowanie"""
+
+    def __init__(
+        self,
+        workers: int = BULK_IMPORT_WORKERS,
+        batch_size: int = BULK_IMPORT_BATCH,
+        max_errors: int = BULK_IMPORT_MAX_ERRORS,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.errors: List[Dict[str, Any]] = []
+        self.counters = {
+            "rows": 0,
+            "imported": 0,
+            "duplicates": 0,
+            "invalid": 0,
+            "failed": 0,
+        }
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _error(self, row: int, email: Optional[str], kind: str, message: str):
+        self.counters[kind] += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "email": email, "error": message})
+
+    def _hash_passwords(self, passwords: List[str]) -> List[str]:
+        if not self.workers:
+            return [hash_password(password)[0] for password in passwords]
+        if self._executor is None:
+            # Osobna pula na czas importu - nie zajmuje procesów obsługujących logowania;
+            # liczbę takich pul ogranicza import_slot()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return [
+            hashed
+            for hashed, _ in self._executor.map(
+                hash_password, passwords, chunksize=chunksize
+            )
+        ]
+
+    def _process_batch(self, batch) -> None:
+        users: Dict[str, Tuple[int, UserCreate]] = {}
+        for row, record, parse_error in batch:
+            self.counters["rows"] += 1
+            if parse_error:
+                self._error(row, None, "invalid", parse_error)
+                continue
+            try:
+                user = UserCreate(
+                    email=(record.get("email") or "").strip(),
+                    password=record.get("password") or "",
+                    full_name=record.get("full_name") or None,
+                )
+            except ValidationError as e:
+                first = e.errors()[0]
+                field = ".".join(str(part) for part in first["loc"])
+                self._error(
+                    row, record.get("email"), "invalid", f"{field}: {first['msg']}"
+                )
+                continue
+            if user.email in users:
+                self._error(row, user.email, "duplicates", "Powtórzony email w pliku")
+                continue
+            users[user.email] = (row, user)
+
+        if not users:
+            return
+
+        # Jedno zapytanie o istniejące adresy dla całej partii (indeks unikalny users.email)
+        with gated_connection() as connection:
+            existing = set(
+                connection.execute(
+                    select(User.email).where(User.email.in_(list(users)))
+                ).scalars()
+            )
+        for email in existing:
+            row, _ = users.pop(email)
+            self._error(
+                row, email, "duplicates", "Użytkownik z tym adresem email już istnieje"
+            )
+
+        if not users:
+            return
+
+        hashed = self._hash_passwords([user.password for _, user in users.values()])
+        values = [
+            {
+                "email": user.email,
+                "full_name": user.full_name,
+                "hashed_password": hashed_password,
+                "is_active": True,
+                "is_admin": False,
+            }
+            for (_, user), hashed_password in zip(users.values(), hashed)
+        ]
+
+        statement = insert(User.__table__)
+        try:
+            with gated_connection() as connection:
+                connection.execute(statement, values)
+                bump_user_versions(connection, [item["email"] for item in values])
+            self.counters["imported"] += len(values)
+            return
+        except SQLAlchemyError:
+            # Np. równoległa rejestracja tego samego adresu - wiersze wstawiane pojedynczo,
+            # aby błąd dotyczył tylko jednego wiersza
+            pass
+
+        for (row, _), item in zip(users.values(), values):
+            try:
+                with gated_connection() as connection:
+                    connection.execute(statement, item)
+                    bump_user_versions(connection, [item["email"]])
+                self.counters["imported"] += 1
+            except IntegrityError:
+                self._error(
+                    row,
+                    item["email"],
+                    "duplicates",
+                    "Użytkownik z tym adresem email już istnieje",
+                )
+            except SQLAlchemyError as e:
+                self._error(
+                    row, item["email"], "failed", f"Błąd zapisu: {e.__class__.__name__}"
+                )
+
+    def run(self, chunks: Iterable[bytes], file_format: str) -> Dict[str, Any]:
+        """Import ze strumienia bajtów; błędne wiersze nie przerywają importu"""
+        started = time.perf_counter()
+        records = iter_records(iter_lines(chunks), file_format)
+        try:
+            while True:
+                batch = list(itertools.islice(records, self.batch_size))
+                if not batch:
+                    break
+                self._process_batch(batch)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+
+        duration = time.perf_counter() - started
+        print(
+            f"👥 Import użytkowników: {self.counters['imported']}/{self.counters['rows']} "
+            f"w {duration:.1f} s"
+        )
+        return {
+            **self.counters,
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": (
+                round(self.counters["rows"] / duration, 1) if duration > 0 else None
+            ),
+            "errors": self.errors,
+            "errors_truncated": len(self.errors)
+            < sum(self.counters[kind] for kind in ("duplicates", "invalid", "failed")),
+        }
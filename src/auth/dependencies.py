@@ -1,14 +1,22 @@
 from datetime import datetime, timedelta
 from typing import Optional, Generator, Dict, Any
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+import hashlib
 import os
+import uuid
 
 # Import z nowego modułu database
-from src.database.models import User, get_db
+from src.database.models import User, get_db, get_async_db
+from .hashing import password_hasher
+from .principal_cache import principal_cache
+from .revocation import revocation_store
+from .token_cache import token_cache
 
 # Ustawienia JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -16,26 +24,20 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-# Ustawienia haseł
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Schemat OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-# Magazyn unieważnionych tokenów (w prawdziwej aplikacji lepiej użyć Redis)
-revoked_tokens: set = set()
-
 # get_db importowane z database.models
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Weryfikacja hasła"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Weryfikacja hasła (w puli procesów hashujących)"""
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hashowanie hasła"""
-    return pwd_context.hash(password)
+    """Hashowanie hasła (w puli procesów hashujących)"""
+    return password_hasher.hash(password)
 
 
 def create_access_token(
@@ -47,7 +49,7 @@ def create_access_token(
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -61,11 +63,16 @@ def create_refresh_token(
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def get_token_id(token: str, payload: Dict[str, Any]) -> str:
+    """Identyfikator tokena (jti; skrót tokena dla tokenów wystawionych bez jti)"""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
 def decode_refresh_token(token: str) -> Dict[str, Any]:
     """Dekodowanie refresh tokena"""
     try:
@@ -75,7 +82,7 @@ def decode_refresh_token(token: str) -> Dict[str, Any]:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Nieprawidłowy typ tokena",
             )
-        if token in revoked_tokens:
+        if revocation_store.is_revoked(get_token_id(token, payload)):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token został unieważniony",
@@ -88,9 +95,17 @@ def decode_refresh_token(token: str) -> Dict[str, Any]:
         )
 
 
-def revoke_refresh_token(token: str) -> None:
-    """Unieważnienie refresh tokena"""
-    revoked_tokens.add(token)
+def revoke_refresh_token(token: str) -> bool:
+    """Unieważnienie refresh tokena (False, jeśli był już unieważniony)"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        # Nieprawidłowy lub wygasły token nie wymaga unieważnienia
+        return False
+
+    token_cache.discard(token)
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    return revocation_store.revoke(get_token_id(token, payload), expires_at)
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
@@ -131,27 +146,74 @@ def create_user(
     return db_user
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
-    """Pobieranie obecnego użytkownika z tokena"""
-    credentials_exception = HTTPException(
+def _decode_cached(token: str) -> Dict[str, Any]:
+    """Treść tokena z pamięci podręcznej albo po weryfikacji podpisu"""
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.put(token, payload)
+    return payload
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Dekodowanie tokena z pominięciem weryfikacji tokenów już sprawdzonych"""
+    payload = _decode_cached(token)
+
+    # Sprawdzane również dla tokenów z pamięci - unieważnienie mogło nastąpić w innym workerze
+    if revocation_store.is_revoked(get_token_id(token, payload)):
+        raise JWTError("Token został unieważniony")
+    return payload
+
+
+async def decode_access_token_async(token: str, db: AsyncSession) -> Dict[str, Any]:
+    """Dekodowanie tokena w trybie asynchronicznym (unieważnienia przez sesję żądania)"""
+    payload = _decode_cached(token)
+    if await revocation_store.is_revoked_async(get_token_id(token, payload), db):
+        raise JWTError("Token został unieważniony")
+    return payload
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Nie można zweryfikować danych uwierzytelniających",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _user_id_from_payload(payload: Dict[str, Any]) -> int:
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise _credentials_exception()
+    return int(user_id)
+
+
+def get_user_id_from_token(token: str) -> int:
+    """Dekodowanie access tokena i pobranie ID użytkownika"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        payload = decode_access_token(token)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    return _user_id_from_payload(payload)
 
-    user = get_user_by_id(db, user_id=int(user_id))
+
+async def get_user_id_from_token_async(token: str, db: AsyncSession) -> int:
+    """Dekodowanie access tokena i pobranie ID użytkownika (tryb asynchroniczny)"""
+    try:
+        payload = await decode_access_token_async(token, db)
+    except JWTError:
+        raise _credentials_exception()
+    return _user_id_from_payload(payload)
+
+
+def get_user_profile(user: Optional[User]):
+    """Konwersja User na UserProfile"""
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Nie można zweryfikować danych uwierzytelniających",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     # Zwracamy obiekt w formacie schematu UserProfile
     from .schemas import UserProfile
@@ -161,6 +223,52 @@ def get_current_user(
     )
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+):
+    """Pobieranie obecnego użytkownika z tokena"""
+    user_id = get_user_id_from_token(token)
+
+    statement = principal_cache.sync_statement()
+    if statement is not None:
+        try:
+            principal_cache.apply_changes(db.execute(statement).all())
+        except SQLAlchemyError:
+            # Brak tabeli user_versions (baza niezainicjalizowana) - bez pamięci podręcznej
+            db.rollback()
+            principal_cache.clear()
+
+    profile = principal_cache.get(user_id)
+    if profile is None:
+        epoch = principal_cache.epoch
+        profile = get_user_profile(get_user_by_id(db, user_id=user_id))
+        principal_cache.put(profile, epoch)
+    return profile
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+):
+    """Pobieranie obecnego użytkownika z tokena (tryb asynchroniczny)"""
+    user_id = await get_user_id_from_token_async(token, db)
+
+    statement = principal_cache.sync_statement()
+    if statement is not None:
+        try:
+            principal_cache.apply_changes((await db.execute(statement)).all())
+        except SQLAlchemyError:
+            await db.rollback()
+            principal_cache.clear()
+
+    profile = principal_cache.get(user_id)
+    if profile is None:
+        epoch = principal_cache.epoch
+        user = await db.scalar(select(User).where(User.id == user_id))
+        profile = get_user_profile(user)
+        principal_cache.put(profile, epoch)
+    return profile
+
+
 def get_current_active_user(current_user=Depends(get_current_user)):
     """Pobieranie aktywnego użytkownika"""
     if not current_user.is_active:
@@ -175,3 +283,12 @@ def get_current_admin_user(current_user=Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN, detail="Niewystarczające uprawnienia"
         )
     return current_user
+
+
+async def get_current_admin_user_async(current_user=Depends(get_current_user_async)):
+    """Pobieranie użytkownika z prawami administratora (tryb asynchroniczny)"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Niewystarczające uprawnienia"
+        )
+    return current_user
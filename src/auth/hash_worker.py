@@ -0,0 +1,27 @@
+"""Funkcje wykonywane w procesach puli hashowania haseł
+
+Moduł-liść: importuje tylko passlib, więc procesy uruchamiane metodą spawn nie
+ładują aplikacji (routerów, modeli, silnika bazy).
+"""
+
+import time
+
+from passlib.context import CryptContext
+
+# Ustawienia haseł
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str):
+    started = time.perf_counter()
+    return pwd_context.hash(password), time.perf_counter() - started
+
+
+def verify_password(password: str, hashed_password: str):
+    started = time.perf_counter()
+    return pwd_context.verify(password, hashed_password), time.perf_counter() - started
+
+
+def warm_up() -> None:
+    """Jednorazowe załadowanie backendu bcrypt (pierwszy hash jest najwolniejszy)"""
+    pwd_context.hash("warm-up")
@@ -0,0 +1,152 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from .hash_worker import hash_password, verify_password, warm_up
+
+# Pula procesów do hashowania haseł (0 = hashowanie w wątku żądania)
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+# Maksymalna liczba zadań czekających na wolny proces
+PASSWORD_HASH_QUEUE = int(
+    os.getenv("PASSWORD_HASH_QUEUE", str(PASSWORD_HASH_WORKERS * 4))
+)
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1"))
+# Liczba ostatnich pomiarów czasu używanych do percentyli
+PASSWORD_HASH_SAMPLES = 1000
+
+
+class PasswordHasher:
+    """Hashowanie bcrypt w osobnych procesach z ograniczoną kolejką zadań"""
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        queue_size: int = PASSWORD_HASH_QUEUE,
+    ):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self._hash_ms: deque = deque(maxlen=PASSWORD_HASH_SAMPLES)
+        self._wait_ms: deque = deque(maxlen=PASSWORD_HASH_SAMPLES)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: procesy potomne nie dziedziczą wątków ani połączeń z bazą
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def start(self) -> None:
+        """Uruchomienie procesów z wyprzedzeniem (pierwsze logowanie nie czeka)"""
+        if self.workers:
+            executor = self._get_executor()
+            for _ in range(self.workers):
+                executor.submit(warm_up)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _failed(self, broken: bool) -> None:
+        with self._lock:
+            self._counters["failed"] += 1
+        if broken:
+            # Proces zakończył się nieoczekiwanie - kolejne zadanie utworzy nową pulę
+            self.shutdown()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Weryfikacja hasła jest chwilowo niedostępna",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+        )
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _run(self, function, *args):
+        if not self.workers:
+            return function(*args)[0]
+
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._counters["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Zbyt wiele jednoczesnych logowań, spróbuj ponownie za chwilę",
+                    headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+                )
+            self._in_flight += 1
+            self._counters["submitted"] += 1
+
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(function, *args)
+        except BrokenProcessPool:
+            self._release()
+            self._failed(broken=True)
+        future.add_done_callback(self._release)
+
+        try:
+            result, hash_seconds = future.result(timeout=PASSWORD_HASH_TIMEOUT)
+        except TimeoutError:
+            self._failed(broken=False)
+        except BrokenProcessPool:
+            self._failed(broken=True)
+
+        total_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._counters["completed"] += 1
+            self._hash_ms.append(hash_seconds * 1000)
+            self._wait_ms.append(max(total_ms - hash_seconds * 1000, 0))
+        return result
+
+    def hash(self, password: str) -> str:
+        return self._run(hash_password, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run(verify_password, password, hashed_password)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Głębokość kolejki, liczniki i percentyle czasu hashowania"""
+        from src.database.slow_queries import percentile
+
+        with self._lock:
+            in_flight = self._in_flight
+            counters = dict(self._counters)
+            hash_ms = list(self._hash_ms)
+            wait_ms = list(self._wait_ms)
+
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": in_flight,
+            "queue_depth": max(in_flight - self.workers, 0),
+            **counters,
+            "hash_ms": {
+                f"p{p}": round(percentile(hash_ms, p), 2) for p in (50, 95, 99)
+            },
+            "queue_wait_ms": {
+                f"p{p}": round(percentile(wait_ms, p), 2) for p in (50, 95, 99)
+            },
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session, object_session
+
+from src.database.models import User, UserVersion, get_database_generation
+from .schemas import UserProfile
+
+# Czas życia profilu w pamięci workera (sekundy) i maksymalna liczba wpisów
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+# Jak często worker sprawdza w tabeli user_versions zmiany z innych workerów
+PRINCIPAL_VERSION_CHECK_INTERVAL = float(
+    os.getenv("PRINCIPAL_VERSION_CHECK_INTERVAL", "1")
+)
+
+
+class PrincipalCache:
+    """LRU profili zalogowanych użytkowników z TTL (osobne w każdym workerze)"""
+
+    def __init__(
+        self,
+        ttl: float = PRINCIPAL_CACHE_TTL,
+        max_size: int = PRINCIPAL_CACHE_SIZE,
+        check_interval: float = PRINCIPAL_VERSION_CHECK_INTERVAL,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Zwiększane przy każdym unieważnieniu - chroni przed zapisem profilu
+        # odczytanego z bazy przed zmianą, a dodanego do pamięci już po niej
+        self.epoch = 0
+        self._seen_version = 0
+        self._generation = get_database_generation()
+        self._next_check = 0.0
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: int) -> Optional[UserProfile]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] <= now:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._counters["hits"] += 1
+            return entry[0]
+
+    def put(self, profile: UserProfile, epoch: int) -> None:
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if epoch != self.epoch:
+                return
+            self._entries[profile.id] = (profile, time.monotonic() + self.ttl)
+            self._entries.move_to_end(profile.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            self.epoch += 1
+            for user_id in user_ids:
+                if self._entries.pop(user_id, None) is not None:
+                    self._counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.epoch += 1
+            self._counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._seen_version = 0
+
+    def sync_statement(self):
+        """Zapytanie o zmienione wersje lub None, jeśli sprawdzenie nie jest jeszcze potrzebne"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_check:
+                return None
+            self._next_check = now + self.check_interval
+
+        # Przywrócenie bazy z kopii (również w innym workerze) - wersje mogły się cofnąć
+        generation = get_database_generation()
+        if generation != self._generation:
+            self._generation = generation
+            self.clear()
+
+        return select(UserVersion.user_id, UserVersion.version).where(
+            UserVersion.version > self._seen_version
+        )
+
+    def apply_changes(self, rows) -> None:
+        rows = list(rows)
+        if not rows:
+            return
+        self.invalidate(user_id for user_id, _ in rows)
+        with self._lock:
+            self._seen_version = max(
+                self._seen_version, max(version for _, version in rows)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "seen_version": self._seen_version,
+                **self._counters,
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+def bump_user_versions(connection, emails: List[str]) -> None:
+    """Nowa wersja dla użytkowników wstawionych poza ORM (np. import masowy);
+    zmiany i usunięcia obsługują wyzwalacze na tabeli users"""
+    next_version = select(
+        func.coalesce(func.max(UserVersion.version), 0) + 1
+    ).scalar_subquery()
+    connection.execute(
+        insert(UserVersion)
+        .prefix_with("OR REPLACE")
+        .from_select(
+            ["user_id", "version"],
+            select(User.id, next_version).where(User.email.in_(emails)),
+        )
+    )
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    """Natychmiastowe unieważnienie w tym workerze; nową wersję w user_versions
+    (dla pozostałych workerów) zapisuje wyzwalacz na tabeli users"""
+    principal_cache.invalidate([target.id])
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    # Ponowne usunięcie po commit: równoległe żądanie mogło w międzyczasie
+    # zapisać profil odczytany jeszcze sprzed zatwierdzenia zmiany
+    user_ids = session.info.pop("changed_user_ids", None)
+    if user_ids:
+        principal_cache.invalidate(user_ids)
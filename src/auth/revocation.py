@@ -0,0 +1,226 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import RevokedToken, engine, get_database_generation
+
+# Oczekiwana liczba jednocześnie unieważnionych tokenów i dopuszczalny odsetek
+# fałszywych trafień filtra Blooma (fałszywe trafienie = jedno zapytanie do bazy)
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+# Jak często worker pobiera unieważnienia z innych workerów (sekundy)
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "1"))
+# Jak często usuwane są wygasłe wpisy (i filtr budowany od nowa)
+REVOCATION_PURGE_INTERVAL = float(os.getenv("REVOCATION_PURGE_INTERVAL", "300"))
+
+
+class BloomFilter:
+    """Filtr Blooma na identyfikatorach tokenów (bez fałszywych negatywów)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(
+            64, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Podwójne hashowanie: k pozycji z dwóch połówek jednego skrótu
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        bits, size = self.bits, self.size
+        # Nieobecny klucz zwykle odpada już na pierwszej pozycji
+        for i in range(self.hash_count):
+            position = (first + i * second) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationStore:
+    """Unieważnione tokeny w tabeli revoked_tokens z filtrem Blooma w pamięci workera"""
+
+    def __init__(
+        self,
+        capacity: int = REVOCATION_BLOOM_CAPACITY,
+        error_rate: float = REVOCATION_BLOOM_ERROR_RATE,
+        sync_interval: float = REVOCATION_SYNC_INTERVAL,
+        purge_interval: float = REVOCATION_PURGE_INTERVAL,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        self._generation = get_database_generation()
+        self._next_sync = 0.0
+        self._next_purge = time.monotonic() + purge_interval
+        self._counters = {
+            "checks": 0,
+            "bloom_negatives": 0,
+            "database_checks": 0,
+            "false_positives": 0,
+            "revoked_hits": 0,
+            "revocations": 0,
+            "syncs": 0,
+            "purged": 0,
+        }
+
+    def _sync(self) -> None:
+        """Pobranie nowych unieważnień z bazy (najwyżej raz na sync_interval)"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+            purge = now >= self._next_purge
+            if purge:
+                self._next_purge = now + self.purge_interval
+
+        # Po przywróceniu bazy z kopii identyfikatory wpisów mogły się cofnąć
+        generation = get_database_generation()
+        rebuild = purge or generation != self._generation
+        self._generation = generation
+
+        try:
+            with engine.begin() as conn:
+                if purge:
+                    purged = conn.execute(
+                        delete(RevokedToken).where(
+                            RevokedToken.expires_at < datetime.utcnow()
+                        )
+                    ).rowcount
+                    with self._lock:
+                        self._counters["purged"] += purged
+                query = select(RevokedToken.id, RevokedToken.jti)
+                if not rebuild:
+                    query = query.where(RevokedToken.id > self._last_id)
+                rows = conn.execute(query).all()
+        except SQLAlchemyError:
+            # Tabela jeszcze nie istnieje (baza niezainicjalizowana)
+            return
+
+        with self._lock:
+            self._counters["syncs"] += 1
+            if rebuild:
+                # Filtr Blooma nie pozwala usuwać elementów - budowany od nowa
+                self._bloom = BloomFilter(
+                    max(self.capacity, len(rows) * 2), self.error_rate
+                )
+                self._last_id = 0
+            for row_id, jti in rows:
+                if jti not in self._bloom:
+                    self._bloom.add(jti)
+                self._last_id = max(self._last_id, row_id)
+            if self._bloom.count > self._bloom.capacity:
+                # Przepełniony filtr - przebudowa z większą pojemnością przy kolejnej synchronizacji
+                self._next_sync = self._next_purge = 0.0
+
+    def _in_bloom(self, jti: str) -> bool:
+        """Sprawdzenie filtra; False oznacza pewność, że token nie był unieważniony"""
+        with self._lock:
+            self._counters["checks"] += 1
+            if jti not in self._bloom:
+                self._counters["bloom_negatives"] += 1
+                return False
+            self._counters["database_checks"] += 1
+            return True
+
+    def _record_database_check(self, revoked: bool) -> bool:
+        with self._lock:
+            self._counters["revoked_hits" if revoked else "false_positives"] += 1
+        return revoked
+
+    def is_revoked(self, jti: str) -> bool:
+        self._sync()
+        if not self._in_bloom(jti):
+            return False
+
+        try:
+            with engine.connect() as conn:
+                revoked = (
+                    conn.execute(
+                        select(RevokedToken.id).where(RevokedToken.jti == jti)
+                    ).first()
+                    is not None
+                )
+        except SQLAlchemyError:
+            # Brak możliwości sprawdzenia - token traktowany jako unieważniony
+            revoked = True
+        return self._record_database_check(revoked)
+
+    async def is_revoked_async(self, jti: str, db: AsyncSession) -> bool:
+        """Wersja dla trybu asynchronicznego - bez synchronicznego I/O w pętli zdarzeń
+
+        Synchronizacja filtra (silnik synchroniczny) odbywa się w puli wątków i tylko
+        wtedy, gdy jej termin minął; sprawdzenie w bazie używa sesji żądania.
+        """
+        if time.monotonic() >= self._next_sync:
+            await run_in_threadpool(self._sync)
+        if not self._in_bloom(jti):
+            return False
+
+        try:
+            revoked = (
+                await db.execute(select(RevokedToken.id).where(RevokedToken.jti == jti))
+            ).first() is not None
+        except SQLAlchemyError:
+            await db.rollback()
+            revoked = True
+        return self._record_database_check(revoked)
+
+    def revoke(self, jti: str, expires_at: datetime) -> bool:
+        """Unieważnienie tokena; False, jeśli był już unieważniony (również w innym workerze)"""
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(RevokedToken).values(jti=jti, expires_at=expires_at)
+                )
+        except IntegrityError:
+            return False
+        finally:
+            with self._lock:
+                if jti not in self._bloom:
+                    self._bloom.add(jti)
+
+        with self._lock:
+            self._counters["revocations"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "bloom_entries": self._bloom.count,
+                "bloom_capacity": self._bloom.capacity,
+                "bloom_bytes": len(self._bloom.bits),
+                "bloom_hash_count": self._bloom.hash_count,
+                **self._counters,
+            }
+
+
+revocation_store = RevocationStore()
@@ -0,0 +1,196 @@
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+# Ograniczanie prób logowania przed weryfikacją hasła (token bucket per IP i per email)
+LOGIN_THROTTLE_ENABLED = os.getenv("LOGIN_THROTTLE_ENABLED", "1") == "1"
+LOGIN_THROTTLE_IP_PER_MINUTE = float(os.getenv("LOGIN_THROTTLE_IP_PER_MINUTE", "30"))
+LOGIN_THROTTLE_IP_BURST = float(os.getenv("LOGIN_THROTTLE_IP_BURST", "10"))
+LOGIN_THROTTLE_EMAIL_PER_MINUTE = float(
+    os.getenv("LOGIN_THROTTLE_EMAIL_PER_MINUTE", "5")
+)
+LOGIN_THROTTLE_EMAIL_BURST = float(os.getenv("LOGIN_THROTTLE_EMAIL_BURST", "5"))
+# Nagłówek z adresem klienta ustawiany przez proxy (np. x-real-ip za nginx)
+LOGIN_THROTTLE_IP_HEADER = os.getenv("LOGIN_THROTTLE_IP_HEADER", "").lower()
+# Plik mapowany w pamięć, wspólny dla wszystkich workerów na tej samej maszynie
+LOGIN_THROTTLE_PATH = os.getenv(
+    "LOGIN_THROTTLE_PATH",
+    os.path.join(
+        "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+        "aszwoj_login_throttle",
+    ),
+)
+LOGIN_THROTTLE_SLOTS = int(os.getenv("LOGIN_THROTTLE_SLOTS", "65536"))
+# Liczba sąsiednich slotów sprawdzanych przy kolizji kluczy
+LOGIN_THROTTLE_PROBES = 8
+
+# Nagłówek pliku: liczba slotów, przyjęte, odrzucone (IP), odrzucone (email)
+_HEADER = struct.Struct("<QQQQ")
+_HEADER_SIZE = 64
+# Slot: skrót klucza, liczba żetonów, czas ostatniej aktualizacji
+_SLOT = struct.Struct("<Qdd")
+
+
+def _key_hash(kind: str, value: str) -> int:
+    digest = hashlib.blake2b(f"{kind}:{value}".encode(), digest_size=8).digest()
+    # 0 oznacza pusty slot
+    return int.from_bytes(digest, "little") or 1
+
+
+class LoginThrottle:
+    """Token bucket per IP i per email w pliku mmap (wspólny dla workerów gunicorna)"""
+
+    def __init__(
+        self,
+        path: str = LOGIN_THROTTLE_PATH,
+        slots: int = LOGIN_THROTTLE_SLOTS,
+        ip_limit: Tuple[float, float] = (
+            LOGIN_THROTTLE_IP_PER_MINUTE,
+            LOGIN_THROTTLE_IP_BURST,
+        ),
+        email_limit: Tuple[float, float] = (
+            LOGIN_THROTTLE_EMAIL_PER_MINUTE,
+            LOGIN_THROTTLE_EMAIL_BURST,
+        ),
+    ):
+        self.path = path
+        self.slots = slots
+        self.ip_rate, self.ip_burst = ip_limit[0] / 60, ip_limit[1]
+        self.email_rate, self.email_burst = email_limit[0] / 60, email_limit[1]
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self._pid: Optional[int] = None
+
+    def _open(self) -> mmap.mmap:
+        # Osobny deskryptor w każdym procesie - flock na deskryptorze odziedziczonym
+        # po fork nie wykluczałby się między workerami
+        if self._pid == os.getpid():
+            return self._map
+
+        size = _HEADER_SIZE + self.slots * _SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(fd, _HEADER.size, 0)
+            if os.fstat(fd).st_size != size or _HEADER.unpack(header)[0] != self.slots:
+                # Nowy plik lub inna liczba slotów - stan zaczyna się od zera
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(self.slots, 0, 0, 0), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+        self._fd, self._map, self._pid = fd, mmap.mmap(fd, size), os.getpid()
+        return self._map
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            buffer = self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield buffer
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _refill(
+        self, buffer: mmap.mmap, key: int, rate: float, burst: float, now: float
+    ) -> Tuple[int, float]:
+        """Znalezienie (lub zajęcie) slotu klucza i uzupełnienie żetonów"""
+        start = key % self.slots
+        victim, victim_updated = None, math.inf
+        for probe in range(LOGIN_THROTTLE_PROBES):
+            offset = _HEADER_SIZE + ((start + probe) % self.slots) * _SLOT.size
+            slot_key, tokens, updated = _SLOT.unpack_from(buffer, offset)
+            if slot_key == key:
+                tokens = min(burst, tokens + max(now - updated, 0) * rate)
+                _SLOT.pack_into(buffer, offset, key, tokens, now)
+                return offset, tokens
+            if slot_key == 0:
+                victim, victim_updated = offset, -math.inf
+                break
+            # Przy braku wolnego slotu zastępowany jest najdawniej używany
+            if updated < victim_updated:
+                victim, victim_updated = offset, updated
+
+        _SLOT.pack_into(buffer, victim, key, burst, now)
+        return victim, burst
+
+    def check(self, ip: str, email: str) -> Optional[float]:
+        """Pobranie żetonów dla próby logowania; liczba sekund do ponowienia, jeśli odrzucona"""
+        now = time.time()
+        ip_key = _key_hash("ip", ip)
+        email_key = _key_hash("email", email.strip().lower())
+
+        with self._locked() as buffer:
+            ip_offset, ip_tokens = self._refill(
+                buffer, ip_key, self.ip_rate, self.ip_burst, now
+            )
+            email_offset, email_tokens = self._refill(
+                buffer, email_key, self.email_rate, self.email_burst, now
+            )
+            slots, accepted, rejected_ip, rejected_email = _HEADER.unpack_from(
+                buffer, 0
+            )
+
+            retry_after = None
+            if ip_tokens < 1:
+                rejected_ip += 1
+                retry_after = (1 - ip_tokens) / self.ip_rate
+            elif email_tokens < 1:
+                rejected_email += 1
+                retry_after = (1 - email_tokens) / self.email_rate
+            else:
+                accepted += 1
+                _SLOT.pack_into(buffer, ip_offset, ip_key, ip_tokens - 1, now)
+                _SLOT.pack_into(buffer, email_offset, email_key, email_tokens - 1, now)
+
+            _HEADER.pack_into(buffer, 0, slots, accepted, rejected_ip, rejected_email)
+        return retry_after
+
+    def enforce(self, ip: str, email: str) -> None:
+        """429 z Retry-After, jeśli limit prób logowania został wyczerpany"""
+        if not LOGIN_THROTTLE_ENABLED:
+            return
+        retry_after = self.check(ip, email)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Zbyt wiele prób logowania, spróbuj ponownie później",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._locked() as buffer:
+            slots, accepted, rejected_ip, rejected_email = _HEADER.unpack_from(
+                buffer, 0
+            )
+            # Pierwsze pole każdego slotu to skrót klucza (0 = wolny slot); widoki
+            # zwalniane od razu - niezwolniony eksport blokuje zamknięcie mmap
+            with memoryview(buffer) as view, view[_HEADER_SIZE:] as tail:
+                with tail.cast("Q") as words, words[:: _SLOT.size // 8] as keys:
+                    used = len(keys) - keys.tolist().count(0)
+        return {
+            "enabled": LOGIN_THROTTLE_ENABLED,
+            "path": self.path,
+            "slots": slots,
+            "slots_used": used,
+            "accepted": accepted,
+            "rejected_ip": rejected_ip,
+            "rejected_email": rejected_email,
+            "rejected": rejected_ip + rejected_email,
+        }
+
+
+login_throttle = LoginThrottle()
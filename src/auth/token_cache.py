@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Maksymalna liczba zweryfikowanych tokenów w pamięci workera (0 = wyłączone)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+
+class VerifiedTokenCache:
+    """LRU zweryfikowanych tokenów JWT wraz ze zdekodowanymi danymi (claims)"""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0}
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                # Token wygasł - kolejne dekodowanie zgłosi ExpiredSignatureError
+                del self._entries[token]
+                self._counters["expired"] += 1
+                return None
+            self._entries.move_to_end(token)
+            self._counters["hits"] += 1
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        expires_at = claims.get("exp")
+        # Tokeny bez daty wygaśnięcia nie są przechowywane
+        if self.max_size <= 0 or expires_at is None:
+            return
+        with self._lock:
+            self._entries[token] = (claims, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                **self._counters,
+            }
+
+
+token_cache = VerifiedTokenCache()
@@ -1,9 +1,19 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
+import anyio
 from sqlalchemy.orm import Session
 
-from src.database.models import get_db
+from src.database.models import User, get_db
+from src.database.utils import (
+    USERS_MAX_PAGE_SIZE,
+    USERS_PAGE_SIZE,
+    get_users_page,
+    stream_users,
+)
 from .schemas import (
     UserCreate,
     UserLogin,
@@ -24,7 +34,14 @@ from .dependencies import (
     decode_refresh_token,
     revoke_refresh_token,
     get_user_by_id,
+    get_current_admin_user,
 )
+from .bulk_import import BULK_IMPORT_FORMATS, BulkUserImport, import_slot
+from .hashing import password_hasher
+from .principal_cache import principal_cache
+from .revocation import revocation_store
+from .throttle import LOGIN_THROTTLE_IP_HEADER, login_throttle
+from .token_cache import token_cache
 
 auth_router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -93,8 +110,16 @@ def register_admin(admin: AdminCreate, db: Session = Depends(get_db)):
 
 
 @auth_router.post("/login", response_model=Token)
-def login_user(user_data: UserLogin, db: Session = Depends(get_db)):
+def login_user(user_data: UserLogin, request: Request, db: Session = Depends(get_db)):
     """Logowanie użytkownika"""
+    # Limit prób sprawdzany przed zapytaniem do bazy i weryfikacją hasła
+    client_ip = (
+        request.headers.get(LOGIN_THROTTLE_IP_HEADER)
+        if LOGIN_THROTTLE_IP_HEADER
+        else None
+    )
+    login_throttle.enforce(client_ip or request.client.host, user_data.email)
+
     # Sprawdzamy użytkownika
     user = get_user_by_email(db, email=user_data.email)
     if not user or not verify_password(user_data.password, user.hashed_password):
@@ -145,8 +170,12 @@ def refresh_access_token(token_data: TokenRefresh, db: Session = Depends(get_db)
                 detail="Użytkownik nie znaleziony",
             )
 
-        # Unieważniamy stary refresh token
-        revoke_refresh_token(token_data.refresh_token)
+        # Unieważniamy stary refresh token (jednorazowy również między workerami)
+        if not revoke_refresh_token(token_data.refresh_token):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token został unieważniony",
+            )
 
         # Tworzymy nowe tokeny
         access_token = create_access_token(data={"sub": str(user.id)})
@@ -202,11 +231,33 @@ def change_password(
     return {"message": "Hasło zostało pomyślnie zmienione"}
 
 
+@auth_router.get("/hashing-metrics", dependencies=[Depends(get_current_admin_user)])
+def get_hashing_metrics():
+    """Metryki puli hashowania haseł (kolejka, odrzucenia, czasy)"""
+    return password_hasher.metrics()
+
+
+@auth_router.get("/principal-cache", dependencies=[Depends(get_current_admin_user)])
+def get_principal_cache_stats():
+    """Statystyki pamięci podręcznej profili użytkowników i zweryfikowanych tokenów"""
+    return {**principal_cache.stats(), "tokens": token_cache.stats()}
+
+
+@auth_router.get("/revocations", dependencies=[Depends(get_current_admin_user)])
+def get_revocation_stats():
+    """Statystyki magazynu unieważnionych tokenów i filtra Blooma"""
+    return revocation_store.stats()
+
+
+@auth_router.get("/login-throttle", dependencies=[Depends(get_current_admin_user)])
+def get_login_throttle_stats():
+    """Liczniki przyjętych i odrzuconych prób logowania"""
+    return login_throttle.stats()
+
+
 @auth_router.post("/make-admin/{user_id}")
 def make_user_admin(user_id: int, db: Session = Depends(get_db)):
     """Tymczasowy endpoint do nadania uprawnień administratora użytkownikowi"""
-    from src.database.models import User
-
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Użytkownik nie znaleziony")
@@ -222,24 +273,67 @@ def make_user_admin(user_id: int, db: Session = Depends(get_db)):
     }
 
 
+@auth_router.post("/admin/import-users", dependencies=[Depends(get_current_admin_user)])
+async def import_users(
+    request: Request,
+    file_format: Optional[str] = Query(None, alias="format"),
+):
+    """Masowy import użytkowników ze strumienia CSV (nagłówek: email,password,full_name) lub NDJSON"""
+    if file_format is None:
+        content_type = request.headers.get("content-type", "")
+        file_format = "csv" if "csv" in content_type else "ndjson"
+    if file_format not in BULK_IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Nieobsługiwany format: {file_format} (dostępne: csv, ndjson)",
+        )
+
+    stream = request.stream()
+
+    def read_chunks():
+        # Wątek importu pobiera kolejne fragmenty żądania z pętli zdarzeń na bieżąco,
+        # więc plik nie jest w całości ładowany do pamięci
+        while True:
+            try:
+                yield anyio.from_thread.run(stream.__anext__)
+            except StopAsyncIteration:
+                return
+
+    with import_slot():
+        return await run_in_threadpool(BulkUserImport().run, read_chunks(), file_format)
+
+
 @auth_router.get("/list-users")
-def list_all_users(db: Session = Depends(get_db)):
-    """Lista wszystkich użytkowników (debug endpoint)"""
+def list_all_users(
+    response: Response,
+    cursor: Optional[int] = Query(
+        None, ge=0, description="id ostatniego użytkownika poprzedniej strony"
+    ),
+    limit: int = Query(USERS_PAGE_SIZE, ge=1, le=USERS_MAX_PAGE_SIZE),
+    output_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db),
+):
+    """Lista użytkowników (debug endpoint) stronicowana po id lub eksport NDJSON"""
+    columns = [
+        User.id,
+        User.email,
+        User.full_name,
+        User.is_admin,
+        User.is_active,
+        User.created_at,
+    ]
+    if output_format == "ndjson":
+        return StreamingResponse(
+            stream_users(columns, cursor),
+            media_type="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no"},
+        )
+
     try:
-        users = db.query(User).all()
-        user_list = []
-        for user in users:
-            user_list.append(
-                {
-                    "id": user.id,
-                    "email": user.email,
-                    "full_name": user.full_name,
-                    "is_admin": user.is_admin,
-                    "is_active": user.is_active,
-                    "created_at": user.created_at,
-                }
-            )
-        return {"users": user_list}
+        users, next_cursor = get_users_page(db, columns, cursor, limit)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = str(next_cursor)
+        return {"users": users}
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Błąd pobierania listy użytkowników: {str(e)}"
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+
+from src.database.models import get_async_db, CartItem
+from src.auth.dependencies import get_current_user_async
+from .schemas import CartResponse
+from .views import get_cart_item_response
+
+# Asynchroniczne wersje endpointów koszyka (DATABASE_ASYNC=1)
+async_cart_router = APIRouter(prefix="/cart", tags=["cart"])
+
+
+@async_cart_router.get("/", response_model=CartResponse)
+async def get_cart_async(
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Pobieranie koszyka obecnego użytkownika"""
+    result = await db.scalars(
+        select(CartItem)
+        .join(CartItem.product)
+        .options(contains_eager(CartItem.product))
+        .where(CartItem.user_id == current_user.id)
+    )
+    cart_items = result.all()
+
+    items_response = [get_cart_item_response(item) for item in cart_items]
+    total_items = sum(item.quantity for item in cart_items)
+    total_amount = sum(item.product.price * item.quantity for item in cart_items)
+
+    return CartResponse(
+        items=items_response, total_items=total_items, total_amount=total_amount
+    )
@@ -1,6 +1,7 @@
 from .models import (
     create_tables,
     get_db,
+    get_async_db,
     User,
     Category,
     Product,
@@ -12,7 +13,9 @@ from .utils import (
     create_backup,
     restore_backup,
     create_sql_dump,
+    restore_sql_dump,
     get_table_info,
+    get_sqlite_settings,
     execute_custom_sql,
     create_sample_data,
     get_random_crud_operations,
@@ -22,6 +25,7 @@ from .utils import (
 __all__ = [
     "create_tables",
     "get_db",
+    "get_async_db",
     "User",
     "Category",
     "Product",
@@ -31,7 +35,9 @@ __all__ = [
     "create_backup",
     "restore_backup",
     "create_sql_dump",
+    "restore_sql_dump",
     "get_table_info",
+    "get_sqlite_settings",
     "execute_custom_sql",
     "create_sample_data",
     "get_random_crud_operations",
@@ -0,0 +1,211 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .utils import BACKUP_DIR, backup_database, ensure_directories
+
+# Magazyn kopii przyrostowych: manifest na snapshot + współdzielone fragmenty
+SNAPSHOTS_DIR = os.path.join(BACKUP_DIR, "snapshots")
+CHUNKS_DIR = os.path.join(BACKUP_DIR, "chunks")
+# Liczba stron bazy w jednym fragmencie (64 strony po 4 KB = 256 KB)
+BACKUP_CHUNK_PAGES = int(os.getenv("BACKUP_CHUNK_PAGES", "64"))
+# Blokada magazynu: zapis fragmentów i manifestu snapshotu oraz usuwanie
+# nieużywanych fragmentów wykluczają się we wszystkich procesach
+STORE_LOCK_PATH = os.path.join(BACKUP_DIR, ".backup_store.lock")
+
+
+@contextmanager
+def store_lock():
+    """Wyłączny dostęp do magazynu fragmentów (flock, również między workerami)"""
+    ensure_directories()
+    with open(STORE_LOCK_PATH, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _chunk_path(chunk_hash: str) -> str:
+    """Ścieżka fragmentu w magazynie (podkatalog z dwóch pierwszych znaków hasha)"""
+    return os.path.join(CHUNKS_DIR, chunk_hash[:2], chunk_hash)
+
+
+def _store_chunk(chunk_hash: str, data: bytes) -> bool:
+    """Zapis fragmentu, jeśli jeszcze go nie ma w magazynie"""
+    path = _chunk_path(chunk_hash)
+    if os.path.exists(path):
+        return False
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Unikalny plik tymczasowy - równoległe zapisy tego samego fragmentu się nie nadpisują
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(zlib.compress(data, 1))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return True
+
+
+def is_snapshot_manifest(path: str) -> bool:
+    """Czy ścieżka wskazuje manifest kopii przyrostowej"""
+    return path.endswith(".json")
+
+
+def create_incremental_backup(snapshot_name: Optional[str] = None) -> Dict[str, Any]:
+    """Kopia przyrostowa: zapisywane są tylko fragmenty, których nie ma w magazynie"""
+    ensure_directories()
+    os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+
+    if not snapshot_name:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        snapshot_name = f"snapshot_{timestamp}"
+
+    manifest_path = os.path.join(SNAPSHOTS_DIR, f"{snapshot_name}.json")
+    temp_path = os.path.join(BACKUP_DIR, f".{snapshot_name}.db")
+    started = time.perf_counter()
+
+    try:
+        # Spójny obraz bazy z API backup, dzielony następnie na fragmenty
+        backup_report = backup_database(temp_path)
+        chunk_size = backup_report["page_size"] * BACKUP_CHUNK_PAGES
+
+        chunks: List[str] = []
+        new_chunks = 0
+        bytes_written = 0
+        file_hash = hashlib.sha256()
+
+        # Fragmenty zapisane bez manifestu nie są jeszcze nigdzie wskazane -
+        # collect_garbage nie może działać, dopóki manifest nie zostanie zapisany
+        with store_lock(), open(temp_path, "rb") as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                file_hash.update(data)
+                chunk_hash = hashlib.sha256(data).hexdigest()
+                chunks.append(chunk_hash)
+                if _store_chunk(chunk_hash, data):
+                    new_chunks += 1
+                    bytes_written += os.path.getsize(_chunk_path(chunk_hash))
+
+            manifest = {
+                "name": snapshot_name,
+                "created_at": datetime.now().isoformat(),
+                "page_size": backup_report["page_size"],
+                "chunk_size": chunk_size,
+                "size_bytes": backup_report["size_bytes"],
+                "sha256": file_hash.hexdigest(),
+                "chunks": chunks,
+            }
+            with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(f"{manifest_path}.tmp", manifest_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    duration = time.perf_counter() - started
+    print(
+        f"✅ Kopia przyrostowa utworzona: {manifest_path} "
+        f"({new_chunks}/{len(chunks)} nowych fragmentów)"
+    )
+    return {
+        "backup_path": manifest_path,
+        "mode": "incremental",
+        "size_bytes": manifest["size_bytes"],
+        "chunks": len(chunks),
+        "new_chunks": new_chunks,
+        "reused_chunks": len(chunks) - new_chunks,
+        "bytes_written": bytes_written,
+        "duration_seconds": round(duration, 3),
+    }
+
+
+def rebuild_snapshot(manifest_path: str, target_path: str) -> str:
+    """Odtworzenie pliku bazy z manifestu i fragmentów"""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    file_hash = hashlib.sha256()
+    temp_path = f"{target_path}.tmp"
+
+    try:
+        with open(temp_path, "wb") as out:
+            for chunk_hash in manifest["chunks"]:
+                with open(_chunk_path(chunk_hash), "rb") as f:
+                    data = zlib.decompress(f.read())
+                file_hash.update(data)
+                out.write(data)
+
+        if file_hash.hexdigest() != manifest["sha256"]:
+            raise ValueError(f"Niezgodna suma kontrolna snapshotu: {manifest_path}")
+
+        os.replace(temp_path, target_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return target_path
+
+
+def list_snapshots() -> List[Dict[str, Any]]:
+    """Lista kopii przyrostowych"""
+    if not os.path.isdir(SNAPSHOTS_DIR):
+        return []
+
+    snapshots = []
+    for file_name in sorted(os.listdir(SNAPSHOTS_DIR)):
+        if not file_name.endswith(".json"):
+            continue
+        path = os.path.join(SNAPSHOTS_DIR, file_name)
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        snapshots.append(
+            {
+                "name": manifest["name"],
+                "backup_path": path,
+                "created_at": manifest["created_at"],
+                "size_bytes": manifest["size_bytes"],
+                "chunks": len(manifest["chunks"]),
+            }
+        )
+    return snapshots
+
+
+def remove_snapshot(manifest_path: str) -> None:
+    """Usunięcie manifestu snapshotu (fragmenty usuwa collect_garbage)"""
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+
+def collect_garbage() -> int:
+    """Usuwanie fragmentów, do których nie odwołuje się żaden snapshot"""
+    if not os.path.isdir(CHUNKS_DIR):
+        return 0
+
+    with store_lock():
+        referenced = set()
+        for snapshot in list_snapshots():
+            with open(snapshot["backup_path"], "r", encoding="utf-8") as f:
+                referenced.update(json.load(f)["chunks"])
+
+        removed = 0
+        for prefix in os.listdir(CHUNKS_DIR):
+            prefix_dir = os.path.join(CHUNKS_DIR, prefix)
+            for chunk_hash in os.listdir(prefix_dir):
+                if chunk_hash not in referenced:
+                    os.remove(os.path.join(prefix_dir, chunk_hash))
+                    removed += 1
+    return removed
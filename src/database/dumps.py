@@ -0,0 +1,306 @@
+import gzip
+import io
+import re
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+try:
+    import zstandard
+except ImportError:  # zstd jest opcjonalny
+    zstandard = None
+
+# Obsługiwane formaty kompresji zrzutów SQL
+DUMP_EXTENSIONS = {"none": ".sql", "gzip": ".sql.gz", "zstd": ".sql.zst"}
+DUMP_MEDIA_TYPES = {
+    "none": "application/sql",
+    "gzip": "application/gzip",
+    "zstd": "application/zstd",
+}
+# Pakiet zstandard jest opcjonalny (extra "zstd" w pyproject.toml)
+ZSTD_MISSING = "Format zstd wymaga pakietu 'zstandard' (poetry install -E zstd)"
+# Rozmiar bufora, po którego zapełnieniu dane są kompresowane i oddawane dalej
+DUMP_CHUNK_SIZE = 256 * 1024
+
+# Przywracanie: liczba wierszy w jednym executemany i w jednej transakcji
+DUMP_RESTORE_BATCH_SIZE = 5000
+DUMP_RESTORE_COMMIT_ROWS = 200000
+
+_INSERT_TABLE = re.compile(r'^INSERT INTO "((?:[^"]|"")+)"')
+_INSERT_VALUES = re.compile(
+    r'^INSERT INTO ("(?:[^"]|"")+") VALUES\((.*)\);$', re.DOTALL
+)
+_VALUE_TOKEN = re.compile(
+    r"\s*(?:'((?:[^']|'')*)'|(NULL)|[Xx]'([0-9A-Fa-f]*)'"
+    r"|(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?))\s*(?:,|$)",
+    re.DOTALL,
+)
+_DEFERRED_STATEMENT = re.compile(r"^CREATE\s+(?:UNIQUE\s+)?(?:INDEX|TRIGGER)\b", re.I)
+
+
+class _NoCompression:
+    """Kompresor przepuszczający dane bez zmian"""
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def get_compressor(compression: str):
+    """Strumieniowy kompresor dla wybranego formatu"""
+    if compression == "none":
+        return _NoCompression()
+    if compression == "gzip":
+        # wbits=31 - nagłówek i suma kontrolna gzip
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError(ZSTD_MISSING)
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    raise ValueError(f"Nieznany format kompresji: {compression}")
+
+
+def iter_sql_dump(
+    conn: sqlite3.Connection,
+    table_counts: Optional[Dict[str, int]] = None,
+    on_table_done: Optional[Callable[[str, int], None]] = None,
+) -> Iterator[str]:
+    """Strumieniowy zrzut SQL z liczeniem wierszy w każdej tabeli"""
+    counts = table_counts if table_counts is not None else {}
+    current_table = None
+
+    yield f"-- SQL Dump created at {datetime.now()}\n"
+    yield "-- ASzWoj Shop Database\n\n"
+
+    # Jedna transakcja odczytu, aby wszystkie tabele pochodziły z tego samego stanu
+    conn.execute("BEGIN")
+    try:
+        # Dane tabel wirtualnych (FTS5) są w ich tabelach pomocniczych, zapisywanych
+        # osobno - wiersze odczytane przez samą tabelę wirtualną są pomijane
+        virtual_tables = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+            )
+        }
+        for line in conn.iterdump():
+            match = _INSERT_TABLE.match(line)
+            table = match.group(1).replace('""', '"') if match else None
+            if table in virtual_tables:
+                continue
+
+            if table != current_table and current_table and on_table_done:
+                on_table_done(current_table, counts[current_table])
+            if table:
+                counts[table] = counts.get(table, 0) + 1
+                current_table = table
+            else:
+                current_table = None
+
+            yield f"{line}\n"
+    finally:
+        conn.rollback()
+
+    if current_table and on_table_done:
+        on_table_done(current_table, counts[current_table])
+
+
+def iter_dump_chunks(
+    conn: sqlite3.Connection,
+    compression: str = "gzip",
+    table_counts: Optional[Dict[str, int]] = None,
+    on_table_done: Optional[Callable[[str, int], None]] = None,
+) -> Iterator[bytes]:
+    """Zrzut SQL w skompresowanych blokach o ograniczonym rozmiarze"""
+    compressor = get_compressor(compression)
+    buffer = []
+    buffered = 0
+
+    for line in iter_sql_dump(conn, table_counts, on_table_done):
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= DUMP_CHUNK_SIZE:
+            data = compressor.compress("".join(buffer).encode("utf-8"))
+            buffer.clear()
+            buffered = 0
+            if data:
+                yield data
+
+    data = compressor.compress("".join(buffer).encode("utf-8")) + compressor.flush()
+    if data:
+        yield data
+
+
+def print_table_progress(table: str, rows: int) -> None:
+    """Raportowanie postępu zrzutu po zakończeniu tabeli"""
+    print(f"📄 Zrzut SQL: tabela {table} - {rows} wierszy")
+
+
+def stream_sql_dump(db_path: str, compression: str = "gzip") -> Iterator[bytes]:
+    """Generator zrzutu do odpowiedzi HTTP (bez pliku tymczasowego)"""
+    get_compressor(compression)  # walidacja formatu przed rozpoczęciem odpowiedzi
+
+    def generate() -> Iterator[bytes]:
+        # Połączenie otwierane dopiero przy pobraniu pierwszego bloku - odpowiedź,
+        # która nigdy nie zostanie odczytana, nie zostawia otwartego połączenia.
+        # StreamingResponse może pobierać kolejne bloki z różnych wątków puli
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout=5000")
+        counts: Dict[str, Any] = {}
+        try:
+            yield from iter_dump_chunks(conn, compression, counts, print_table_progress)
+        finally:
+            conn.close()
+
+    return generate()
+
+
+def open_dump(dump_path: str) -> TextIO:
+    """Otwarcie zrzutu jako strumienia tekstu (kompresja rozpoznawana po nagłówku)"""
+    with open(dump_path, "rb") as f:
+        magic = f.read(4)
+
+    if magic[:2] == b"\x1f\x8b":
+        return gzip.open(dump_path, "rt", encoding="utf-8")
+    if magic == b"\x28\xb5\x2f\xfd":
+        if zstandard is None:
+            raise ValueError(ZSTD_MISSING)
+        reader = zstandard.ZstdDecompressor().stream_reader(open(dump_path, "rb"))
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(dump_path, "r", encoding="utf-8")
+
+
+def iter_dump_statements(lines: Iterable[str]) -> Iterator[str]:
+    """Składanie linii zrzutu w kompletne instrukcje SQL"""
+    buffer: List[str] = []
+
+    for line in lines:
+        if not buffer and (not line.strip() or line.startswith("--")):
+            continue
+        buffer.append(line)
+        statement = "".join(buffer)
+        if sqlite3.complete_statement(statement):
+            buffer.clear()
+            yield statement.strip()
+
+    if buffer and "".join(buffer).strip():
+        raise ValueError("Zrzut SQL kończy się niekompletną instrukcją")
+
+
+def parse_insert_values(values_sql: str) -> Optional[List[Any]]:
+    """Parsowanie listy literałów z INSERT ... VALUES(...) (None gdy nieobsługiwana)"""
+    values: List[Any] = []
+    position = 0
+
+    while position < len(values_sql):
+        match = _VALUE_TOKEN.match(values_sql, position)
+        if not match:
+            return None
+        text, null, blob, number = match.groups()
+        if text is not None:
+            values.append(text.replace("''", "'"))
+        elif null:
+            values.append(None)
+        elif blob is not None:
+            values.append(bytes.fromhex(blob))
+        elif "." in number or "e" in number or "E" in number:
+            values.append(float(number))
+        else:
+            values.append(int(number))
+        position = match.end()
+
+    return values
+
+
+def load_sql_dump(dump_path: str, target_path: str) -> Dict[str, Any]:
+    """Ładowanie zrzutu SQL do nowego pliku bazy (executemany, indeksy na końcu)"""
+    started = time.perf_counter()
+    table_counts: Dict[str, int] = {}
+    deferred: List[str] = []
+    batch: List[List[Any]] = []
+    batch_key = None
+    rows_in_transaction = 0
+
+    target = sqlite3.connect(target_path, isolation_level=None)
+    # Nowy plik docelowy - dziennik i fsync nie są potrzebne w trakcie ładowania
+    for pragma in (
+        "journal_mode=OFF",
+        "synchronous=OFF",
+        "cache_size=-262144",
+        "temp_store=MEMORY",
+    ):
+        target.execute(f"PRAGMA {pragma}")
+
+    def flush_batch() -> None:
+        nonlocal batch_key
+        if batch:
+            table, columns = batch_key
+            placeholders = ", ".join("?" * columns)
+            target.executemany(f"INSERT INTO {table} VALUES({placeholders})", batch)
+            batch.clear()
+        batch_key = None
+
+    try:
+        target.execute("BEGIN")
+        with open_dump(dump_path) as lines:
+            for statement in iter_dump_statements(lines):
+                upper = statement[:32].upper()
+                if upper.startswith(("BEGIN TRANSACTION", "COMMIT")):
+                    continue
+                if _DEFERRED_STATEMENT.match(statement):
+                    deferred.append(statement)
+                    continue
+
+                match = _INSERT_VALUES.match(statement)
+                values = parse_insert_values(match.group(2)) if match else None
+                if values is None:
+                    flush_batch()
+                    target.execute(statement)
+                    continue
+
+                key = (match.group(1), len(values))
+                if key != batch_key:
+                    flush_batch()
+                    batch_key = key
+                batch.append(values)
+
+                table = match.group(1)[1:-1].replace('""', '"')
+                table_counts[table] = table_counts.get(table, 0) + 1
+                rows_in_transaction += 1
+
+                if len(batch) >= DUMP_RESTORE_BATCH_SIZE:
+                    flush_batch()
+                if rows_in_transaction >= DUMP_RESTORE_COMMIT_ROWS:
+                    flush_batch()
+                    target.execute("COMMIT")
+                    target.execute("BEGIN")
+                    rows_in_transaction = 0
+
+        flush_batch()
+        target.execute("COMMIT")
+
+        # Indeksy i wyzwalacze po załadowaniu danych (jedno sortowanie zamiast wstawień)
+        index_started = time.perf_counter()
+        target.execute("BEGIN")
+        for statement in deferred:
+            target.execute(statement)
+        target.execute("COMMIT")
+        index_duration = time.perf_counter() - index_started
+    finally:
+        target.close()
+
+    duration = time.perf_counter() - started
+    total_rows = sum(table_counts.values())
+    return {
+        "tables": table_counts,
+        "rows": total_rows,
+        "deferred_statements": len(deferred),
+        "index_seconds": round(index_duration, 3),
+        "duration_seconds": round(duration, 3),
+        "rows_per_second": round(total_rows / duration, 1) if duration > 0 else None,
+    }
@@ -0,0 +1,476 @@
+"""Generator syntetycznych danych do testów obciążeniowych
+
+Uruchomienie:
+    python -m src.database.generator --size large --seed 42
+    python -m src.database.generator --users 50000 --products 5000 --order-items 400000
+    python -m src.database.generator --size small --base-date 2025-06-30
+"""
+
+import argparse
+import bisect
+import itertools
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import func, insert, inspect, select
+
+from .models import (
+    engine,
+    User,
+    Category,
+    Product,
+    Order,
+    OrderItem,
+    CartItem,
+    backfill_product_popularity,
+    create_tables,
+)
+
+# Gotowe rozmiary zbiorów danych
+DATASET_SIZES: Dict[str, Dict[str, int]] = {
+    "small": {
+        "users": 1_000,
+        "categories": 20,
+        "products": 500,
+        "order_items": 10_000,
+        "cart_items": 500,
+    },
+    "medium": {
+        "users": 50_000,
+        "categories": 100,
+        "products": 10_000,
+        "order_items": 500_000,
+        "cart_items": 10_000,
+    },
+    "large": {
+        "users": 1_000_000,
+        "categories": 500,
+        "products": 100_000,
+        "order_items": 10_000_000,
+        "cart_items": 200_000,
+    },
+}
+
+# Wiersze w jednym INSERT (executemany) i w jednej transakcji
+GENERATOR_BATCH_SIZE = int(os.getenv("GENERATOR_BATCH_SIZE", "10000"))
+GENERATOR_COMMIT_ROWS = int(os.getenv("GENERATOR_COMMIT_ROWS", "500000"))
+
+# Identyfikatory i daty nie zależą od stanu bazy ani od dnia uruchomienia: wiersze
+# syntetyczne dostają id od GENERATOR_ID_BASE + 1, a daty liczone są wstecz od
+# GENERATOR_BASE_DATE - ten sam seed daje zawsze te same dane
+GENERATOR_ID_BASE = int(os.getenv("GENERATOR_ID_BASE", "1000000"))
+GENERATOR_BASE_DATE = date.fromisoformat(os.getenv("GENERATOR_BASE_DATE", "2025-01-01"))
+
+# Wszyscy wygenerowani użytkownicy mają to samo hasło (jeden hash bcrypt)
+SYNTHETIC_PASSWORD = "password123"
+SYNTHETIC_EMAIL_DOMAIN = "loadtest.example.com"
+
+# Wykładniki rozkładu Zipfa: popularność produktów i aktywność klientów
+PRODUCT_ZIPF_EXPONENT = 1.1
+USER_ZIPF_EXPONENT = 0.8
+# Średnia liczba pozycji w zamówieniu
+MEAN_ITEMS_PER_ORDER = 4
+# Zakres dat zamówień (dni wstecz od daty bazowej)
+ORDER_HISTORY_DAYS = 365
+
+ORDER_STATUSES = ["pending", "confirmed", "shipped", "delivered", "cancelled"]
+ORDER_STATUS_WEIGHTS = [10, 10, 15, 60, 5]
+
+# Rozkład godzinowy zamówień (szczyt wieczorem)
+HOURLY_WEIGHTS = [
+    1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 7, 8,
+    9, 9, 8, 8, 9, 10, 12, 14, 15, 13, 8, 3,
+]  # fmt: skip
+
+CATEGORY_NAMES = [
+    "Elektronika",
+    "Odzież",
+    "Książki",
+    "Sport",
+    "Dom",
+    "Ogród",
+    "Zabawki",
+    "Zdrowie",
+    "Motoryzacja",
+    "Muzyka",
+]
+PRODUCT_ADJECTIVES = ["Nowy", "Klasyczny", "Premium", "Lekki", "Mocny", "Mini", "Pro"]
+PRODUCT_NOUNS = ["zestaw", "model", "komplet", "produkt", "gadżet", "akcesorium"]
+
+_generation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="generator")
+_generation_lock = threading.Lock()
+generation_status: Dict[str, Any] = {"running": False, "last_report": None}
+
+
+def zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    """Skumulowane wagi rozkładu Zipfa dla pozycji 1..count"""
+    return list(
+        itertools.accumulate(1 / rank**exponent for rank in range(1, count + 1))
+    )
+
+
+def sample(rng: random.Random, cum_weights: List[float]) -> int:
+    """Losowanie indeksu według skumulowanych wag (wyszukiwanie binarne)"""
+    return bisect.bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+def seasonal_day_weights(days: int, today: datetime) -> List[float]:
+    """Wagi dni: rytm tygodniowy, sezon świąteczny i Black Friday"""
+    weights = []
+    for offset in range(days):
+        day = today - timedelta(days=days - offset)
+        weight = 1.0 + 0.25 * math.sin(2 * math.pi * day.weekday() / 7)
+        if day.month == 12 and day.day <= 24:
+            weight *= 2.5
+        elif day.month == 11 and day.day >= 22:
+            weight *= 3.0
+        elif day.month in (7, 8):
+            weight *= 0.8
+        weights.append(weight)
+    return list(itertools.accumulate(weights))
+
+
+def validate_sizes(sizes: Dict[str, int]) -> None:
+    """Zamówienia i koszyki wymagają użytkowników i produktów, produkty kategorii"""
+    if sizes.get("order_items", 0) > 0 or sizes.get("cart_items", 0) > 0:
+        if sizes.get("users", 0) < 1:
+            raise ValueError(
+                "Pozycje zamówień i koszyki wymagają co najmniej 1 użytkownika"
+            )
+        if sizes.get("products", 0) < 1:
+            raise ValueError(
+                "Pozycje zamówień i koszyki wymagają co najmniej 1 produktu"
+            )
+    if sizes.get("products", 0) > 0 and sizes.get("categories", 0) < 1:
+        raise ValueError("Produkty wymagają co najmniej 1 kategorii")
+
+
+class SyntheticDataExists(Exception):
+    """W bazie są już wiersze w zakresie identyfikatorów danych syntetycznych"""
+
+
+def check_id_ranges(sizes: Dict[str, int], id_base: int = GENERATOR_ID_BASE) -> None:
+    """Zakresy id danych syntetycznych muszą być wolne (ponowne uruchomienie
+    wymaga czystej bazy lub innego id_base)"""
+    with engine.connect() as connection:
+        existing = set(inspect(connection).get_table_names())
+        for model, count in (
+            (User, sizes.get("users", 0)),
+            (Category, sizes.get("categories", 0)),
+            (Product, sizes.get("products", 0)),
+            (Order, sizes.get("order_items", 0)),
+        ):
+            if not count or model.__tablename__ not in existing:
+                continue
+            taken = connection.execute(
+                select(func.count())
+                .select_from(model)
+                .where(model.id > id_base, model.id <= id_base + count)
+            ).scalar()
+            if taken:
+                raise SyntheticDataExists(
+                    f"Tabela {model.__tablename__} zawiera już wiersze o id > {id_base}"
+                )
+        if User.__tablename__ not in existing:
+            return
+        emails = connection.execute(
+            select(func.count())
+            .select_from(User)
+            .where(User.email.like(f"%@{SYNTHETIC_EMAIL_DOMAIN}"))
+        ).scalar()
+        if emails and sizes.get("users", 0):
+            raise SyntheticDataExists("Baza zawiera już użytkowników syntetycznych")
+
+
+def _batched(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def bulk_insert(model, rows: Iterable[Dict[str, Any]], total: int) -> Dict[str, Any]:
+    """Wstawianie Core (executemany) w partiach i dużych transakcjach"""
+    started = time.perf_counter()
+    inserted = 0
+    statement = insert(model.__table__)
+    batches = _batched(rows, GENERATOR_BATCH_SIZE)
+    batches_per_commit = max(GENERATOR_COMMIT_ROWS // GENERATOR_BATCH_SIZE, 1)
+
+    while True:
+        chunk = list(itertools.islice(batches, batches_per_commit))
+        if not chunk:
+            break
+        with engine.begin() as connection:
+            for batch in chunk:
+                connection.execute(statement, batch)
+                inserted += len(batch)
+        print(f"📦 {model.__tablename__}: {inserted}/{total}")
+
+    duration = time.perf_counter() - started
+    return {
+        "rows": inserted,
+        "duration_seconds": round(duration, 3),
+        "rows_per_second": round(inserted / duration, 1) if duration > 0 else None,
+    }
+
+
+def generate_synthetic_data(
+    seed: int = 42,
+    users: int = DATASET_SIZES["small"]["users"],
+    categories: int = DATASET_SIZES["small"]["categories"],
+    products: int = DATASET_SIZES["small"]["products"],
+    order_items: int = DATASET_SIZES["small"]["order_items"],
+    cart_items: int = DATASET_SIZES["small"]["cart_items"],
+    base_date: Optional[date] = None,
+    id_base: int = GENERATOR_ID_BASE,
+) -> Dict[str, Any]:
+    """Deterministyczne wypełnienie schematu danymi o realistycznych rozkładach"""
+    from src.auth.dependencies import get_password_hash
+
+    sizes = {
+        "users": users,
+        "categories": categories,
+        "products": products,
+        "order_items": order_items,
+        "cart_items": cart_items,
+    }
+    validate_sizes(sizes)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    base_date = base_date or GENERATOR_BASE_DATE
+    now = datetime(base_date.year, base_date.month, base_date.day)
+    create_tables()
+    check_id_ranges(sizes, id_base)
+
+    first_user = first_category = first_product = first_order = id_base + 1
+
+    report: Dict[str, Any] = {
+        "seed": seed,
+        "base_date": base_date.isoformat(),
+        "id_base": id_base,
+        "tables": {},
+    }
+    tables = report["tables"]
+    hashed_password = get_password_hash(SYNTHETIC_PASSWORD)
+
+    tables["users"] = bulk_insert(
+        User,
+        (
+            {
+                "id": user_id,
+                "email": f"user{user_id - id_base}@{SYNTHETIC_EMAIL_DOMAIN}",
+                "full_name": f"Klient {user_id - id_base}",
+                "hashed_password": hashed_password,
+                "is_active": rng.random() > 0.02,
+                "is_admin": False,
+                "created_at": now - timedelta(seconds=rng.randrange(3 * 365 * 86400)),
+            }
+            for user_id in range(first_user, first_user + users)
+        ),
+        users,
+    )
+
+    tables["categories"] = bulk_insert(
+        Category,
+        (
+            {
+                "id": category_id,
+                "name": f"{CATEGORY_NAMES[n % len(CATEGORY_NAMES)]} {category_id}",
+                "description": f"Kategoria syntetyczna {category_id}",
+                "created_at": now - timedelta(days=rng.randrange(1000)),
+            }
+            for n, category_id in enumerate(
+                range(first_category, first_category + categories)
+            )
+        ),
+        categories,
+    )
+
+    # Ceny z rozkładu log-normalnego (mediana ok. 60 zł), zapamiętywane dla zamówień
+    prices = [
+        round(min(rng.lognormvariate(4.1, 1.0), 20000), 2) for _ in range(products)
+    ]
+    tables["products"] = bulk_insert(
+        Product,
+        (
+            {
+                "id": first_product + n,
+                "name": f"{rng.choice(PRODUCT_ADJECTIVES)} {rng.choice(PRODUCT_NOUNS)} {first_product + n}",
+                "description": f"Opis produktu {first_product + n}",
+                "price": prices[n],
+                "stock_quantity": rng.randrange(0, 500),
+                "category_id": first_category + rng.randrange(categories),
+                "is_active": rng.random() > 0.05,
+                "created_at": now - timedelta(seconds=rng.randrange(2 * 365 * 86400)),
+            }
+            for n in range(products)
+        ),
+        products,
+    )
+
+    # Popularność: ranga Zipfa przypisana losowo do produktów i klientów
+    product_by_rank = list(range(products))
+    rng.shuffle(product_by_rank)
+    product_weights = zipf_cum_weights(products, PRODUCT_ZIPF_EXPONENT)
+    user_by_rank = list(range(users))
+    rng.shuffle(user_by_rank)
+    user_weights = zipf_cum_weights(users, USER_ZIPF_EXPONENT)
+    day_weights = seasonal_day_weights(ORDER_HISTORY_DAYS, now)
+    hour_weights = list(itertools.accumulate(HOURLY_WEIGHTS))
+    status_weights = list(itertools.accumulate(ORDER_STATUS_WEIGHTS))
+
+    orders: List[Dict[str, Any]] = []
+
+    def generate_order_items() -> Iterator[Dict[str, Any]]:
+        produced = 0
+        order_id = first_order
+        while produced < order_items:
+            count = min(
+                1 + int(rng.expovariate(1 / (MEAN_ITEMS_PER_ORDER - 1))),
+                order_items - produced,
+            )
+            total = 0.0
+            for _ in range(count):
+                product_index = product_by_rank[sample(rng, product_weights)]
+                quantity = 1 + int(rng.expovariate(1.5))
+                unit_price = prices[product_index]
+                total += unit_price * quantity
+                yield {
+                    "order_id": order_id,
+                    "product_id": first_product + product_index,
+                    "quantity": quantity,
+                    "unit_price": unit_price,
+                    "total_price": round(unit_price * quantity, 2),
+                }
+
+            day = sample(rng, day_weights)
+            created_at = (
+                now.replace(hour=0, minute=0, second=0)
+                - timedelta(days=ORDER_HISTORY_DAYS - day)
+                + timedelta(
+                    hours=sample(rng, hour_weights), seconds=rng.randrange(3600)
+                )
+            )
+            orders.append(
+                {
+                    "id": order_id,
+                    "user_id": first_user + user_by_rank[sample(rng, user_weights)],
+                    "total_amount": round(total, 2),
+                    "status": ORDER_STATUSES[sample(rng, status_weights)],
+                    "shipping_address": f"ul. Testowa {order_id % 200 + 1}, 00-001 Warszawa",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+            produced += count
+            order_id += 1
+
+    # Zamówienia zapisywane są partiami po wygenerowaniu ich pozycji
+    def drain_orders() -> Iterator[Dict[str, Any]]:
+        while orders:
+            yield orders.pop()
+
+    tables["order_items"] = {"rows": 0, "duration_seconds": 0.0}
+    tables["orders"] = {"rows": 0, "duration_seconds": 0.0}
+    items = generate_order_items()
+    while True:
+        chunk = list(itertools.islice(items, GENERATOR_COMMIT_ROWS))
+        if not chunk:
+            break
+        for name, model, rows in (
+            ("orders", Order, list(drain_orders())),
+            ("order_items", OrderItem, chunk),
+        ):
+            part = bulk_insert(model, rows, len(rows))
+            tables[name]["rows"] += part["rows"]
+            tables[name]["duration_seconds"] += part["duration_seconds"]
+    # Ostatnie zamówienie mogło zostać dodane po pobraniu ostatniej partii pozycji
+    if orders:
+        part = bulk_insert(Order, list(drain_orders()), len(orders))
+        tables["orders"]["rows"] += part["rows"]
+        tables["orders"]["duration_seconds"] += part["duration_seconds"]
+
+    # Popularność produktów (sortowanie katalogu) liczona raz po wstawieniu zamówień
+    with engine.begin() as connection:
+        backfill_product_popularity(connection)
+
+    cart_pairs = set()
+    while len(cart_pairs) < min(cart_items, users * products):
+        cart_pairs.add(
+            (
+                first_user + user_by_rank[sample(rng, user_weights)],
+                first_product + product_by_rank[sample(rng, product_weights)],
+            )
+        )
+    tables["cart_items"] = bulk_insert(
+        CartItem,
+        (
+            {
+                "user_id": user_id,
+                "product_id": product_id,
+                "quantity": 1 + rng.randrange(3),
+                "created_at": now - timedelta(seconds=rng.randrange(14 * 86400)),
+            }
+            for user_id, product_id in sorted(cart_pairs)
+        ),
+        len(cart_pairs),
+    )
+
+    report["duration_seconds"] = round(time.perf_counter() - started, 3)
+    report["password"] = SYNTHETIC_PASSWORD
+    print(f"✅ Dane syntetyczne wygenerowane w {report['duration_seconds']} s")
+    return report
+
+
+def run_generation(
+    seed: int, sizes: Dict[str, int], base_date: Optional[date] = None
+) -> Dict[str, Any]:
+    """Generowanie danych z zapisem stanu (jedno generowanie naraz)"""
+    if not _generation_lock.acquire(blocking=False):
+        raise RuntimeError("Generowanie danych jest już w toku")
+    generation_status["running"] = True
+    try:
+        report = generate_synthetic_data(seed=seed, base_date=base_date, **sizes)
+        generation_status["last_report"] = report
+        return report
+    finally:
+        generation_status["running"] = False
+        _generation_lock.release()
+
+
+def submit_generation(
+    seed: int, sizes: Dict[str, int], base_date: Optional[date] = None
+) -> None:
+    """Zlecenie generowania danych w tle"""
+    _generation_executor.submit(run_generation, seed, sizes, base_date)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generator syntetycznych danych")
+    parser.add_argument("--size", choices=DATASET_SIZES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-date", type=date.fromisoformat, default=None)
+    for name in DATASET_SIZES["small"]:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None)
+    args = parser.parse_args()
+
+    sizes = dict(DATASET_SIZES[args.size])
+    for name in sizes:
+        value = getattr(args, name)
+        if value is not None:
+            sizes[name] = value
+    try:
+        validate_sizes(sizes)
+    except ValueError as e:
+        parser.error(str(e))
+    generate_synthetic_data(seed=args.seed, base_date=args.base_date, **sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .instrumentation import normalize_statement
+from .models import get_database_generation, get_database_path
+from .query_hooks import add_query_observer
+
+# Rejestrowanie rzeczywistego zestawu zapytań dla doradcy indeksów
+INDEX_ADVISOR_ENABLED = os.getenv("INDEX_ADVISOR_ENABLED", "1") == "1"
+INDEX_ADVISOR_MAX_STATEMENTS = int(os.getenv("INDEX_ADVISOR_MAX_STATEMENTS", "500"))
+# Szacunki liczności bez ANALYZE: rozmiar próbki i czas ważności w pamięci
+INDEX_ADVISOR_SAMPLE_ROWS = int(os.getenv("INDEX_ADVISOR_SAMPLE_ROWS", "10000"))
+INDEX_ADVISOR_STATS_TTL = int(os.getenv("INDEX_ADVISOR_STATS_TTL", "3600"))
+
+# Tylko te instrukcje mogą skorzystać z indeksów
+_ADVISABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+_SQL_KEYWORDS = {
+    "where",
+    "join",
+    "left",
+    "right",
+    "inner",
+    "outer",
+    "cross",
+    "on",
+    "order",
+    "group",
+    "limit",
+    "offset",
+    "having",
+    "set",
+    "union",
+}
+
+_TABLE_REFERENCE = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE
+)
+_EQUALITY = re.compile(
+    r"(?:\b(\w+)\.)?\b(\w+)\s*(?:=|\bIS\b|\bIN\s*\()(?!=)", re.IGNORECASE
+)
+# Odwrócona kolejność argumentów (leniwe ładowanie relacji w SQLAlchemy generuje
+# "WHERE ? = order_items.order_id"): parametr lub literał po lewej stronie
+_REVERSED_EQUALITY = re.compile(
+    r"(?:\?|:\w+|'(?:[^']|'')*'|\b\d+(?:\.\d+)?)\s*(?:=|\bIS\b|\bIN\s*\()\s*"
+    r"(?:\b(\w+)\.)?\b(\w+)\b(?!\s*\()",
+    re.IGNORECASE,
+)
+_JOIN_EQUALITY = re.compile(r"\b(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)\b")
+_RANGE = re.compile(r"(?:\b(\w+)\.)?\b(\w+)\s*(?:<=|>=|<|>|\bBETWEEN\b)", re.IGNORECASE)
+_ORDER_BY = re.compile(
+    r"\bORDER BY\s+(.+?)(?:\bLIMIT\b|\bOFFSET\b|$)", re.IGNORECASE | re.DOTALL
+)
+_ORDER_COLUMN = re.compile(r"^(?:(\w+)\.)?(\w+)(?:\s+(ASC|DESC))?$", re.IGNORECASE)
+_FROM = re.compile(r"\bFROM\b", re.IGNORECASE)
+_PLAN_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+_PLAN_TABLE = re.compile(r"^(?:SCAN|SEARCH) (?:TABLE )?(\w+)")
+
+
+class WorkloadRecorder:
+    """Kształty zapytań z ruchu produkcyjnego (liczba wykonań i łączny czas)"""
+
+    def __init__(self, size: int = INDEX_ADVISOR_MAX_STATEMENTS):
+        self._lock = threading.Lock()
+        self._size = size
+        self._statements: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, statement: str, param_count: int, duration_ms: float) -> None:
+        shape = normalize_statement(statement)
+        with self._lock:
+            entry = self._statements.get(shape)
+            if entry is None:
+                if len(self._statements) >= self._size:
+                    self._statements.popitem(last=False)
+                # Zapamiętywany jest tylko tekst zapytania, wartości parametrów nie
+                entry = {
+                    "statement": statement,
+                    "param_count": param_count,
+                    "count": 0,
+                    "total_ms": 0.0,
+                }
+                self._statements[shape] = entry
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(entry) for entry in self._statements.values()]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+
+
+workload_recorder = WorkloadRecorder()
+
+
+def _record_workload(
+    conn, cursor, statement, parameters, context, executemany, duration
+):
+    if not statement.lstrip().upper().startswith(_ADVISABLE):
+        return
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    param_count = len(parameters) if isinstance(parameters, (tuple, list)) else 0
+    workload_recorder.add(statement, param_count, duration * 1000)
+
+
+if INDEX_ADVISOR_ENABLED:
+    add_query_observer(_record_workload)
+
+
+class CardinalityEstimator:
+    """Liczność tabel i kolumn dla doradcy bez pełnych skanów
+
+    Źródłem jest sqlite_stat1 (po ANALYZE); w przeciwnym razie szacunek z
+    zakresu rowid i z próbki wierszy, zapamiętany do zmiany bazy lub upływu TTL.
+    """
+
+    def __init__(self, ttl: int = INDEX_ADVISOR_STATS_TTL):
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._estimates: Dict[Tuple[str, Optional[str]], Tuple[Any, float, int]] = {}
+
+    def _cached(self, key, compute: Callable[[], int]) -> int:
+        generation = get_database_generation()
+        now = time.monotonic()
+        with self._lock:
+            cached = self._estimates.get(key)
+        if cached and cached[0] == generation and now - cached[1] < self._ttl:
+            return cached[2]
+        value = compute()
+        with self._lock:
+            self._estimates[key] = (generation, now, value)
+        return value
+
+    def rows(self, conn: sqlite3.Connection, stat1: Dict, table: str) -> int:
+        if table in stat1["rows"]:
+            return stat1["rows"][table]
+
+        def compute() -> int:
+            # Zakres, a nie samo MAX(rowid) - generator danych zaczyna identyfikatory
+            # od GENERATOR_ID_BASE, co zawyżałoby liczność części tabel. Osobne
+            # podzapytania, bo MIN i MAX w jednym SELECT wymuszają pełny skan
+            try:
+                return conn.execute(
+                    f'SELECT COALESCE((SELECT MAX(rowid) FROM "{table}") '
+                    f'- (SELECT MIN(rowid) FROM "{table}") + 1, 0)'
+                ).fetchone()[0]
+            except sqlite3.Error:
+                return conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+        return self._cached((table, None), compute)
+
+    def distinct(
+        self, conn: sqlite3.Connection, stat1: Dict, table: str, column: str
+    ) -> int:
+        if (table, column) in stat1["distinct"]:
+            return stat1["distinct"][(table, column)]
+        return self._cached(
+            (table, column),
+            lambda: conn.execute(
+                f'SELECT COUNT(DISTINCT "{column}") FROM '
+                f'(SELECT "{column}" FROM "{table}" LIMIT ?)',
+                (INDEX_ADVISOR_SAMPLE_ROWS,),
+            ).fetchone()[0],
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._estimates.clear()
+
+
+cardinality_estimator = CardinalityEstimator()
+
+
+def read_stat1(conn: sqlite3.Connection) -> Dict[str, Dict]:
+    """Liczby wierszy i wartości różnych pierwszej kolumny indeksu z sqlite_stat1"""
+    stat1: Dict[str, Dict] = {"rows": {}, "distinct": {}}
+    try:
+        rows = conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1").fetchall()
+    except sqlite3.Error:
+        # Tabela powstaje dopiero po pierwszym ANALYZE
+        return stat1
+    for table, index, stat in rows:
+        numbers = [int(value) for value in stat.split() if value.isdigit()]
+        if not numbers:
+            continue
+        stat1["rows"][table] = max(stat1["rows"].get(table, 0), numbers[0])
+        if index and len(numbers) > 1:
+            first = conn.execute(f'PRAGMA index_info("{index}")').fetchone()
+            if first and first[2]:
+                # Druga liczba to średnia liczba wierszy na wartość pierwszej kolumny
+                stat1["distinct"][(table, first[2])] = max(
+                    1, round(numbers[0] / max(numbers[1], 1))
+                )
+    return stat1
+
+
+def explain(conn: sqlite3.Connection, statement: str, param_count: int) -> List[str]:
+    """Plan zapytania; parametry zastępowane są wartością NULL"""
+    rows = conn.execute(
+        f"EXPLAIN QUERY PLAN {statement}", (None,) * param_count
+    ).fetchall()
+    return [row[-1] for row in rows]
+
+
+def _table_aliases(statement: str) -> Dict[str, str]:
+    aliases = {}
+    for table, alias in _TABLE_REFERENCE.findall(statement):
+        aliases[table] = table
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def _resolve(
+    qualifier: str,
+    column: str,
+    aliases: Dict[str, str],
+    columns: Dict[str, List[str]],
+) -> Optional[Tuple[str, str]]:
+    """Przypisanie kolumny do tabeli (także bez prefiksu, gdy jednoznaczne)"""
+    if qualifier:
+        table = aliases.get(qualifier)
+        if table and column in columns.get(table, []):
+            return table, column
+        return None
+    owners = {t for t in aliases.values() if column in columns.get(t, [])}
+    if len(owners) == 1:
+        return owners.pop(), column
+    return None
+
+
+def candidate_columns(
+    statement: str, columns: Dict[str, List[str]]
+) -> Dict[str, Dict[str, List[str]]]:
+    """Kolumny z warunków równości, zakresów i sortowania dla każdej tabeli"""
+    aliases = _table_aliases(statement)
+    candidates: Dict[str, Dict[str, List[str]]] = {}
+
+    def add(kind: str, resolved: Optional[Tuple[str, str]]) -> None:
+        if resolved is None:
+            return
+        table, column = resolved
+        entry = candidates.setdefault(table, {"equality": [], "range": [], "order": []})
+        if column not in entry[kind]:
+            entry[kind].append(column)
+
+    # Zapytania wyłącznie na części WHERE/ON, bez listy kolumn SELECT
+    body = _FROM.split(statement, 1)[-1]
+    body = _ORDER_BY.split(body)[0]
+    for left, left_column, right, right_column in _JOIN_EQUALITY.findall(body):
+        add("equality", _resolve(left, left_column, aliases, columns))
+        add("equality", _resolve(right, right_column, aliases, columns))
+    for pattern in (_EQUALITY, _REVERSED_EQUALITY):
+        for qualifier, column in pattern.findall(body):
+            add("equality", _resolve(qualifier, column, aliases, columns))
+    for qualifier, column in _RANGE.findall(body):
+        add("range", _resolve(qualifier, column, aliases, columns))
+
+    order_by = _ORDER_BY.search(statement)
+    if order_by:
+        for part in order_by.group(1).split(","):
+            match = _ORDER_COLUMN.match(part.strip())
+            if match:
+                add("order", _resolve(match.group(1), match.group(2), aliases, columns))
+    return candidates
+
+
+def propose_index(
+    candidate: Dict[str, List[str]],
+    needs_sort: bool,
+    distinct: Callable[[str], int],
+) -> List[str]:
+    """Kolumny indeksu: najpierw równości (od najbardziej selektywnej), potem
+    sortowanie albo jeden zakres"""
+    # Klucz główny jest już indeksowany (rowid)
+    equality = [c for c in candidate["equality"] if c != "id"]
+    index_columns = sorted(equality, key=distinct, reverse=True)
+    if needs_sort and candidate["order"]:
+        index_columns += [c for c in candidate["order"] if c not in index_columns]
+    elif candidate["range"]:
+        index_columns += [c for c in candidate["range"][:1] if c not in index_columns]
+    return index_columns
+
+
+def _merge_prefixes(proposals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Propozycja będąca prefiksem dłuższej (ta sama tabela) jest do niej dołączana"""
+    merged = []
+    for proposal in sorted(proposals, key=lambda p: len(p["columns"]), reverse=True):
+        target = next(
+            (
+                other
+                for other in merged
+                if other["table"] == proposal["table"]
+                and other["columns"][: len(proposal["columns"])] == proposal["columns"]
+            ),
+            None,
+        )
+        if target is None:
+            merged.append(proposal)
+            continue
+        target["estimated_benefit"] += proposal["estimated_benefit"]
+        target["observed_ms"] += proposal["observed_ms"]
+        target["statements"] += proposal["statements"]
+    return merged
+
+
+def _is_covered(index_columns: List[str], existing: List[List[str]]) -> bool:
+    return any(columns[: len(index_columns)] == index_columns for columns in existing)
+
+
+def _schema_copy(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Baza w pamięci z samym schematem - do sprawdzania planów z nowym indeksem"""
+    copy = sqlite3.connect(":memory:")
+    rows = conn.execute(
+        "SELECT type, sql FROM sqlite_master WHERE sql IS NOT NULL "
+        "AND type IN ('table', 'index') AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY type = 'index'"
+    ).fetchall()
+    for _, sql in rows:
+        try:
+            copy.execute(sql)
+        except sqlite3.Error:
+            # Tabele pomocnicze tabel wirtualnych powstają razem z nimi
+            pass
+    return copy
+
+
+def advise_indexes(
+    extra_statements: Optional[List[str]] = None,
+    analyze: bool = False,
+) -> Dict[str, Any]:
+    """Odtworzenie zarejestrowanych zapytań przez EXPLAIN i ranking propozycji indeksów"""
+    workload = workload_recorder.snapshot()
+    for statement in extra_statements or []:
+        workload.append(
+            {"statement": statement, "param_count": 0, "count": 1, "total_ms": 0.0}
+        )
+
+    conn = sqlite3.connect(get_database_path())
+    try:
+        tables = [
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND name NOT LIKE 'sqlite_%'"
+            )
+        ]
+        columns = {
+            table: [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+            for table in tables
+        }
+        existing = {
+            table: [
+                [row[2] for row in conn.execute(f'PRAGMA index_info("{index[1]}")')]
+                for index in conn.execute(f'PRAGMA index_list("{table}")')
+            ]
+            for table in tables
+        }
+        if analyze:
+            conn.execute("ANALYZE")
+            conn.commit()
+        # Liczności liczone leniwie, tylko dla tabel z propozycjami indeksów
+        stat1 = read_stat1(conn)
+
+        def distinct(table: str) -> Callable[[str], int]:
+            return lambda column: cardinality_estimator.distinct(
+                conn, stat1, table, column
+            )
+
+        findings = []
+        proposals: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+        for entry in workload:
+            try:
+                plan = explain(conn, entry["statement"], entry["param_count"])
+            except sqlite3.Error:
+                continue
+
+            aliases = _table_aliases(entry["statement"])
+            scanned = set()
+            for detail in plan:
+                match = _PLAN_SCAN.match(detail)
+                if match:
+                    table = aliases.get(
+                        match.group(2) or match.group(1), match.group(1)
+                    )
+                    if table in columns:
+                        scanned.add(table)
+            first_table = next(
+                (
+                    aliases.get(m.group(1), m.group(1))
+                    for m in map(_PLAN_TABLE.match, plan)
+                    if m
+                ),
+                None,
+            )
+            sorted_table = (
+                first_table
+                if any(detail.startswith("USE TEMP B-TREE") for detail in plan)
+                else None
+            )
+            if not scanned and not sorted_table:
+                continue
+
+            findings.append(
+                {
+                    "statement": normalize_statement(entry["statement"]),
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_ms"], 3),
+                    "plan": plan,
+                }
+            )
+
+            candidates = candidate_columns(entry["statement"], columns)
+            for table in scanned | ({sorted_table} if sorted_table else set()):
+                candidate = candidates.get(table)
+                if not candidate:
+                    continue
+                index_columns = propose_index(
+                    candidate, table == sorted_table, distinct(table)
+                )
+                if not index_columns:
+                    continue
+                if _is_covered(index_columns, existing.get(table, [])):
+                    continue
+
+                rows = max(cardinality_estimator.rows(conn, stat1, table), 1)
+                benefit = 0.0
+                if table in scanned:
+                    benefit += entry["count"] * (rows - math.log2(rows + 1))
+                if table == sorted_table and candidate["order"]:
+                    benefit += entry["count"] * rows * math.log2(rows + 1)
+
+                key = (table, tuple(index_columns))
+                proposal = proposals.setdefault(
+                    key,
+                    {
+                        "table": table,
+                        "columns": index_columns,
+                        "estimated_benefit": 0.0,
+                        "observed_ms": 0.0,
+                        "statements": [],
+                    },
+                )
+                proposal["estimated_benefit"] += benefit
+                proposal["observed_ms"] += entry["total_ms"]
+                proposal["statements"].append(entry)
+
+        recommendations = _validate(conn, _merge_prefixes(list(proposals.values())))
+    finally:
+        conn.close()
+
+    return {
+        "workload_statements": len(workload),
+        "problem_statements": findings,
+        "recommendations": recommendations,
+    }
+
+
+def _validate(conn: sqlite3.Connection, proposals) -> List[Dict[str, Any]]:
+    """Sprawdzenie na kopii schematu, że planista faktycznie użyje nowego indeksu"""
+    recommendations = []
+    for proposal in proposals:
+        name = f"idx_{proposal['table']}_{'_'.join(proposal['columns'])}"
+        columns_sql = ", ".join(proposal["columns"])
+        create_sql = f"CREATE INDEX {name} ON {proposal['table']} ({columns_sql})"
+
+        copy = _schema_copy(conn)
+        try:
+            copy.execute(create_sql)
+            improved = [
+                entry
+                for entry in proposal["statements"]
+                if any(
+                    name in detail
+                    for detail in explain(
+                        copy, entry["statement"], entry["param_count"]
+                    )
+                )
+            ]
+        except sqlite3.Error:
+            continue
+        finally:
+            copy.close()
+
+        if improved:
+            recommendations.append(
+                {
+                    "create_index": create_sql,
+                    "table": proposal["table"],
+                    "columns": proposal["columns"],
+                    "statements_improved": len(improved),
+                    "executions_improved": sum(entry["count"] for entry in improved),
+                    "observed_ms": round(proposal["observed_ms"], 3),
+                    "estimated_benefit": round(proposal["estimated_benefit"], 1),
+                }
+            )
+    return sorted(
+        recommendations, key=lambda item: item["estimated_benefit"], reverse=True
+    )
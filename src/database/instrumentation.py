@@ -0,0 +1,230 @@
+import os
+import re
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from .query_hooks import add_query_observer
+
+# Instrumentacja zapytań SQL per żądanie
+SQL_INSTRUMENTATION_ENABLED = os.getenv("SQL_INSTRUMENTATION_ENABLED", "1") == "1"
+# Ten sam kształt zapytania wykonany tyle razy w jednym żądaniu = podejrzenie N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """Kształt zapytania: literały zastąpione '?', listy IN zwinięte"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestStats:
+    """Statystyki SQL zbierane w trakcie jednego żądania"""
+
+    __slots__ = ("queries", "db_time", "rows", "shapes")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.queries += 1
+        self.db_time += duration
+        self.shapes[normalize_statement(statement)] += 1
+
+    def repeated_shapes(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Dict]:
+        return [
+            {"statement": shape, "count": count}
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "sql_request_stats", default=None
+)
+
+
+class RouteStats:
+    """Zagregowane statystyki SQL dla wszystkich tras (w obrębie workera)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, route: str, stats: RequestStats) -> None:
+        suspicious = stats.repeated_shapes()
+        with self._lock:
+            entry = self._routes.setdefault(
+                route,
+                {
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_time": 0.0,
+                    "rows": 0,
+                    "n_plus_one_requests": 0,
+                    "n_plus_one_statements": Counter(),
+                },
+            )
+            entry["requests"] += 1
+            entry["queries"] += stats.queries
+            entry["max_queries"] = max(entry["max_queries"], stats.queries)
+            entry["db_time"] += stats.db_time
+            entry["rows"] += stats.rows
+            if suspicious:
+                entry["n_plus_one_requests"] += 1
+                for item in suspicious:
+                    entry["n_plus_one_statements"][item["statement"]] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": entry["requests"],
+                    "avg_queries": round(entry["queries"] / entry["requests"], 2),
+                    "max_queries": entry["max_queries"],
+                    "avg_db_time_ms": round(
+                        entry["db_time"] * 1000 / entry["requests"], 3
+                    ),
+                    "avg_rows": round(entry["rows"] / entry["requests"], 2),
+                    "n_plus_one_requests": entry["n_plus_one_requests"],
+                    "n_plus_one_statements": [
+                        {"statement": statement, "requests": count}
+                        for statement, count in entry[
+                            "n_plus_one_statements"
+                        ].most_common(5)
+                    ],
+                }
+                for route, entry in self._routes.items()
+            }
+        return dict(
+            sorted(
+                routes.items(), key=lambda item: item[1]["avg_queries"], reverse=True
+            )
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+class _RowCountingCursor:
+    """Kursor DBAPI zliczający pobrane wiersze (ORM, Core i text() jednakowo)"""
+
+    __slots__ = ("_cursor", "_stats")
+
+    def __init__(self, cursor, stats: RequestStats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._stats.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._stats.rows += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _record_query(conn, cursor, statement, parameters, context, executemany, duration):
+    stats = _request_stats.get()
+    if stats is None:
+        return
+    stats.record(statement, duration)
+    if cursor.description is None:
+        # INSERT/UPDATE/DELETE - liczba zmienionych wierszy
+        if cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+    elif context is not None:
+        # SELECT - wiersze liczone przy pobieraniu wyniku
+        context.cursor = _RowCountingCursor(cursor, stats)
+
+
+if SQL_INSTRUMENTATION_ENABLED:
+    add_query_observer(_record_query)
+
+
+class SQLInstrumentationMiddleware:
+    """Middleware ASGI: liczniki SQL w nagłówkach odpowiedzi i statystykach tras"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_INSTRUMENTATION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                suspicious = stats.repeated_shapes()
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-db-queries", str(stats.queries).encode()),
+                    (b"x-db-time-ms", f"{stats.db_time * 1000:.3f}".encode()),
+                    (b"x-db-rows", str(stats.rows).encode()),
+                    (b"x-db-n-plus-one", str(len(suspicious)).encode()),
+                ]
+                message["headers"] = headers
+
+                # Klucz to szablon trasy - nieznane ścieżki (404) w jednym worku
+                route = scope.get("route")
+                route_key = (
+                    f"{scope['method']} {route.path}" if route else "<unmatched>"
+                )
+                route_stats.add(route_key, stats)
+                if suspicious:
+                    print(
+                        f"⚠️ Możliwe N+1 w {route_key}: "
+                        f"{suspicious[0]['count']}x {suspicious[0]['statement'][:120]}"
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _request_stats.reset(token)
+
+
+def get_instrumentation_report() -> Dict[str, Any]:
+    """Raport instrumentacji SQL dla endpointu administracyjnego"""
+    return {
+        "enabled": SQL_INSTRUMENTATION_ENABLED,
+        "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+        "routes": route_stats.snapshot(),
+    }
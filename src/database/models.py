@@ -1,6 +1,8 @@
 from datetime import datetime
 from sqlalchemy import (
     create_engine,
+    event,
+    inspect,
     Column,
     Integer,
     String,
@@ -12,8 +14,15 @@ from sqlalchemy import (
     Index,
 )
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.exc import DisconnectionError, OperationalError
 from sqlalchemy.orm import relationship, sessionmaker
+from contextlib import contextmanager
+from fastapi import HTTPException, status
+from typing import Any, Dict, Optional
+import asyncio
 import os
+import threading
+import time
 
 # Ustawienia bazy danych
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./aszwoj_shop.db")
@@ -21,8 +30,225 @@ engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
 )
+
+# Profile połączeń SQLite (PRAGMA ustawiane przy każdym nowym połączeniu)
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Domyślne ustawienia SQLite (rollback journal, synchronous=FULL)
+    "default": {},
+    # WAL pozwala czytelnikom działać równolegle z pisarzem
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,  # wartość ujemna = KiB (64 MB)
+        "mmap_size": 268435456,  # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+}
+
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance")
+
+
+def get_sqlite_pragmas(profile: str = SQLITE_PROFILE) -> Dict[str, Any]:
+    """Ustawienia PRAGMA dla profilu z nadpisaniami ze zmiennych środowiskowych"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Nieznany profil SQLite: {profile}")
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES["performance"]:
+        override = os.getenv(f"SQLITE_{name.upper()}")
+        if override is not None:
+            pragmas[name] = override
+    return pragmas
+
+
+SQLITE_PRAGMAS = get_sqlite_pragmas()
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: Optional[Dict[str, Any]] = None):
+    """Ustawianie PRAGMA na surowym połączeniu sqlite3"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in (SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_database_path() -> str:
+    """Ścieżka pliku bazy SQLite wynikająca z DATABASE_URL"""
+    return engine.url.database or ":memory:"
+
+
+# Maksymalny czas oczekiwania żądania na koniec przywracania bazy
+SESSION_GATE_WAIT_SECONDS = float(os.getenv("SESSION_GATE_WAIT_SECONDS", "30"))
+
+
+class SessionGate:
+    """Wstrzymywanie nowych sesji bazy i oczekiwanie na zakończenie trwających"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._paused = False
+        self._active = 0
+
+    @property
+    def is_paused(self) -> bool:
+        return self._paused
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Baza danych jest chwilowo niedostępna (przywracanie kopii)",
+            headers={"Retry-After": "5"},
+        )
+
+    def enter(self, timeout: float = SESSION_GATE_WAIT_SECONDS) -> None:
+        with self._condition:
+            if not self._condition.wait_for(lambda: not self._paused, timeout):
+                raise self._unavailable()
+            self._active += 1
+
+    async def enter_async(self, timeout: float = SESSION_GATE_WAIT_SECONDS) -> None:
+        # Pętla zdarzeń nie może blokować się na Condition, więc sprawdzamy cyklicznie
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                if not self._paused:
+                    self._active += 1
+                    return
+            if time.monotonic() >= deadline:
+                raise self._unavailable()
+            await asyncio.sleep(0.05)
+
+    def leave(self) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def paused(self, drain_timeout: float):
+        """Blokada nowych sesji na czas operacji i odczekanie na trwające"""
+        with self._condition:
+            if self._paused:
+                raise RuntimeError("Sesje bazy danych są już wstrzymane")
+            self._paused = True
+            drained = self._condition.wait_for(lambda: self._active == 0, drain_timeout)
+        try:
+            if not drained:
+                raise TimeoutError(
+                    f"Nie zakończono {self._active} aktywnych sesji "
+                    f"w ciągu {drain_timeout} s"
+                )
+            yield
+        finally:
+            with self._condition:
+                self._paused = False
+                self._condition.notify_all()
+
+
+session_gate = SessionGate()
+
+
+def _get_generation_path() -> str:
+    return f"{get_database_path()}.generation"
+
+
+def get_database_generation():
+    """Znacznik wymiany pliku bazy (zmieniany przy każdym przywróceniu)"""
+    try:
+        stat = os.stat(_get_generation_path())
+        return (stat.st_ino, stat.st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+
+def bump_database_generation() -> None:
+    """Sygnał dla wszystkich workerów, aby otworzyły połączenia na nowo"""
+    path = _get_generation_path()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(str(time.time()))
+    os.replace(temp_path, path)
+
+
+def _track_generation(target_engine) -> None:
+    """Odrzucanie z puli połączeń otwartych przed ostatnim przywróceniem bazy"""
+
+    @event.listens_for(target_engine, "connect")
+    def _remember_generation(dbapi_connection, connection_record):
+        connection_record.info["generation"] = get_database_generation()
+
+    @event.listens_for(target_engine, "checkout")
+    def _check_generation(dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info.get("generation") != get_database_generation():
+            # Pula zamyka to połączenie i otwiera nowe
+            raise DisconnectionError("Plik bazy danych został przywrócony")
+
+
+if engine.dialect.name == "sqlite":
+    _track_generation(engine)
+
+
+# Osobna, mała pula połączeń tylko do odczytu dla zapytań ad hoc (execute-sql),
+# aby analityka nie zajmowała połączeń obsługujących zamówienia
+READONLY_POOL_SIZE = int(os.getenv("READONLY_POOL_SIZE", "2"))
+readonly_engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    pool_size=READONLY_POOL_SIZE,
+    max_overflow=0,
+    pool_timeout=5,
+)
+
+if readonly_engine.dialect.name == "sqlite":
+
+    @event.listens_for(readonly_engine, "connect")
+    def _set_readonly_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, {**SQLITE_PRAGMAS, "query_only": "ON"})
+
+    _track_generation(readonly_engine)
+
+
+# Tryb asynchroniczny (AsyncEngine + aiosqlite), włączany zmienną DATABASE_ASYNC=1
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "0") == "1"
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_POOL_SIZE", "20"))
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, pool_size=ASYNC_POOL_SIZE, max_overflow=ASYNC_POOL_SIZE
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    if async_engine.dialect.name == "sqlite":
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _set_async_sqlite_pragmas(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection)
+
+        _track_generation(async_engine.sync_engine)
+
+
 Base = declarative_base()
 
 
@@ -68,6 +294,8 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Liczba zamówionych sztuk (bez anulowanych zamówień) - sortowanie po popularności
+    popularity = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relacje
     category = relationship("Category", back_populates="products")
@@ -123,6 +351,58 @@ class CartItem(Base):
     product = relationship("Product", back_populates="cart_items")
 
 
+# Wersje użytkowników (unieważnianie pamięci podręcznej profili między workerami)
+class UserVersion(Base):
+    __tablename__ = "user_versions"
+
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, index=True)
+
+
+# Nowa wersja użytkownika przy każdej zmianie wiersza users - także przez Core,
+# text() i /database/execute-sql, a nie tylko przez zdarzenia ORM
+USER_VERSION_DDL = tuple(
+    f"""CREATE TRIGGER IF NOT EXISTS user_versions_{operation.lower()}
+    AFTER {operation} ON users
+    BEGIN
+        INSERT OR REPLACE INTO user_versions (user_id, version)
+        SELECT old.id, COALESCE(MAX(version), 0) + 1 FROM user_versions;
+    END""" for operation in ("UPDATE", "DELETE")
+)
+
+
+def create_user_version_triggers(connection) -> None:
+    """Wyzwalacze zwiększające wersję użytkownika (unieważnianie pamięci podręcznej)"""
+    for statement in USER_VERSION_DDL:
+        connection.exec_driver_sql(statement)
+
+
+# Unieważnione tokeny (wspólne dla wszystkich workerów, usuwane po wygaśnięciu)
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    # AUTOINCREMENT: identyfikatory nie są używane ponownie po usunięciu wpisów,
+    # więc workery mogą synchronizować się przyrostowo (id > ostatnio widziane)
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String, unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Dziennik wolnych zapytań (SLOW_QUERY_TABLE=1); parametry tylko jako skrót
+class SlowQuery(Base):
+    __tablename__ = "slow_queries"
+
+    id = Column(Integer, primary_key=True)
+    recorded_at = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    params_fingerprint = Column(String)
+    duration_ms = Column(Float, nullable=False)
+    statement = Column(Text, nullable=False)
+    plan = Column(Text)
+
+
 # Tworzenie dodatkowych indeksów złożonych dla optymalizacji zapytań
 Index("idx_user_email_active", User.email, User.is_active)
 Index("idx_product_category_active", Product.category_id, Product.is_active)
@@ -130,12 +410,149 @@ Index("idx_product_price_range", Product.price, Product.is_active)
 Index("idx_order_user_status", Order.user_id, Order.status)
 Index("idx_cart_user_product", CartItem.user_id, CartItem.product_id)
 
+# Sortowanie katalogu ze stronicowaniem keyset: (is_active, [category_id], klucz, id)
+# pozwala czytać stronę prosto z indeksu, bez sortowania i bez pomijania wierszy
+for _sort_name, _sort_column in (
+    ("created", Product.created_at),
+    ("price", Product.price),
+    ("name", Product.name),
+    ("popularity", Product.popularity),
+):
+    Index(
+        f"idx_product_active_category_{_sort_name}",
+        Product.is_active,
+        Product.category_id,
+        _sort_column,
+        Product.id,
+    )
+    Index(
+        f"idx_product_active_{_sort_name}", Product.is_active, _sort_column, Product.id
+    )
+
+
+def backfill_product_popularity(connection) -> None:
+    """Przeliczenie popularności produktów z pozycji nieanulowanych zamówień"""
+    connection.exec_driver_sql("""
+        UPDATE products SET popularity = COALESCE((
+            SELECT SUM(order_items.quantity) FROM order_items
+            JOIN orders ON orders.id = order_items.order_id
+            WHERE order_items.product_id = products.id AND orders.status != 'cancelled'
+        ), 0)
+        """)
+
+
+# Indeks pełnotekstowy nazw i opisów produktów (FTS5 z treścią w tabeli products).
+# Wyzwalacze aktualizują go przy każdym zapisie, również przy imporcie i z generatora;
+# zmiany ceny, stanu czy popularności nie dotykają indeksu (UPDATE OF name, description)
+PRODUCT_SEARCH_TABLE = "products_fts"
+PRODUCT_SEARCH_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {PRODUCT_SEARCH_TABLE} USING fts5(
+        name, description, content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {PRODUCT_SEARCH_TABLE}_insert AFTER INSERT ON products
+    BEGIN
+        INSERT INTO {PRODUCT_SEARCH_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {PRODUCT_SEARCH_TABLE}_delete AFTER DELETE ON products
+    BEGIN
+        INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {PRODUCT_SEARCH_TABLE}_update
+    AFTER UPDATE OF name, description ON products
+    BEGIN
+        INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {PRODUCT_SEARCH_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+)
+
+
+def create_product_search_index(connection) -> bool:
+    """Tabela FTS5 i wyzwalacze; False, jeśli SQLite nie obsługuje FTS5"""
+    if connection.dialect.name != "sqlite":
+        return False
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (PRODUCT_SEARCH_TABLE,)
+    ).first()
+    try:
+        for statement in PRODUCT_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+    except OperationalError as e:
+        print(f"⚠️ Wyszukiwanie pełnotekstowe niedostępne: {e}")
+        return False
+    if not exists:
+        # Produkty sprzed utworzenia indeksu
+        connection.exec_driver_sql(
+            f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+        print("🔎 Utworzono indeks wyszukiwania produktów")
+    return True
+
+
+def rebuild_product_search_index() -> Dict[str, Any]:
+    """Przebudowa indeksu wyszukiwania z bieżącej zawartości tabeli products"""
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        if not create_product_search_index(connection):
+            raise RuntimeError("SQLite bez obsługi FTS5")
+        connection.exec_driver_sql(
+            f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+        # Scalenie segmentów indeksu - mniej odczytów przy wyszukiwaniu
+        connection.exec_driver_sql(
+            f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}) VALUES ('optimize')"
+        )
+        products = connection.exec_driver_sql("SELECT COUNT(*) FROM products").scalar()
+    duration = time.perf_counter() - started
+    print(
+        f"🔎 Indeks wyszukiwania przebudowany: {products} produktów w {duration:.2f} s"
+    )
+    return {"products": products, "duration_seconds": round(duration, 3)}
+
+
+def migrate_schema() -> None:
+    """Dodanie kolumn i indeksów brakujących w tabelach ze starszej wersji aplikacji"""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                default = (
+                    f" NOT NULL DEFAULT {column.server_default.arg}"
+                    if column.server_default is not None
+                    else ""
+                )
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}"
+                )
+                print(f"🔧 Dodano kolumnę {table.name}.{column.name}")
+                if (table.name, column.name) == ("products", "popularity"):
+                    backfill_product_popularity(connection)
+
+            # create_all nie dodaje indeksów do istniejących tabel
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+        create_user_version_triggers(connection)
+        create_product_search_index(connection)
+
 
 # Tworzenie tabel
 def create_tables():
     """Funkcja do bezpiecznego tworzenia tabel"""
     try:
         Base.metadata.create_all(bind=engine)
+        migrate_schema()
         print("Tabele utworzone pomyślnie")
 
         # Tworzymy zhardkodowanego administratora
@@ -150,8 +567,23 @@ def create_tables():
 
 def get_db():
     """Generator sesji bazy danych"""
+    session_gate.enter()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+        session_gate.leave()
+
+
+async def get_async_db():
+    """Generator asynchronicznej sesji bazy danych"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Tryb asynchroniczny jest wyłączony (DATABASE_ASYNC=1)")
+
+    await session_gate.enter_async()
+    try:
+        async with AsyncSessionLocal() as db:
+            yield db
+    finally:
+        session_gate.leave()
@@ -0,0 +1,54 @@
+import time
+from typing import Any, Callable, List
+
+from sqlalchemy import event
+
+from .models import engine, async_engine
+
+# Odbiorca pomiaru: (conn, cursor, statement, parameters, context, executemany, czas w s)
+QueryObserver = Callable[[Any, Any, str, Any, Any, bool, float], None]
+
+_observers: List[QueryObserver] = []
+
+
+def add_query_observer(observer: QueryObserver) -> None:
+    """Rejestracja odbiorcy czasu zapytań - jeden pomiar na zapytanie dla wszystkich"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_query_observer(observer: QueryObserver) -> None:
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append((context, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()[1]
+    for observer in _observers:
+        observer(conn, cursor, statement, parameters, context, executemany, duration)
+
+
+def _handle_error(exception_context):
+    # Zapytanie zakończone błędem nie wywołuje after_cursor_execute; błąd mógł też
+    # wystąpić przed before_cursor_execute, więc zdejmowany jest tylko jego własny pomiar
+    connection = exception_context.connection
+    if connection is not None:
+        starts = connection.info.get("query_start")
+        if starts and starts[-1][0] is exception_context.execution_context:
+            starts.pop()
+
+
+def time_queries(target_engine) -> None:
+    """Podpięcie wspólnego pomiaru czasu zapytań do silnika"""
+    event.listen(target_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target_engine, "handle_error", _handle_error)
+
+
+time_queries(engine)
+if async_engine is not None:
+    time_queries(async_engine.sync_engine)
@@ -0,0 +1,316 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .backup_store import (
+    SNAPSHOTS_DIR,
+    collect_garbage,
+    create_incremental_backup,
+    remove_snapshot,
+)
+from .models import get_database_path
+from .utils import BACKUP_DIR, create_backup, ensure_directories
+
+# Ustawienia automatycznych kopii zapasowych
+BACKUP_SCHEDULE_ENABLED = os.getenv("BACKUP_SCHEDULE_ENABLED", "1") == "1"
+BACKUP_INTERVAL_HOURS = float(os.getenv("BACKUP_INTERVAL_HOURS", "24"))
+BACKUP_SCHEDULE_MODE = os.getenv("BACKUP_SCHEDULE_MODE", "incremental")
+BACKUP_RETRY_SECONDS = int(os.getenv("BACKUP_RETRY_SECONDS", "300"))
+# Retencja: najnowsza kopia z każdego z N ostatnich dni i M ostatnich tygodni
+BACKUP_KEEP_DAILY = int(os.getenv("BACKUP_KEEP_DAILY", "7"))
+BACKUP_KEEP_WEEKLY = int(os.getenv("BACKUP_KEEP_WEEKLY", "4"))
+
+# Prefiks kopii automatycznych - retencja nie dotyka kopii tworzonych ręcznie
+SCHEDULED_PREFIX = "auto_"
+LEADER_LOCK_PATH = os.path.join(BACKUP_DIR, ".scheduler.lock")
+RUN_LOCK_PATH = os.path.join(BACKUP_DIR, ".backup_run.lock")
+STATE_PATH = os.path.join(BACKUP_DIR, "scheduler_state.json")
+STATE_LOCK_PATH = os.path.join(BACKUP_DIR, ".scheduler_state.lock")
+LEADER_POLL_SECONDS = 60
+
+
+def load_state() -> Dict[str, Any]:
+    """Stan harmonogramu współdzielony przez workery (plik JSON)"""
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_state(state: Dict[str, Any]) -> None:
+    """Atomowy zapis stanu harmonogramu"""
+    ensure_directories()
+    temp_path = f"{STATE_PATH}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp_path, STATE_PATH)
+
+
+def update_state(update: Callable[[Dict[str, Any]], None]) -> None:
+    """Odczyt, zmiana i zapis stanu pod blokadą - zmiany workerów się nie nadpisują"""
+    ensure_directories()
+    with open(STATE_LOCK_PATH, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            state = load_state()
+            update(state)
+            _save_state(state)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def run_lock():
+    """Blokada jednej kopii naraz (kopia, retencja i GC fragmentów w całości)
+
+    Zwraca False, jeśli kopię wykonuje już inny proces lub wątek.
+    """
+    ensure_directories()
+    with open(RUN_LOCK_PATH, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _scheduled_backups() -> List[Dict[str, Any]]:
+    """Kopie automatyczne (pełne i przyrostowe) z datą utworzenia"""
+    backups = []
+    for directory, extension in ((BACKUP_DIR, ".db"), (SNAPSHOTS_DIR, ".json")):
+        if not os.path.isdir(directory):
+            continue
+        for file_name in os.listdir(directory):
+            if not (
+                file_name.startswith(SCHEDULED_PREFIX) and file_name.endswith(extension)
+            ):
+                continue
+            stamp = file_name[len(SCHEDULED_PREFIX) :].split(".")[0]
+            try:
+                created_at = datetime.strptime(stamp, "%Y%m%d_%H%M%S")
+            except ValueError:
+                continue
+            backups.append(
+                {"path": os.path.join(directory, file_name), "created_at": created_at}
+            )
+    return sorted(backups, key=lambda backup: backup["created_at"], reverse=True)
+
+
+def apply_retention(
+    keep_daily: int = BACKUP_KEEP_DAILY, keep_weekly: int = BACKUP_KEEP_WEEKLY
+) -> List[str]:
+    """Usuwanie kopii automatycznych spoza reguł retencji"""
+    keep = set()
+    days, weeks = [], []
+
+    # Kopie są posortowane od najnowszej, więc pierwsza z danego dnia/tygodnia zostaje
+    for backup in _scheduled_backups():
+        day = backup["created_at"].date()
+        week = backup["created_at"].isocalendar()[:2]
+        if day not in days and len(days) < keep_daily:
+            days.append(day)
+            keep.add(backup["path"])
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.append(week)
+            keep.add(backup["path"])
+
+    removed = []
+    for backup in _scheduled_backups():
+        if backup["path"] in keep:
+            continue
+        if backup["path"].endswith(".json"):
+            remove_snapshot(backup["path"])
+        else:
+            os.remove(backup["path"])
+        removed.append(backup["path"])
+
+    if any(path.endswith(".json") for path in removed):
+        collect_garbage()
+    return removed
+
+
+def run_backup_job(
+    mode: str = BACKUP_SCHEDULE_MODE, scheduled: bool = True
+) -> Optional[Dict[str, Any]]:
+    """Wykonanie kopii z zapisem metryk (jedna kopia naraz we wszystkich workerach)
+
+    Zwraca None, jeśli kopia została pominięta, bo wykonuje ją już inny proces.
+    """
+    with run_lock() as acquired:
+        if not acquired:
+            print("⏳ Kopia zapasowa jest już wykonywana przez inny proces")
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        started_at = time.time()
+        run: Dict[str, Any] = {
+            "mode": mode,
+            "scheduled": scheduled,
+            "started_at": datetime.fromtimestamp(started_at).isoformat(),
+        }
+
+        try:
+            # Kopie ręczne dostają domyślne nazwy i nie podlegają retencji
+            name = f"{SCHEDULED_PREFIX}{timestamp}" if scheduled else None
+            if mode == "incremental":
+                report = create_incremental_backup(name)
+            else:
+                report = create_backup(f"{name}.db" if name else None)
+            if not report:
+                raise RuntimeError("Nie udało się utworzyć kopii zapasowej")
+
+            run.update(
+                {
+                    "status": "success",
+                    "backup_path": report["backup_path"],
+                    "size_bytes": report["size_bytes"],
+                    "bytes_written": report.get("bytes_written", report["size_bytes"]),
+                }
+            )
+            if scheduled:
+                run["removed_by_retention"] = apply_retention()
+        except Exception as e:
+            print(f"❌ Błąd automatycznej kopii zapasowej: {e}")
+            report = {}
+            run.update({"status": "error", "error": str(e)})
+
+        finished_at = time.time()
+        run["duration_seconds"] = round(finished_at - started_at, 3)
+        run["finished_at"] = datetime.fromtimestamp(finished_at).isoformat()
+        run["finished_timestamp"] = finished_at
+
+        def record_run(state: Dict[str, Any]) -> None:
+            state["last_run"] = run
+            if scheduled:
+                state["last_scheduled_run"] = run
+            if run["status"] == "success":
+                state["last_success"] = run
+                state["runs"] = state.get("runs", 0) + 1
+            else:
+                state["failures"] = state.get("failures", 0) + 1
+
+        update_state(record_run)
+        return report
+
+
+class BackupScheduler:
+    """Harmonogram kopii zapasowych uruchamiany w wątku tła każdego workera
+
+    Kopie wykonuje tylko worker, który zdobędzie blokadę pliku (lider).
+    Pozostałe co minutę ponawiają próbę, więc po awarii lidera zadanie przejmuje inny.
+    """
+
+    def __init__(self, interval_hours: float = BACKUP_INTERVAL_HOURS):
+        self.interval_seconds = interval_hours * 3600
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._leader_file = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_file is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="backup-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._leader_file is not None:
+            self._leader_file.close()
+            self._leader_file = None
+
+    def _try_acquire_leadership(self) -> bool:
+        ensure_directories()
+        lock_file = open(LEADER_LOCK_PATH, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        # Zapis pod blokadą lidera i blokadą stanu (stan zapisują też kopie zlecane przez API)
+        update_state(lambda state: state.update(leader_pid=os.getpid()))
+        self._leader_file = lock_file
+        print(f"🗓️ Harmonogram kopii zapasowych aktywny w procesie {os.getpid()}")
+        return True
+
+    def seconds_until_due(self) -> float:
+        last_run = load_state().get("last_scheduled_run")
+        if not last_run:
+            return 0
+        delay = self.interval_seconds
+        if last_run.get("status") != "success":
+            delay = min(delay, BACKUP_RETRY_SECONDS)
+        return last_run["finished_timestamp"] + delay - time.time()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self.is_leader and not self._try_acquire_leadership():
+                self._stop.wait(LEADER_POLL_SECONDS)
+                continue
+
+            due_in = self.seconds_until_due()
+            if due_in > 0:
+                self._stop.wait(min(due_in, LEADER_POLL_SECONDS))
+                continue
+
+            if os.path.exists(get_database_path()):
+                if run_backup_job() is None:
+                    # Kopię wykonuje API lub inny worker - bez zapisu przebiegu
+                    # termin się nie przesuwa, więc ponowienie dopiero po odczekaniu
+                    self._stop.wait(LEADER_POLL_SECONDS)
+            else:
+                # Baza nie została jeszcze zainicjalizowana
+                self._stop.wait(LEADER_POLL_SECONDS)
+
+
+backup_scheduler = BackupScheduler()
+# Kopie zlecane przez API wykonywane są poza wątkiem żądania
+_background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup")
+
+
+def submit_backup(mode: str = "full") -> None:
+    """Zlecenie kopii zapasowej w tle"""
+    _background_executor.submit(run_backup_job, mode, False)
+
+
+def get_scheduler_status() -> Dict[str, Any]:
+    """Konfiguracja i metryki harmonogramu kopii zapasowych"""
+    state = load_state()
+    return {
+        "enabled": BACKUP_SCHEDULE_ENABLED,
+        "interval_hours": BACKUP_INTERVAL_HOURS,
+        "mode": BACKUP_SCHEDULE_MODE,
+        "retention": {"daily": BACKUP_KEEP_DAILY, "weekly": BACKUP_KEEP_WEEKLY},
+        "leader_pid": state.get("leader_pid"),
+        "is_leader": backup_scheduler.is_leader,
+        "runs": state.get("runs", 0),
+        "failures": state.get("failures", 0),
+        "last_run": state.get("last_run"),
+        "last_success": state.get("last_success"),
+        "next_run_in_seconds": (
+            round(max(backup_scheduler.seconds_until_due(), 0), 1)
+            if backup_scheduler.is_leader
+            else None
+        ),
+    }
@@ -0,0 +1,239 @@
+import hashlib
+import math
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.schema import CreateTable
+
+from .instrumentation import normalize_statement
+from .models import SlowQuery, engine, get_database_path
+from .query_hooks import add_query_observer
+
+# Ustawienia dziennika wolnych zapytań (wartość ujemna progu wyłącza dziennik)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "500"))
+# Liczba śledzonych kształtów zapytań i próbek czasu na kształt
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "200"))
+SLOW_QUERY_SAMPLES = 1000
+# Zapis wpisów do tabeli slow_queries (model SlowQuery, osobny wątek i połączenie)
+SLOW_QUERY_TABLE = os.getenv("SLOW_QUERY_TABLE", "0") == "1"
+
+# Tylko te instrukcje mają sensowny plan zapytania
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def fingerprint(value: str) -> str:
+    """Krótki skrót tekstu (kształtu zapytania lub parametrów)"""
+    return hashlib.sha1(value.encode()).hexdigest()[:12]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentyl metodą najbliższej pozycji"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def explain_query_plan(dbapi_connection, statement: str, parameters) -> List[str]:
+    """EXPLAIN QUERY PLAN na osobnym połączeniu sqlite3 (bez zdarzeń silnika)"""
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN niedostępny: {e}"]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Ograniczony bufor wolnych zapytań z agregacją per kształt"""
+
+    def __init__(self, size: int = SLOW_QUERY_LOG_SIZE):
+        self._lock = threading.Lock()
+        self._entries: deque = deque(maxlen=size)
+        self._durations: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries.append(entry)
+            stats = self._durations.get(entry["fingerprint"])
+            if stats is None:
+                if len(self._durations) >= SLOW_QUERY_MAX_FINGERPRINTS:
+                    self._durations.popitem(last=False)
+                stats = {
+                    "statement": entry["statement"],
+                    "count": 0,
+                    "samples": deque(maxlen=SLOW_QUERY_SAMPLES),
+                    "plan": entry["plan"],
+                }
+                self._durations[entry["fingerprint"]] = stats
+            self._durations.move_to_end(entry["fingerprint"])
+            stats["count"] += 1
+            stats["samples"].append(entry["duration_ms"])
+            stats["plan"] = entry["plan"]
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._entries)
+        return entries[-limit:][::-1]
+
+    def aggregates(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [
+                (
+                    key,
+                    stats["statement"],
+                    stats["count"],
+                    list(stats["samples"]),
+                    stats["plan"],
+                )
+                for key, stats in self._durations.items()
+            ]
+        result = [
+            {
+                "fingerprint": key,
+                "statement": statement,
+                "count": count,
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": max(samples),
+                "plan": plan,
+            }
+            for key, statement, count, samples, plan in items
+        ]
+        return sorted(result, key=lambda item: item["p95_ms"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._durations.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+class SlowQueryWorker:
+    """Wątek dopisujący plan EXPLAIN do wolnych zapytań i zapisujący je do tabeli
+
+    Plan liczony jest poza żądaniem, na osobnym połączeniu - hook silnika tylko
+    umieszcza wpis w kolejce i nie wykonuje niczego na połączeniu aplikacji.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, entry: Dict[str, Any], parameters) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="slow-query-worker", daemon=True
+                    )
+                    self._thread.start()
+        try:
+            self._queue.put_nowait((entry, parameters))
+        except queue.Full:
+            pass
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty() and len(batch) < 100:
+                batch.append(self._queue.get_nowait())
+            try:
+                self._process(batch)
+            except Exception as e:
+                print(f"❌ Błąd przetwarzania wolnych zapytań: {e}")
+
+    def _process(self, batch: List[tuple]) -> None:
+        conn = sqlite3.connect(get_database_path(), timeout=30)
+        try:
+            entries = []
+            for entry, parameters in batch:
+                entry["plan"] = explain_query_plan(
+                    conn, entry.pop("raw_statement"), parameters
+                )
+                slow_query_log.add(entry)
+                entries.append(entry)
+            if SLOW_QUERY_TABLE:
+                self._write(conn, entries)
+        finally:
+            conn.close()
+
+    def _write(self, conn, entries: List[Dict[str, Any]]) -> None:
+        conn.execute(
+            str(
+                CreateTable(SlowQuery.__table__, if_not_exists=True).compile(
+                    dialect=engine.dialect
+                )
+            )
+        )
+        conn.executemany(
+            "INSERT INTO slow_queries (recorded_at, fingerprint, params_fingerprint, "
+            "duration_ms, statement, plan) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    entry["recorded_at"],
+                    entry["fingerprint"],
+                    entry["params_fingerprint"],
+                    entry["duration_ms"],
+                    entry["statement"],
+                    "\n".join(entry["plan"]),
+                )
+                for entry in entries
+            ],
+        )
+        conn.commit()
+
+
+slow_query_worker = SlowQueryWorker()
+
+
+def _record_slow_query(
+    conn, cursor, statement, parameters, context, executemany, duration
+):
+    duration_ms = duration * 1000
+    if duration_ms < SLOW_QUERY_THRESHOLD_MS:
+        return
+
+    # Przy executemany plan liczony jest dla pierwszego zestawu parametrów
+    plan_parameters = parameters[0] if executemany and parameters else parameters
+    shape = normalize_statement(statement)
+    entry = {
+        "recorded_at": datetime.now().isoformat(),
+        "fingerprint": fingerprint(shape),
+        # Same wartości parametrów nie są przechowywane (mogą zawierać dane osobowe)
+        "params_fingerprint": fingerprint(repr(parameters)),
+        "duration_ms": round(duration_ms, 3),
+        "statement": shape,
+        "executemany": executemany,
+        "raw_statement": statement,
+    }
+    slow_query_worker.submit(entry, plan_parameters)
+
+
+if SLOW_QUERY_THRESHOLD_MS >= 0:
+    add_query_observer(_record_slow_query)
+
+
+def get_slow_query_report(limit: int = 50) -> Dict[str, Any]:
+    """Raport wolnych zapytań: ostatnie wpisy i percentyle per kształt"""
+    return {
+        "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "table_enabled": SLOW_QUERY_TABLE,
+        "recent": slow_query_log.recent(limit),
+        "by_fingerprint": slow_query_log.aggregates(),
+    }
@@ -1,16 +1,29 @@
+import csv
+import io
 import sqlite3
 import json
 import os
-import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from sqlalchemy import text, inspect
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+from sqlalchemy import case, func, inspect, select, text, true
 from sqlalchemy.orm import Session
 import random
 
 from .models import (
     engine,
+    readonly_engine,
     SessionLocal,
+    SQLITE_PROFILE,
+    SQLITE_PRAGMAS,
+    SQLITE_PROFILES,
+    apply_sqlite_pragmas,
+    bump_database_generation,
+    get_database_path,
+    session_gate,
     User,
     Category,
     Product,
@@ -19,10 +32,54 @@ from .models import (
     CartItem,
 )
 
+from .dumps import (
+    DUMP_EXTENSIONS,
+    iter_dump_chunks,
+    load_sql_dump,
+    print_table_progress,
+)
+
 # Ścieżki dla kopii zapasowych
 BACKUP_DIR = "./backups"
 DUMPS_DIR = "./dumps"
 
+# Domyślny format kompresji zrzutów SQL: none, gzip lub zstd
+DUMP_COMPRESSION = os.getenv("DUMP_COMPRESSION", "gzip")
+
+# Kopia online: liczba stron kopiowanych w jednym kroku i przerwa między krokami
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "1024"))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.005"))
+# Po tylu restartach (zmiany w źródle w trakcie kopii) kopiujemy resztę w jednym kroku
+BACKUP_MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", "3"))
+
+
+# Czas oczekiwania na zakończenie trwających sesji przed podmianą bazy
+RESTORE_DRAIN_SECONDS = float(os.getenv("RESTORE_DRAIN_SECONDS", "10"))
+_restore_lock = threading.Lock()
+
+# Limity zapytań ad hoc: maksymalna liczba wierszy, czas wykonania i wielkość partii
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "10000"))
+SQL_TIMEOUT_SECONDS = float(os.getenv("SQL_TIMEOUT_SECONDS", "10"))
+SQL_STREAM_BATCH = int(os.getenv("SQL_STREAM_BATCH", "500"))
+# Co tyle instrukcji maszyny wirtualnej SQLite sprawdzany jest limit czasu
+SQL_PROGRESS_STEPS = 10000
+# Ostatni wiersz niepełnego strumienia CSV (odpowiednik znaczników NDJSON)
+SQL_CSV_TRUNCATED_MARKER = "#truncated"
+SQL_CSV_ERROR_MARKER = "#error"
+
+# Statystyki bazy: czas świeżości i czas, przez który stara wartość jest jeszcze
+# zwracana (odświeżanie w tle)
+STATISTICS_CACHE_TTL = float(os.getenv("STATISTICS_CACHE_TTL", "30"))
+STATISTICS_STALE_TTL = float(os.getenv("STATISTICS_STALE_TTL", "300"))
+
+# Listy użytkowników: domyślny i maksymalny rozmiar strony
+USERS_PAGE_SIZE = int(os.getenv("USERS_PAGE_SIZE", "100"))
+USERS_MAX_PAGE_SIZE = int(os.getenv("USERS_MAX_PAGE_SIZE", "1000"))
+
+
+class BackupRestartLimit(Exception):
+    """Kopia krokowa restartowana zbyt wiele razy przez zapisy do bazy"""
+
 
 def ensure_directories():
     """Tworzenie katalogów dla kopii zapasowych i zrzutów"""
@@ -30,7 +87,86 @@ def ensure_directories():
     os.makedirs(DUMPS_DIR, exist_ok=True)
 
 
-def create_backup(backup_name: Optional[str] = None) -> str:
+def backup_database(
+    target_path: str,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    sleep: float = BACKUP_STEP_SLEEP,
+) -> Dict[str, Any]:
+    """Spójna kopia działającej bazy przez API backup SQLite (krokowo, z przerwami)"""
+    db_path = get_database_path()
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Baza danych nie znaleziona: {db_path}")
+
+    report: Dict[str, Any] = {"pages": 0, "steps": 0, "restarts": 0}
+    last_percent = -10
+    last_remaining = None
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal last_percent, last_remaining
+        report["pages"] = total
+        report["steps"] += 1
+
+        # SQLite zaczyna od nowa, gdy inne połączenie zmieni bazę w trakcie kopii
+        if last_remaining is not None and remaining >= last_remaining:
+            report["restarts"] += 1
+            if report["restarts"] > BACKUP_MAX_RESTARTS:
+                raise BackupRestartLimit()
+        last_remaining = remaining
+
+        percent = int((total - remaining) * 100 / total) if total else 100
+        if percent >= last_percent + 10:
+            last_percent = percent
+            print(f"📦 Kopia zapasowa: {percent}% ({total - remaining}/{total} stron)")
+
+        if remaining and sleep > 0:
+            time.sleep(sleep)
+
+    temp_path = f"{target_path}.tmp"
+    source = sqlite3.connect(db_path)
+    apply_sqlite_pragmas(source, {"busy_timeout": 5000})
+    started = time.perf_counter()
+
+    try:
+        target = sqlite3.connect(temp_path)
+        try:
+            try:
+                source.backup(target, pages=pages, progress=progress)
+            except BackupRestartLimit:
+                # Jeden krok trzyma transakcję odczytu do końca kopii (w WAL nie blokuje zapisów)
+                print("⚠️ Zbyt wiele restartów kopii, kopiowanie w jednym kroku")
+                source.backup(target, pages=-1)
+            report["page_size"] = target.execute("PRAGMA page_size").fetchone()[0]
+            report["pages"] = target.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            target.close()
+
+        os.replace(temp_path, target_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        source.close()
+
+    duration = time.perf_counter() - started
+    report.update(
+        {
+            "backup_path": target_path,
+            "size_bytes": os.path.getsize(target_path),
+            "duration_seconds": round(duration, 3),
+            "pages_per_second": (
+                round(report["pages"] / duration, 1) if duration > 0 else None
+            ),
+        }
+    )
+    return report
+
+
+def create_backup(
+    backup_name: Optional[str] = None,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    sleep: float = BACKUP_STEP_SLEEP,
+) -> Dict[str, Any]:
     """Tworzenie kopii zapasowej bazy danych SQLite"""
     ensure_directories()
 
@@ -39,73 +175,187 @@ def create_backup(backup_name: Optional[str] = None) -> str:
         backup_name = f"backup_{timestamp}.db"
 
     backup_path = os.path.join(BACKUP_DIR, backup_name)
-    db_path = "aszwoj_shop.db"
 
     try:
-        if os.path.exists(db_path):
-            shutil.copy2(db_path, backup_path)
-            print(f"✅ Kopia zapasowa utworzona: {backup_path}")
-            return backup_path
-        else:
-            print(f"❌ Baza danych nie znaleziona: {db_path}")
-            return ""
+        report = backup_database(backup_path, pages=pages, sleep=sleep)
+        print(
+            f"✅ Kopia zapasowa utworzona: {backup_path} "
+            f"({report['pages']} stron, {report['duration_seconds']} s, "
+            f"{report['pages_per_second']} stron/s)"
+        )
+        return report
     except Exception as e:
         print(f"❌ Błąd podczas tworzenia kopii zapasowej: {e}")
-        return ""
+        return {}
+
+
+def _stage_restore(backup_path: str, staged_path: str) -> None:
+    """Przygotowanie sprawdzonej kopii do przywrócenia obok pliku bazy"""
+    from .backup_store import is_snapshot_manifest, rebuild_snapshot
+
+    if os.path.exists(staged_path):
+        os.remove(staged_path)
+
+    if is_snapshot_manifest(backup_path):
+        # Snapshot przyrostowy jest najpierw składany z fragmentów
+        rebuild_snapshot(backup_path, staged_path)
+    else:
+        source = sqlite3.connect(backup_path)
+        target = sqlite3.connect(staged_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    check = sqlite3.connect(staged_path)
+    try:
+        result = check.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        check.close()
+    if result != "ok":
+        raise ValueError(f"Kopia zapasowa jest uszkodzona: {result}")
 
 
 def restore_backup(backup_path: str) -> bool:
-    """Przywracanie bazy danych z kopii zapasowej"""
-    db_path = "aszwoj_shop.db"
+    """Przywracanie bazy danych z kopii zapasowej bez restartu aplikacji"""
+    db_path = get_database_path()
+    staged_path = f"{db_path}.restore"
+
+    if not os.path.exists(backup_path):
+        print(f"❌ Plik kopii zapasowej nie znaleziony: {backup_path}")
+        return False
+
+    if not _restore_lock.acquire(blocking=False):
+        print("❌ Przywracanie bazy danych jest już w toku")
+        return False
 
     try:
-        if os.path.exists(backup_path):
-            # Tworzymy kopię zapasową obecnej bazy danych przed przywróceniem
+        # Tworzymy kopię zapasową obecnej bazy danych przed przywróceniem
+        if os.path.exists(db_path):
+            current_backup = (
+                f"before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+            )
+            ensure_directories()
+            backup_database(os.path.join(BACKUP_DIR, current_backup))
+            print(f"📦 Aktualna baza danych zapisana jako: {current_backup}")
+
+        # Najdłuższy etap (kopiowanie i weryfikacja) odbywa się przy działającej bazie
+        _stage_restore(backup_path, staged_path)
+
+        paused_at = time.perf_counter()
+        with session_gate.paused(RESTORE_DRAIN_SECONDS):
+            engine.dispose()
             if os.path.exists(db_path):
-                current_backup = (
-                    f"before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-                )
-                shutil.copy2(db_path, os.path.join(BACKUP_DIR, current_backup))
-                print(f"📦 Aktualna baza danych zapisana jako: {current_backup}")
-
-            shutil.copy2(backup_path, db_path)
-            print(f"✅ Baza danych przywrócona z: {backup_path}")
-            return True
-        else:
-            print(f"❌ Plik kopii zapasowej nie znaleziony: {backup_path}")
-            return False
+                # Zapis przez API backup jest atomowy dla wszystkich połączeń,
+                # również tych w innych workerach
+                source = sqlite3.connect(staged_path)
+                target = sqlite3.connect(db_path)
+                apply_sqlite_pragmas(target, {"busy_timeout": 30000})
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                    source.close()
+            else:
+                os.replace(staged_path, db_path)
+            engine.dispose()
+            readonly_engine.dispose()
+            bump_database_generation()
+            statistics_cache.invalidate()
+
+            from src.auth.principal_cache import principal_cache
+
+            principal_cache.clear()
+        unavailable = time.perf_counter() - paused_at
+
+        print(
+            f"✅ Baza danych przywrócona z: {backup_path} "
+            f"(niedostępność: {unavailable:.3f} s)"
+        )
+        return True
     except Exception as e:
         print(f"❌ Błąd podczas przywracania: {e}")
         return False
+    finally:
+        _restore_lock.release()
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
 
 
-def create_sql_dump(dump_name: Optional[str] = None) -> str:
-    """Создание SQL дампа базы данных"""
+def create_sql_dump(
+    dump_name: Optional[str] = None, compression: str = DUMP_COMPRESSION
+) -> Dict[str, Any]:
+    """Tworzenie zrzutu SQL bazy danych (opcjonalnie skompresowanego)"""
     ensure_directories()
 
     if not dump_name:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        dump_name = f"dump_{timestamp}.sql"
+        dump_name = f"dump_{timestamp}{DUMP_EXTENSIONS.get(compression, '.sql')}"
 
     dump_path = os.path.join(DUMPS_DIR, dump_name)
+    started = time.perf_counter()
 
     try:
-        conn = sqlite3.connect("aszwoj_shop.db")
+        conn = sqlite3.connect(get_database_path())
+        conn.execute("PRAGMA busy_timeout=5000")
+        table_counts: Dict[str, int] = {}
+
+        try:
+            with open(dump_path, "wb", buffering=1024 * 1024) as f:
+                for chunk in iter_dump_chunks(
+                    conn, compression, table_counts, print_table_progress
+                ):
+                    f.write(chunk)
+        finally:
+            conn.close()
+
+        duration = time.perf_counter() - started
+        print(f"✅ Zrzut SQL utworzony: {dump_path}")
+        return {
+            "dump_path": dump_path,
+            "compression": compression,
+            "tables": table_counts,
+            "size_bytes": os.path.getsize(dump_path),
+            "duration_seconds": round(duration, 3),
+        }
+    except Exception as e:
+        print(f"❌ Błąd podczas tworzenia zrzutu SQL: {e}")
+        return {}
 
-        with open(dump_path, "w", encoding="utf-8") as f:
-            f.write(f"-- SQL Dump created at {datetime.now()}\n")
-            f.write("-- ASzWoj Shop Database\n\n")
 
-            # Zrzut schematu i danych
-            for line in conn.iterdump():
-                f.write(f"{line}\n")
+def restore_sql_dump(dump_path: str) -> Dict[str, Any]:
+    """Przywracanie bazy danych ze zrzutu SQL (również skompresowanego)"""
+    if not os.path.exists(dump_path):
+        print(f"❌ Plik zrzutu SQL nie znaleziony: {dump_path}")
+        return {}
 
-        conn.close()
-        print(f"✅ Zrzut SQL utworzony: {dump_path}")
-        return dump_path
+    ensure_directories()
+    # Osobny plik dla każdego przywracania - równoległe żądania nie nadpisują sobie
+    # plików w trakcie ładowania (blokada przywracania obejmuje dopiero podmianę bazy)
+    fd, restored_path = tempfile.mkstemp(
+        dir=BACKUP_DIR, prefix=".restore_dump_", suffix=".db"
+    )
+    os.close(fd)
+
+    try:
+        # Zrzut ładowany jest do osobnego pliku, który następnie zastępuje bazę
+        report = load_sql_dump(dump_path, restored_path)
+        print(
+            f"📥 Zrzut SQL załadowany: {report['rows']} wierszy "
+            f"({report['rows_per_second']} wierszy/s)"
+        )
+        if not restore_backup(restored_path):
+            return {}
+
+        print(f"✅ Baza danych przywrócona ze zrzutu: {dump_path}")
+        return {"dump_path": dump_path, **report}
     except Exception as e:
-        print(f"❌ Błąd podczas tworzenia zrzutu SQL: {e}")
-        return ""
+        print(f"❌ Błąd podczas przywracania ze zrzutu SQL: {e}")
+        return {}
+    finally:
+        if os.path.exists(restored_path):
+            os.remove(restored_path)
 
 
 def get_table_info() -> Dict[str, Any]:
@@ -138,15 +388,65 @@ def get_table_info() -> Dict[str, Any]:
         return {}
 
 
-def execute_custom_sql(sql_query: str) -> List[Dict[str, Any]]:
-    """Wykonywanie dowolnego zapytania SQL"""
+def get_sqlite_settings() -> Dict[str, Any]:
+    """Pobieranie aktywnych ustawień PRAGMA połączenia SQLite"""
+    if engine.dialect.name != "sqlite":
+        return {"error": "Diagnostyka dostępna tylko dla SQLite"}
+
+    pragma_names = list(SQLITE_PROFILES["performance"].keys())
+
     try:
         with engine.connect() as connection:
+            active = {
+                name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in pragma_names
+            }
+            sqlite_version = connection.exec_driver_sql(
+                "SELECT sqlite_version()"
+            ).scalar()
+
+        return {
+            "profile": SQLITE_PROFILE,
+            "configured": SQLITE_PRAGMAS,
+            "active": active,
+            "sqlite_version": sqlite_version,
+        }
+    except Exception as e:
+        print(f"❌ Błąd podczas pobierania ustawień SQLite: {e}")
+        return {"error": str(e)}
+
+
+@contextmanager
+def _sql_connection(read_only: bool, timeout: float):
+    """Połączenie dla zapytań ad hoc z limitem czasu (progress handler SQLite)"""
+    with (readonly_engine if read_only else engine).connect() as connection:
+        dbapi_connection = connection.connection.dbapi_connection
+        deadline = time.monotonic() + timeout
+        # Niezerowa wartość przerywa zapytanie (sqlite3.OperationalError: interrupted)
+        dbapi_connection.set_progress_handler(
+            lambda: int(time.monotonic() > deadline), SQL_PROGRESS_STEPS
+        )
+        try:
+            yield connection
+        finally:
+            dbapi_connection.set_progress_handler(None, 0)
+
+
+def execute_custom_sql(
+    sql_query: str,
+    max_rows: int = SQL_MAX_ROWS,
+    timeout: float = SQL_TIMEOUT_SECONDS,
+    read_only: bool = True,
+) -> List[Dict[str, Any]]:
+    """Wykonywanie dowolnego zapytania SQL"""
+    try:
+        with _sql_connection(read_only, timeout) as connection:
             result = connection.execute(text(sql_query))
 
             if result.returns_rows:
                 columns = result.keys()
-                rows = result.fetchall()
+                rows = result.fetchmany(max_rows)
+                result.close()
                 return [dict(zip(columns, row)) for row in rows]
             else:
                 connection.commit()
@@ -161,6 +461,119 @@ def execute_custom_sql(sql_query: str) -> List[Dict[str, Any]]:
         return [{"error": str(e)}]
 
 
+def stream_custom_sql(
+    sql_query: str,
+    output_format: str = "ndjson",
+    max_rows: int = SQL_MAX_ROWS,
+    timeout: float = SQL_TIMEOUT_SECONDS,
+    read_only: bool = True,
+) -> Iterator[str]:
+    """Strumieniowe wyniki zapytania SQL (NDJSON lub CSV) partiami yield_per"""
+    with _sql_connection(read_only, timeout) as connection:
+        result = connection.execution_options(yield_per=SQL_STREAM_BATCH).execute(
+            text(sql_query)
+        )
+        if not result.returns_rows:
+            connection.commit()
+            message = {
+                "message": "Query executed successfully",
+                "rowcount": result.rowcount,
+            }
+            if output_format == "csv":
+                yield f"message,rowcount\r\n{message['message']},{result.rowcount}\r\n"
+            else:
+                yield json.dumps(message) + "\n"
+            return
+
+        columns = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush() -> str:
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+
+        if output_format == "csv":
+            # Nagłówek od razu - pusty wynik to nadal poprawny CSV z kolumnami
+            writer.writerow(columns)
+            yield flush()
+
+        sent = 0
+        truncated = False
+        try:
+            for partition in result.partitions():
+                if sent + len(partition) > max_rows:
+                    partition = partition[: max_rows - sent]
+                    truncated = True
+                for row in partition:
+                    if output_format == "csv":
+                        writer.writerow(row)
+                    else:
+                        buffer.write(json.dumps(dict(zip(columns, row)), default=str))
+                        buffer.write("\n")
+                sent += len(partition)
+                yield flush()
+                if truncated:
+                    break
+        except Exception as e:
+            # Nagłówki są już wysłane, błąd trafia na koniec strumienia
+            print(f"❌ Błąd podczas strumieniowania SQL: {e}")
+            if output_format == "csv":
+                writer.writerow([SQL_CSV_ERROR_MARKER, str(e)])
+                yield flush()
+            else:
+                yield json.dumps({"error": str(e)}) + "\n"
+            return
+        finally:
+            result.close()
+
+        if truncated:
+            if output_format == "csv":
+                writer.writerow([SQL_CSV_TRUNCATED_MARKER, max_rows])
+                yield flush()
+            else:
+                yield json.dumps({"truncated": True, "row_limit": max_rows}) + "\n"
+
+
+def _users_query(columns: List, cursor: Optional[int]):
+    query = select(*columns).order_by(User.id)
+    if cursor is not None:
+        query = query.where(User.id > cursor)
+    return query
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def get_users_page(
+    db: Session, columns: List, cursor: Optional[int], limit: int
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Strona użytkowników o id większym niż kursor (keyset zamiast OFFSET)"""
+    rows = db.execute(_users_query(columns, cursor).limit(limit + 1)).mappings().all()
+    # Dodatkowy wiersz oznacza, że istnieje kolejna strona
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    return [dict(row) for row in rows[:limit]], next_cursor
+
+
+def stream_users(columns: List, cursor: Optional[int] = None) -> Iterator[str]:
+    """Eksport użytkowników jako NDJSON partiami yield_per (stała zajętość pamięci)"""
+    with engine.connect() as connection:
+        result = connection.execution_options(yield_per=SQL_STREAM_BATCH).execute(
+            _users_query(columns, cursor)
+        )
+        try:
+            for partition in result.partitions():
+                yield "".join(
+                    json.dumps(dict(row._mapping), default=_json_value) + "\n"
+                    for row in partition
+                )
+        finally:
+            result.close()
+
+
 # Operacje CRUD do demonstracji
 def create_sample_data():
     """Tworzenie danych testowych"""
@@ -327,50 +740,142 @@ def get_random_crud_operations() -> List[Dict[str, Any]]:
         db.close()
 
 
-def get_database_statistics() -> Dict[str, Any]:
-    """Pobieranie statystyk bazy danych"""
-    stats = {}
-    db = SessionLocal()
-
-    try:
-        # Liczba rekordów w każdej tabeli
-        stats["users_count"] = db.query(User).count()
-        stats["products_count"] = db.query(Product).count()
-        stats["categories_count"] = db.query(Category).count()
-        stats["orders_count"] = db.query(Order).count()
-        stats["order_items_count"] = db.query(OrderItem).count()
-        stats["cart_items_count"] = db.query(CartItem).count()
-
-        # Dodatkowe statystyki
-        stats["active_users"] = db.query(User).filter(User.is_active == True).count()
-        stats["admin_users"] = db.query(User).filter(User.is_admin == True).count()
-        stats["active_products"] = (
-            db.query(Product).filter(Product.is_active == True).count()
-        )
-        stats["total_products_value"] = (
-            db.query(Product)
-            .with_entities(
-                db.func.sum(Product.price * Product.stock_quantity).label("total")
-            )
-            .scalar()
-            or 0
+class StaleWhileRevalidate:
+    """Wartość z TTL; po przeterminowaniu zwracana jest stara wartość, a nowa
+    liczona jest w tle (maksymalnie jedno odświeżanie naraz)"""
+
+    def __init__(self, loader, ttl: float, stale_ttl: float):
+        self._loader = loader
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+        self._value = None
+        self._loaded_at = 0.0
+        # Zwiększana przy unieważnieniu - wyniki obliczeń rozpoczętych wcześniej
+        # nie są zapisywane
+        self._generation = 0
+
+    def _age(self) -> float:
+        return time.monotonic() - self._loaded_at
+
+    def _load(self):
+        with self._state_lock:
+            generation = self._generation
+        value = self._loader()
+        with self._state_lock:
+            if generation == self._generation:
+                self._value, self._loaded_at = value, time.monotonic()
+        return value
+
+    def _refresh(self) -> None:
+        try:
+            with self._load_lock:
+                self._load()
+        except Exception as e:
+            print(f"❌ Błąd odświeżania danych w tle: {e}")
+        finally:
+            with self._state_lock:
+                self._refreshing = False
+
+    def get(self):
+        if self._value is not None and self._age() < self._ttl:
+            return self._value
+
+        if self._value is not None and self._age() < self._stale_ttl:
+            with self._state_lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                threading.Thread(target=self._refresh, daemon=True).start()
+            return self._value
+
+        # Brak wartości albo zbyt stara - jedno obliczenie, pozostali czekają na wynik
+        with self._load_lock:
+            value = self._value
+            if value is None or self._age() >= self._ttl:
+                value = self._load()
+            return value
+
+    def invalidate(self) -> None:
+        with self._state_lock:
+            self._generation += 1
+            self._value = None
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _compute_database_statistics() -> Dict[str, Any]:
+    """Wszystkie liczniki w jednym zapytaniu - jeden przebieg po każdej tabeli"""
+    users = select(
+        func.count().label("users_count"),
+        _count_if(User.is_active == True).label("active_users"),
+        _count_if(User.is_admin == True).label("admin_users"),
+    ).subquery()
+    products = select(
+        func.count().label("products_count"),
+        _count_if(Product.is_active == True).label("active_products"),
+        func.coalesce(func.sum(Product.price * Product.stock_quantity), 0).label(
+            "total_products_value"
+        ),
+    ).subquery()
+    categories = select(func.count().label("categories_count")).select_from(Category)
+    orders = select(
+        func.count().label("orders_count"),
+        _count_if(Order.status == "pending").label("pending_orders"),
+        _count_if(Order.status == "completed").label("completed_orders"),
+    ).subquery()
+    order_items = select(func.count().label("order_items_count")).select_from(OrderItem)
+    cart_items = select(func.count().label("cart_items_count")).select_from(CartItem)
+
+    statement = select(
+        users,
+        products,
+        categories.scalar_subquery().label("categories_count"),
+        orders,
+        order_items.scalar_subquery().label("order_items_count"),
+        cart_items.scalar_subquery().label("cart_items_count"),
+    ).select_from(users.join(products, true()).join(orders, true()))
+
+    with engine.connect() as connection:
+        row = connection.execute(statement).mappings().one()
+
+    stats = {
+        key: row[key]
+        for key in (
+            "users_count",
+            "products_count",
+            "categories_count",
+            "orders_count",
+            "order_items_count",
+            "cart_items_count",
+            "active_users",
+            "admin_users",
+            "active_products",
+            "total_products_value",
+            "pending_orders",
+            "completed_orders",
         )
+    }
+    stats["generated_at"] = datetime.now().isoformat()
+    return stats
 
-        # Статистика заказов
-        stats["pending_orders"] = (
-            db.query(Order).filter(Order.status == "pending").count()
-        )
-        stats["completed_orders"] = (
-            db.query(Order).filter(Order.status == "completed").count()
-        )
 
-        return stats
+statistics_cache = StaleWhileRevalidate(
+    _compute_database_statistics, STATISTICS_CACHE_TTL, STATISTICS_STALE_TTL
+)
+
 
+def get_database_statistics() -> Dict[str, Any]:
+    """Pobieranie statystyk bazy danych"""
+    try:
+        return statistics_cache.get()
     except Exception as e:
         print(f"❌ Błąd podczas pobierania statystyk: {e}")
         return {"error": str(e)}
-    finally:
-        db.close()
 
 
 def create_hardcoded_admin():
@@ -1,17 +1,53 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from fastapi.responses import StreamingResponse
+from datetime import date, datetime
+from itertools import chain
 from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from .utils import (
+    SQL_MAX_ROWS,
+    SQL_TIMEOUT_SECONDS,
+    USERS_MAX_PAGE_SIZE,
+    USERS_PAGE_SIZE,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_SLEEP,
+    DUMP_COMPRESSION,
     create_backup,
     restore_backup,
     create_sql_dump,
+    restore_sql_dump,
     get_table_info,
+    get_sqlite_settings,
     execute_custom_sql,
+    stream_custom_sql,
     create_sample_data,
     get_random_crud_operations,
     get_database_statistics,
+    get_users_page,
+    stream_users,
 )
-from .models import create_tables, get_db, User
+from .backup_store import create_incremental_backup, list_snapshots
+from .instrumentation import get_instrumentation_report, route_stats
+from .index_advisor import advise_indexes
+from .generator import (
+    DATASET_SIZES,
+    SyntheticDataExists,
+    check_id_ranges,
+    generation_status,
+    run_generation,
+    submit_generation,
+    validate_sizes,
+)
+from .slow_queries import get_slow_query_report, slow_query_log
+from .scheduler import get_scheduler_status, run_lock, submit_backup
+from .dumps import (
+    DUMP_EXTENSIONS,
+    DUMP_MEDIA_TYPES,
+    get_compressor,
+    stream_sql_dump,
+)
+from .models import create_tables, get_db, get_database_path, User
+from src.auth.dependencies import get_current_admin_user
 
 database_router = APIRouter(prefix="/database", tags=["database"])
 
@@ -40,26 +76,129 @@ def create_test_data():
         )
 
 
+@database_router.post("/generate-data", dependencies=[Depends(get_current_admin_user)])
+def generate_load_test_data(
+    size: str = Query("small", pattern="^(small|medium|large)$"),
+    seed: int = Query(42),
+    users: Optional[int] = Query(None, ge=0),
+    products: Optional[int] = Query(None, ge=1),
+    order_items: Optional[int] = Query(None, ge=0),
+    base_date: Optional[date] = Query(None),
+    background: bool = Query(True),
+):
+    """Generowanie syntetycznych danych do testów obciążeniowych"""
+    sizes = dict(DATASET_SIZES[size])
+    for name, value in (
+        ("users", users),
+        ("products", products),
+        ("order_items", order_items),
+    ):
+        if value is not None:
+            sizes[name] = value
+
+    try:
+        validate_sizes(sizes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if generation_status["running"]:
+        raise HTTPException(
+            status_code=409, detail="Generowanie danych jest już w toku"
+        )
+    try:
+        check_id_ranges(sizes)
+    except SyntheticDataExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if background:
+        submit_generation(seed, sizes, base_date)
+        return {
+            "message": "Generowanie danych zostało zlecone w tle",
+            "sizes": sizes,
+            "status_url": "/database/generate-data",
+        }
+
+    try:
+        return {
+            "message": "Dane zostały wygenerowane",
+            **run_generation(seed, sizes, base_date),
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Błąd generowania danych: {str(e)}"
+        )
+
+
+@database_router.get("/generate-data", dependencies=[Depends(get_current_admin_user)])
+def get_generation_status():
+    """Stan generatora danych syntetycznych"""
+    return generation_status
+
+
 @database_router.post("/backup")
-def create_database_backup(backup_name: Optional[str] = Query(None)):
+def create_database_backup(
+    backup_name: Optional[str] = Query(None),
+    mode: str = Query("full", pattern="^(full|incremental)$"),
+    background: bool = Query(False),
+    pages_per_step: int = Query(BACKUP_PAGES_PER_STEP, ge=-1),
+    step_sleep: float = Query(BACKUP_STEP_SLEEP, ge=0, le=1),
+):
     """Tworzenie kopii zapasowej bazy danych"""
+    if background:
+        submit_backup(mode)
+        return {
+            "message": "Kopia zapasowa została zlecona w tle",
+            "status_url": "/database/backup/scheduler",
+        }
+
     try:
-        backup_path = create_backup(backup_name)
-        if backup_path:
+        if mode == "incremental":
+            # Ta sama blokada co kopie harmonogramu - snapshot nie nakłada się na retencję
+            with run_lock() as acquired:
+                if not acquired:
+                    raise HTTPException(
+                        status_code=409, detail="Kopia zapasowa jest już wykonywana"
+                    )
+                report = create_incremental_backup(backup_name)
+        else:
+            report = create_backup(backup_name, pages=pages_per_step, sleep=step_sleep)
+        if report:
             return {
                 "message": "Kopia zapasowa została pomyślnie utworzona",
-                "backup_path": backup_path,
+                **report,
             }
         else:
             raise HTTPException(
                 status_code=500, detail="Nie udało się utworzyć kopii zapasowej"
             )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Błąd tworzenia kopii zapasowej: {str(e)}"
         )
 
 
+@database_router.get("/backup/scheduler")
+def get_backup_scheduler_status():
+    """Metryki harmonogramu automatycznych kopii zapasowych"""
+    try:
+        return get_scheduler_status()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Błąd pobierania stanu harmonogramu: {str(e)}"
+        )
+
+
+@database_router.get("/snapshots")
+def get_database_snapshots():
+    """Lista kopii przyrostowych"""
+    try:
+        return {"snapshots": list_snapshots()}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Błąd pobierania listy snapshotów: {str(e)}"
+        )
+
+
 @database_router.post("/restore")
 def restore_database(backup_path: str):
     """Przywracanie bazy danych z kopii zapasowej"""
@@ -76,14 +215,22 @@ def restore_database(backup_path: str):
 
 
 @database_router.post("/dump")
-def create_database_dump(dump_name: Optional[str] = Query(None)):
+def create_database_dump(
+    dump_name: Optional[str] = Query(None),
+    compression: str = Query(DUMP_COMPRESSION, pattern="^(none|gzip|zstd)$"),
+):
     """Tworzenie zrzutu SQL bazy danych"""
     try:
-        dump_path = create_sql_dump(dump_name)
-        if dump_path:
+        get_compressor(compression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        report = create_sql_dump(dump_name, compression)
+        if report:
             return {
                 "message": "Zrzut SQL został utworzony pomyślnie",
-                "dump_path": dump_path,
+                **report,
             }
         else:
             raise HTTPException(
@@ -93,6 +240,47 @@ def create_database_dump(dump_name: Optional[str] = Query(None)):
         raise HTTPException(status_code=500, detail=f"Błąd tworzenia zrzutu: {str(e)}")
 
 
+@database_router.get("/dump/stream", dependencies=[Depends(get_current_admin_user)])
+def stream_database_dump(
+    compression: str = Query(DUMP_COMPRESSION, pattern="^(none|gzip|zstd)$"),
+):
+    """Strumieniowe pobieranie zrzutu SQL bez pliku tymczasowego"""
+    try:
+        chunks = stream_sql_dump(get_database_path(), compression)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Błąd tworzenia zrzutu: {str(e)}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_name = f"dump_{timestamp}{DUMP_EXTENSIONS[compression]}"
+    return StreamingResponse(
+        chunks,
+        media_type=DUMP_MEDIA_TYPES[compression],
+        headers={
+            "Content-Disposition": f'attachment; filename="{file_name}"',
+            # nginx nie buforuje odpowiedzi, klient dostaje dane na bieżąco
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@database_router.post("/restore-dump")
+def restore_database_from_dump(dump_path: str):
+    """Przywracanie bazy danych ze zrzutu SQL"""
+    try:
+        report = restore_sql_dump(dump_path)
+        if report:
+            return {
+                "message": "Baza danych została przywrócona ze zrzutu SQL",
+                **report,
+            }
+        else:
+            raise HTTPException(
+                status_code=400, detail="Nie udało się przywrócić bazy ze zrzutu"
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Błąd przywracania: {str(e)}")
+
+
 @database_router.get("/tables")
 def get_tables_info():
     """Pobieranie informacji o tabelach i indeksach"""
@@ -105,14 +293,75 @@ def get_tables_info():
         )
 
 
+@database_router.get("/diagnostics")
+def get_database_diagnostics():
+    """Pobieranie aktywnego profilu połączeń SQLite"""
+    try:
+        return {"sqlite": get_sqlite_settings()}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Błąd pobierania diagnostyki: {str(e)}"
+        )
+
+
 @database_router.post("/execute-sql")
-def execute_sql_query(sql_query: str):
-    """Wykonywanie dowolnego zapytania SQL"""
+def execute_sql_query(
+    sql_query: str,
+    output_format: str = Query("json", alias="format", pattern="^(json|ndjson|csv)$"),
+    max_rows: int = Query(SQL_MAX_ROWS, ge=1, le=SQL_MAX_ROWS),
+    timeout: float = Query(SQL_TIMEOUT_SECONDS, gt=0, le=SQL_TIMEOUT_SECONDS),
+    read_only: bool = Query(True),
+):
+    """Wykonywanie dowolnego zapytania SQL (zapis wymaga read_only=false)"""
+    if output_format == "json":
+        try:
+            result = execute_custom_sql(sql_query, max_rows + 1, timeout, read_only)
+            return {"result": result[:max_rows], "truncated": len(result) > max_rows}
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Błąd wykonywania SQL: {str(e)}"
+            )
+
+    chunks = stream_custom_sql(sql_query, output_format, max_rows, timeout, read_only)
     try:
-        result = execute_custom_sql(sql_query)
-        return {"result": result}
+        # Pierwsza partia pobierana przed wysłaniem nagłówków - błędy SQL dają 400
+        first = next(chunks, "")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Błąd wykonywania SQL: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Błąd wykonywania SQL: {str(e)}")
+
+    return StreamingResponse(
+        chain([first], chunks),
+        media_type="text/csv" if output_format == "csv" else "application/x-ndjson",
+        headers={"X-SQL-Row-Limit": str(max_rows), "X-Accel-Buffering": "no"},
+    )
+
+
+@database_router.get("/instrumentation", dependencies=[Depends(get_current_admin_user)])
+def get_sql_instrumentation():
+    """Statystyki SQL per trasa (liczba zapytań, czas bazy, podejrzenia N+1)"""
+    return get_instrumentation_report()
+
+
+@database_router.delete(
+    "/instrumentation", dependencies=[Depends(get_current_admin_user)]
+)
+def reset_sql_instrumentation():
+    """Zerowanie statystyk SQL"""
+    route_stats.reset()
+    return {"message": "Statystyki SQL zostały wyzerowane"}
+
+
+@database_router.get("/slow-queries", dependencies=[Depends(get_current_admin_user)])
+def get_slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    """Dziennik wolnych zapytań z planami wykonania i percentylami"""
+    return get_slow_query_report(limit)
+
+
+@database_router.delete("/slow-queries", dependencies=[Depends(get_current_admin_user)])
+def reset_slow_queries():
+    """Czyszczenie dziennika wolnych zapytań"""
+    slow_query_log.reset()
+    return {"message": "Dziennik wolnych zapytań został wyczyszczony"}
 
 
 @database_router.get("/crud-demo")
@@ -140,9 +389,9 @@ def get_db_statistics():
 
 
 # Dodatkowe endpointy do demonstracji indeksów
-@database_router.get("/test-indexes")
-def test_database_indexes():
-    """Testowanie wydajności indeksów"""
+@database_router.get("/test-indexes", dependencies=[Depends(get_current_admin_user)])
+def test_database_indexes(analyze: bool = Query(False)):
+    """Testowanie wydajności indeksów (analyze=true odświeża sqlite_stat1)"""
     try:
         test_queries = [
             "SELECT * FROM products WHERE price > 100",
@@ -157,7 +406,9 @@ def test_database_indexes():
             result = execute_custom_sql(f"EXPLAIN QUERY PLAN {query}")
             results.append({"query": query, "execution_plan": result})
 
-        return {"index_tests": results}
+        # Propozycje indeksów na podstawie zapytań z rzeczywistego ruchu
+        advice = advise_indexes(extra_statements=test_queries, analyze=analyze)
+        return {"index_tests": results, **advice}
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Błąd testowania indeksów: {str(e)}"
@@ -200,15 +451,25 @@ def make_user_admin(user_id: int, db: Session = Depends(get_db)):
 
 
 @database_router.get("/users")
-def list_users(db: Session = Depends(get_db)):
-    """Lista wszystkich użytkowników (do debugowania)"""
-    users = db.query(User).all()
-    return [
-        {
-            "id": user.id,
-            "email": user.email,
-            "is_admin": user.is_admin,
-            "is_active": user.is_active,
-        }
-        for user in users
-    ]
+def list_users(
+    response: Response,
+    cursor: Optional[int] = Query(
+        None, ge=0, description="id ostatniego użytkownika poprzedniej strony"
+    ),
+    limit: int = Query(USERS_PAGE_SIZE, ge=1, le=USERS_MAX_PAGE_SIZE),
+    output_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db),
+):
+    """Lista użytkowników (do debugowania) stronicowana po id lub eksport NDJSON"""
+    columns = [User.id, User.email, User.is_admin, User.is_active]
+    if output_format == "ndjson":
+        return StreamingResponse(
+            stream_users(columns, cursor),
+            media_type="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no"},
+        )
+
+    users, next_cursor = get_users_page(db, columns, cursor, limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return users
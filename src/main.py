@@ -1,12 +1,30 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src import router
+from src.routers import router
+from src.auth.hashing import password_hasher
+from src.database.instrumentation import SQLInstrumentationMiddleware
+from src.database.scheduler import BACKUP_SCHEDULE_ENABLED, backup_scheduler
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Uruchamianie i zatrzymywanie zadań tła aplikacji"""
+    password_hasher.start()
+    if BACKUP_SCHEDULE_ENABLED:
+        backup_scheduler.start()
+    yield
+    backup_scheduler.stop()
+    password_hasher.shutdown()
 
-app = FastAPI(title="ASzWoj")
+
+app = FastAPI(title="ASzWoj", lifespan=lifespan)
 app.include_router(router)
 
+app.add_middleware(SQLInstrumentationMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "127.0.0.1:5173"],
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List
+
+from src.database.models import get_async_db, Order, OrderItem
+from src.auth.dependencies import get_current_user_async
+from .schemas import OrderResponse, OrderListResponse, OrderStatus
+from .views import get_order_response
+
+# Asynchroniczne wersje endpointów zamówień (DATABASE_ASYNC=1)
+async_orders_router = APIRouter(prefix="/orders", tags=["orders"])
+
+
+@async_orders_router.get("/", response_model=List[OrderListResponse])
+async def get_my_orders_async(
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Pobieranie zamówień obecnego użytkownika"""
+    result = await db.scalars(
+        select(Order)
+        .options(selectinload(Order.order_items))
+        .where(Order.user_id == current_user.id)
+        .order_by(Order.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+
+    return [
+        OrderListResponse(
+            id=order.id,
+            total_amount=order.total_amount,
+            status=OrderStatus(order.status),
+            created_at=order.created_at,
+            items_count=len(order.order_items),
+        )
+        for order in result.all()
+    ]
+
+
+@async_orders_router.get("/{order_id}", response_model=OrderResponse)
+async def get_order_async(
+    order_id: int,
+    current_user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Pobieranie szczegółów zamówienia"""
+    result = await db.scalars(
+        select(Order)
+        .options(selectinload(Order.order_items).selectinload(OrderItem.product))
+        .where(Order.id == order_id, Order.user_id == current_user.id)
+    )
+    order = result.first()
+
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Zamówienie nie znalezione"
+        )
+
+    return get_order_response(order)
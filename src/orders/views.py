@@ -108,6 +108,7 @@ def create_order(
 
         # Zmniejszamy ilość produktu w magazynie
         cart_item.product.stock_quantity -= cart_item.quantity
+        cart_item.product.popularity += cart_item.quantity
 
     # Czyścimy koszyk
     db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
@@ -195,6 +196,7 @@ def cancel_order(
     # Przywracamy produkty do magazynu
     for order_item in order.order_items:
         order_item.product.stock_quantity += order_item.quantity
+        order_item.product.popularity -= order_item.quantity
 
     order.status = OrderStatus.CANCELLED.value
     order.updated_at = datetime.utcnow()
@@ -249,6 +251,12 @@ def update_order_admin(
         )
 
     if order_data.status:
+        cancelled = OrderStatus.CANCELLED.value
+        if (order.status == cancelled) != (order_data.status.value == cancelled):
+            # Popularność liczona jest tylko z zamówień, które nie zostały anulowane
+            sign = -1 if order_data.status.value == cancelled else 1
+            for order_item in order.order_items:
+                order_item.product.popularity += sign * order_item.quantity
         order.status = order_data.status.value
 
     if order_data.shipping_address:
@@ -0,0 +1,112 @@
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from src.database.models import get_async_db, Product
+from .schemas import ProductResponse, CategoryResponse
+from .queries import (
+    PRODUCT_SORTS,
+    build_product_search_query,
+    build_products_query,
+    build_search_match,
+    build_product_query,
+    next_product_cursor,
+    null_tail_query,
+    paginate_products_query,
+    build_categories_query,
+    get_product_response,
+)
+
+# Asynchroniczne wersje endpointów katalogu (DATABASE_ASYNC=1)
+async_products_router = APIRouter(prefix="/products", tags=["products"])
+
+
+@async_products_router.get("/", response_model=List[ProductResponse])
+async def get_products_async(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: Optional[int] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: str = Query("newest", pattern=f"^({'|'.join(PRODUCT_SORTS)})$"),
+    cursor: Optional[str] = Query(None, description="wartość nagłówka X-Next-Cursor"),
+):
+    """Pobieranie listy produktów z filtrowaniem, sortowaniem i stronicowaniem kursorem"""
+    base_query = build_products_query(category_id, min_price, max_price)
+    try:
+        query = paginate_products_query(base_query, sort, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if skip and not cursor:
+        query = query.offset(skip)
+    products = (await db.scalars(query)).all()
+    tail = null_tail_query(base_query, sort, cursor, len(products), limit)
+    if tail is not None:
+        products += (await db.scalars(tail)).all()
+
+    next_cursor = next_product_cursor(sort, products, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [get_product_response(product) for product in products[:limit]]
+
+
+@async_products_router.get("/categories/", response_model=List[CategoryResponse])
+async def get_categories_async(db: AsyncSession = Depends(get_async_db)):
+    """Pobieranie listy kategorii"""
+    result = await db.scalars(build_categories_query())
+
+    return [
+        CategoryResponse(
+            id=category.id,
+            name=category.name,
+            description=category.description,
+            created_at=category.created_at,
+        )
+        for category in result.all()
+    ]
+
+
+@async_products_router.get("/search", response_model=List[ProductResponse])
+async def search_products_async(
+    q: str = Query(..., min_length=1, max_length=200),
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: Optional[int] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+):
+    """Wyszukiwanie pełnotekstowe w nazwach i opisach produktów (ranking BM25)"""
+    match = build_search_match(q)
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Fraza wyszukiwania nie zawiera słów",
+        )
+    query = build_product_search_query(match, category_id, min_price, max_price)
+    try:
+        result = await db.scalars(query.offset(skip).limit(limit))
+    except OperationalError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Indeks wyszukiwania niedostępny - przebuduj go (POST /products/admin/search/rebuild)",
+        )
+
+    return [get_product_response(product) for product in result.all()]
+
+
+@async_products_router.get("/{product_id}", response_model=ProductResponse)
+async def get_product_async(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Pobieranie szczegółów produktu"""
+    result = await db.scalars(build_product_query(product_id))
+    product = result.first()
+
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Produkt nie znaleziony"
+        )
+
+    return get_product_response(product)
@@ -0,0 +1,200 @@
+import base64
+import binascii
+import json
+import re
+from datetime import datetime
+from typing import Any, Optional, Tuple
+from sqlalchemy import and_, func, literal, literal_column, or_, select, table, tuple_
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.sql import Select
+
+from src.database.models import PRODUCT_SEARCH_TABLE, Product, Category
+from .schemas import ProductResponse
+
+
+# Zapytania wspólne dla handlerów synchronicznych i asynchronicznych
+def build_products_query(
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> Select:
+    """Zapytanie o aktywne produkty z filtrowaniem (kategoria ładowana w JOIN)"""
+    query = (
+        select(Product)
+        .join(Product.category)
+        .options(contains_eager(Product.category))
+        .where(Product.is_active == True)
+    )
+
+    if category_id:
+        query = query.where(Product.category_id == category_id)
+
+    if min_price:
+        query = query.where(Product.price >= min_price)
+
+    if max_price:
+        query = query.where(Product.price <= max_price)
+
+    return query
+
+
+# Opcje sortowania katalogu: kolumna i kierunek malejący. Identyfikator sortowany
+# jest w tym samym kierunku, więc indeks (is_active, category_id, klucz, id)
+# czytany jest w jedną stronę, bez dodatkowego sortowania
+PRODUCT_SORTS = {
+    "newest": (Product.created_at, True),
+    "price_asc": (Product.price, False),
+    "price_desc": (Product.price, True),
+    "name": (Product.name, False),
+    "popularity": (Product.popularity, True),
+}
+
+
+def encode_product_cursor(sort: str, product: Product) -> str:
+    """Nieprzezroczysty kursor: sortowanie, wartość klucza i id ostatniego produktu"""
+    column, _ = PRODUCT_SORTS[sort]
+    value = getattr(product, column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, product.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_product_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """Odczyt kursora; ValueError, jeśli jest uszkodzony lub z innego sortowania"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, product_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Nieprawidłowy kursor")
+    if cursor_sort != sort or not isinstance(product_id, int):
+        raise ValueError("Kursor pochodzi z innego sortowania")
+    if sort == "newest" and value is not None:
+        value = datetime.fromisoformat(value)
+    return value, product_id
+
+
+def _after_cursor(column, descending: bool, value: Any, product_id: int):
+    """Warunek "za kursorem" zgodny z kolejnością SQLite: NULL przed wartościami
+    przy sortowaniu rosnącym i po nich przy malejącym"""
+    if value is None:
+        # Kursor w grupie NULL - dalej tylko NULL z dalszym id (i wartości przy ASC)
+        tail = and_(
+            column.is_(None),
+            Product.id < product_id if descending else Product.id > product_id,
+        )
+        return tail if descending else or_(tail, column.is_not(None))
+
+    # Wartość wiązana typem kolumny (np. DateTime w formacie zapisu SQLite). Przy
+    # sortowaniu malejącym grupa NULL doczytywana jest osobno (null_tail_query),
+    # bo warunek "OR kolumna IS NULL" wyłącza przeszukiwanie zakresu indeksu
+    position = tuple_(column, Product.id)
+    bound = tuple_(literal(value, column.type), product_id)
+    return position < bound if descending else position > bound
+
+
+def paginate_products_query(
+    query: Select, sort: str, cursor: Optional[str], limit: int
+) -> Select:
+    """Sortowanie i stronicowanie keyset (strona N kosztuje tyle co pierwsza)"""
+    column, descending = PRODUCT_SORTS[sort]
+    if cursor:
+        value, product_id = decode_product_cursor(cursor, sort)
+        query = query.where(_after_cursor(column, descending, value, product_id))
+    if descending:
+        query = query.order_by(column.desc(), Product.id.desc())
+    else:
+        query = query.order_by(column, Product.id)
+    # Dodatkowy wiersz oznacza, że istnieje kolejna strona
+    return query.limit(limit + 1)
+
+
+def null_tail_query(
+    query: Select, sort: str, cursor: Optional[str], fetched: int, limit: int
+) -> Optional[Select]:
+    """Dopełnienie niepełnej strony wierszami z NULL w kluczu sortowania (są na
+    końcu przy sortowaniu malejącym); None, jeśli nie jest potrzebne"""
+    column, descending = PRODUCT_SORTS[sort]
+    if not (cursor and descending and column.nullable) or fetched > limit:
+        return None
+    value, _ = decode_product_cursor(cursor, sort)
+    if value is None:
+        return None
+    return (
+        query.where(column.is_(None))
+        .order_by(Product.id.desc())
+        .limit(limit + 1 - fetched)
+    )
+
+
+def next_product_cursor(sort: str, products: list, limit: int) -> Optional[str]:
+    """Kursor kolejnej strony (None, jeśli to ostatnia strona)"""
+    if len(products) <= limit:
+        return None
+    return encode_product_cursor(sort, products[limit - 1])
+
+
+# Wagi BM25 kolumn indeksu (name, description) - trafienie w nazwie liczy się bardziej
+PRODUCT_SEARCH_WEIGHTS = (10.0, 1.0)
+# Górny limit słów frazy (każde słowo to osobne wyszukanie w indeksie)
+PRODUCT_SEARCH_MAX_TERMS = 8
+
+_search_table = table(PRODUCT_SEARCH_TABLE)
+_SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def build_search_match(phrase: str) -> Optional[str]:
+    """Fraza użytkownika jako wyrażenie MATCH: każde słowo jako prefiks, wszystkie wymagane"""
+    terms = _SEARCH_TERM.findall(phrase)[:PRODUCT_SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    # Cudzysłowy wyłączają składnię FTS5 (AND, OR, NOT, NEAR, kolumna:)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def build_product_search_query(
+    match: str,
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> Select:
+    """Wyszukiwanie pełnotekstowe z filtrami katalogu, od najlepiej dopasowanych (BM25)"""
+    search = literal_column(PRODUCT_SEARCH_TABLE)
+    # Jednoargumentowy plus wyłącza ograniczenie rowid = ? po stronie FTS: bez niego
+    # SQLite przy filtrach czyta produkty z indeksu kategorii/ceny i dla każdego
+    # wiersza ponawia wyszukiwanie FTS. Z nim zapytanie zaczyna się od indeksu FTS
+    # i dociąga produkty po kluczu głównym
+    fts_rowid = literal_column(f"+{PRODUCT_SEARCH_TABLE}.rowid")
+    # bm25() zwraca wartości ujemne - mniejsza oznacza lepsze dopasowanie
+    rank = func.bm25(search, *PRODUCT_SEARCH_WEIGHTS)
+    return (
+        build_products_query(category_id, min_price, max_price)
+        .join(_search_table, Product.id == fts_rowid)
+        .where(search.op("MATCH")(match))
+        .order_by(rank, Product.id)
+    )
+
+
+def build_product_query(product_id: int) -> Select:
+    """Zapytanie o pojedynczy aktywny produkt"""
+    return build_products_query().where(Product.id == product_id)
+
+
+def build_categories_query() -> Select:
+    """Zapytanie o listę kategorii"""
+    return select(Category).order_by(Category.name)
+
+
+def get_product_response(product: Product) -> ProductResponse:
+    """Konwersja Product na ProductResponse"""
+    return ProductResponse(
+        id=product.id,
+        name=product.name,
+        description=product.description,
+        price=product.price,
+        stock_quantity=product.stock_quantity,
+        category_id=product.category_id,
+        category_name=product.category.name,
+        is_active=product.is_active,
+        created_at=product.created_at,
+    )
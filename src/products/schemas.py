@@ -14,7 +14,8 @@ class ProductResponse(BaseModel):
     category_id: int
     category_name: str
     is_active: bool
-    created_at: datetime
+    # NULL w starszych wierszach lub wstawionych surowym SQL (sortowane na końcu "newest")
+    created_at: Optional[datetime]
 
     class Config:
         from_attributes = True
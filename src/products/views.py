@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from src.database.models import get_db, Product, Category, User
+from src.database.models import (
+    get_db,
+    rebuild_product_search_index,
+    Product,
+    Category,
+    User,
+)
 from src.auth.dependencies import get_current_admin_user
 from .schemas import (
     ProductResponse,
@@ -12,81 +19,101 @@ from .schemas import (
     CategoryCreate,
     CategoryUpdate,
 )
+from .queries import (
+    PRODUCT_SORTS,
+    build_product_search_query,
+    build_products_query,
+    build_search_match,
+    build_product_query,
+    next_product_cursor,
+    null_tail_query,
+    paginate_products_query,
+    build_categories_query,
+    get_product_response,
+)
 
 products_router = APIRouter(prefix="/products", tags=["products"])
 
 
 @products_router.get("/", response_model=List[ProductResponse])
 def get_products(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     category_id: Optional[int] = Query(None),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
+    sort: str = Query("newest", pattern=f"^({'|'.join(PRODUCT_SORTS)})$"),
+    cursor: Optional[str] = Query(None, description="wartość nagłówka X-Next-Cursor"),
 ):
-    """Pobieranie listy produktów z filtrowaniem"""
-    query = db.query(Product).filter(Product.is_active == True).join(Category)
-
-    if category_id:
-        query = query.filter(Product.category_id == category_id)
-
-    if min_price:
-        query = query.filter(Product.price >= min_price)
-
-    if max_price:
-        query = query.filter(Product.price <= max_price)
-
-    products = query.order_by(Product.created_at.desc()).offset(skip).limit(limit).all()
-
-    return [
-        ProductResponse(
-            id=product.id,
-            name=product.name,
-            description=product.description,
-            price=product.price,
-            stock_quantity=product.stock_quantity,
-            category_id=product.category_id,
-            category_name=product.category.name,
-            is_active=product.is_active,
-            created_at=product.created_at,
+    """Pobieranie listy produktów z filtrowaniem, sortowaniem i stronicowaniem kursorem"""
+    base_query = build_products_query(category_id, min_price, max_price)
+    try:
+        query = paginate_products_query(base_query, sort, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if skip and not cursor:
+        # Zgodność wsteczna - OFFSET pomija wiersze, więc dalsze strony są wolniejsze
+        query = query.offset(skip)
+    products = db.execute(query).scalars().all()
+    tail = null_tail_query(base_query, sort, cursor, len(products), limit)
+    if tail is not None:
+        products += db.execute(tail).scalars().all()
+
+    next_cursor = next_product_cursor(sort, products, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [get_product_response(product) for product in products[:limit]]
+
+
+@products_router.get("/search", response_model=List[ProductResponse])
+def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    db: Session = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: Optional[int] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+):
+    """Wyszukiwanie pełnotekstowe w nazwach i opisach produktów (ranking BM25)"""
+    match = build_search_match(q)
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Fraza wyszukiwania nie zawiera słów",
         )
-        for product in products
-    ]
+    query = build_product_search_query(match, category_id, min_price, max_price)
+    try:
+        products = db.execute(query.offset(skip).limit(limit)).scalars().all()
+    except OperationalError:
+        # Np. baza przywrócona z kopii sprzed utworzenia indeksu
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Indeks wyszukiwania niedostępny - przebuduj go (POST /products/admin/search/rebuild)",
+        )
+
+    return [get_product_response(product) for product in products]
 
 
 @products_router.get("/{product_id}", response_model=ProductResponse)
 def get_product(product_id: int, db: Session = Depends(get_db)):
     """Pobieranie szczegółów produktu"""
-    product = (
-        db.query(Product)
-        .filter(Product.id == product_id, Product.is_active == True)
-        .join(Category)
-        .first()
-    )
+    product = db.execute(build_product_query(product_id)).scalars().first()
 
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Produkt nie znaleziony"
         )
 
-    return ProductResponse(
-        id=product.id,
-        name=product.name,
-        description=product.description,
-        price=product.price,
-        stock_quantity=product.stock_quantity,
-        category_id=product.category_id,
-        category_name=product.category.name,
-        is_active=product.is_active,
-        created_at=product.created_at,
-    )
+    return get_product_response(product)
 
 
 @products_router.get("/categories/", response_model=List[CategoryResponse])
 def get_categories(db: Session = Depends(get_db)):
     """Pobieranie listy kategorii"""
-    categories = db.query(Category).order_by(Category.name).all()
+    categories = db.execute(build_categories_query()).scalars().all()
 
     return [
         CategoryResponse(
@@ -231,6 +258,19 @@ def get_all_products_admin(db: Session = Depends(get_db)):
     return products
 
 
+@products_router.post(
+    "/admin/search/rebuild", dependencies=[Depends(get_current_admin_user)]
+)
+def rebuild_search_index_admin():
+    """Przebudowa indeksu wyszukiwania produktów (tylko dla administratora)"""
+    try:
+        return rebuild_product_search_index()
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+
+
 # Funkcje administracyjne do zarządzania kategoriami
 @products_router.post("/categories/admin/", response_model=CategoryResponse)
 def create_category_admin(
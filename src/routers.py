@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+
+from src.database.models import DATABASE_ASYNC
+from src.users.views import users_router
+from src.products.views import products_router
+from src.products.async_views import async_products_router
+from src.auth.views import auth_router
+from src.auth.async_views import async_auth_router
+from src.orders.views import orders_router
+from src.orders.async_views import async_orders_router
+from src.stats.views import stats_router
+from src.stats.async_views import async_stats_router
+from src.admins.views import admins_router
+from src.database.views import database_router
+from src.cart.views import cart_router
+from src.cart.async_views import async_cart_router
+
+router = APIRouter()
+
+# W trybie asynchronicznym endpointy odczytu async są rejestrowane jako pierwsze,
+# więc obsługują te same ścieżki zamiast wersji synchronicznych
+if DATABASE_ASYNC:
+    router.include_router(async_products_router)
+    router.include_router(async_auth_router)
+    router.include_router(async_orders_router)
+    router.include_router(async_cart_router)
+    router.include_router(async_stats_router)
+
+router.include_router(users_router)
+router.include_router(products_router)
+router.include_router(auth_router)
+router.include_router(orders_router)
+router.include_router(stats_router)
+router.include_router(admins_router)
+router.include_router(database_router)
+router.include_router(cart_router)
@@ -0,0 +1,268 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict
+from datetime import datetime, timedelta
+
+from src.database.models import (
+    get_async_db,
+    User,
+    Product,
+    Category,
+    Order,
+    OrderItem,
+)
+from src.auth.dependencies import get_current_admin_user_async
+from .views import ProductStatistics, SalesStatistics, UserStatistics
+
+# Asynchroniczne wersje endpointów statystyk (DATABASE_ASYNC=1)
+async_stats_router = APIRouter(prefix="/stats", tags=["statistics"])
+
+
+async def _count(db: AsyncSession, model, *conditions) -> int:
+    """Liczba wierszy modelu spełniających warunki"""
+    return await db.scalar(select(func.count()).select_from(model).where(*conditions))
+
+
+@async_stats_router.get("/overview", response_model=Dict[str, Any])
+async def get_overview_statistics_async(
+    current_admin: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Ogólny przegląd statystyk dla dashboardu"""
+    today = datetime.utcnow().date()
+    total_revenue = await db.scalar(select(func.sum(Order.total_amount))) or 0.0
+    today_revenue = (
+        await db.scalar(
+            select(func.sum(Order.total_amount)).where(
+                func.date(Order.created_at) == today
+            )
+        )
+        or 0.0
+    )
+
+    return {
+        "general": {
+            "total_users": await _count(db, User),
+            "total_products": await _count(db, Product),
+            "total_orders": await _count(db, Order),
+            "total_revenue": round(total_revenue, 2),
+        },
+        "active": {
+            "active_products": await _count(db, Product, Product.is_active == True),
+            "pending_orders": await _count(db, Order, Order.status == "pending"),
+        },
+        "today": {
+            "orders": await _count(db, Order, func.date(Order.created_at) == today),
+            "revenue": round(today_revenue, 2),
+        },
+    }
+
+
+@async_stats_router.get("/sales", response_model=SalesStatistics)
+async def get_sales_statistics_async(
+    current_admin: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    days: int = Query(30, ge=1, le=365, description="Liczba dni do analizy"),
+):
+    """Statystyki sprzedaży"""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    in_period = Order.created_at >= start_date
+
+    total_orders, total_revenue = (
+        await db.execute(
+            select(func.count(Order.id), func.sum(Order.total_amount)).where(in_period)
+        )
+    ).one()
+    total_revenue = total_revenue or 0.0
+    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0.0
+
+    orders_by_status = dict(
+        (
+            await db.execute(
+                select(Order.status, func.count(Order.id))
+                .where(in_period)
+                .group_by(Order.status)
+            )
+        ).all()
+    )
+
+    # Złączenia z jawnymi warunkami (OrderItem -> Product -> Category)
+    top_products = await db.execute(
+        select(
+            Product.name,
+            func.sum(OrderItem.quantity).label("total_sold"),
+            func.sum(OrderItem.total_price).label("total_revenue"),
+        )
+        .join(OrderItem, OrderItem.product_id == Product.id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(in_period)
+        .group_by(Product.id, Product.name)
+        .order_by(desc("total_sold"))
+        .limit(10)
+    )
+
+    revenue_by_category = await db.execute(
+        select(Category.name, func.sum(OrderItem.total_price).label("revenue"))
+        .join(Product, Product.category_id == Category.id)
+        .join(OrderItem, OrderItem.product_id == Product.id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(in_period)
+        .group_by(Category.id, Category.name)
+        .order_by(desc("revenue"))
+    )
+
+    last_week = datetime.utcnow() - timedelta(days=7)
+    daily_sales = await db.execute(
+        select(
+            func.date(Order.created_at).label("date"),
+            func.count(Order.id).label("orders"),
+            func.sum(Order.total_amount).label("revenue"),
+        )
+        .where(Order.created_at >= last_week)
+        .group_by(func.date(Order.created_at))
+        .order_by("date")
+    )
+
+    return SalesStatistics(
+        total_orders=total_orders,
+        total_revenue=round(total_revenue, 2),
+        avg_order_value=round(avg_order_value, 2),
+        orders_by_status=orders_by_status,
+        top_products=[
+            {
+                "name": name,
+                "total_sold": int(total_sold),
+                "total_revenue": float(revenue),
+            }
+            for name, total_sold, revenue in top_products.all()
+        ],
+        revenue_by_category=[
+            {"category": name, "revenue": float(revenue)}
+            for name, revenue in revenue_by_category.all()
+        ],
+        daily_sales=[
+            {"date": str(date), "orders": orders, "revenue": float(revenue or 0)}
+            for date, orders, revenue in daily_sales.all()
+        ],
+    )
+
+
+@async_stats_router.get("/users", response_model=UserStatistics)
+async def get_user_statistics_async(
+    current_admin: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Statystyki użytkowników"""
+    today = datetime.utcnow().date()
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    users_with_orders = (
+        await db.scalar(select(func.count(func.distinct(Order.user_id)))) or 0
+    )
+    total_orders = await _count(db, Order)
+
+    return UserStatistics(
+        total_users=await _count(db, User),
+        active_users=await _count(db, User, User.is_active == True),
+        new_users_today=await _count(db, User, func.date(User.created_at) == today),
+        new_users_this_week=await _count(db, User, User.created_at >= week_ago),
+        users_with_orders=users_with_orders,
+        avg_orders_per_user=round(
+            total_orders / users_with_orders if users_with_orders > 0 else 0.0, 2
+        ),
+    )
+
+
+@async_stats_router.get("/products", response_model=ProductStatistics)
+async def get_product_statistics_async(
+    current_admin: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    low_stock_threshold: int = Query(
+        10, ge=1, description="Próg dla produktów o niskim stanie"
+    ),
+):
+    """Statystyki produktów"""
+    avg_price = await db.scalar(select(func.avg(Product.price))) or 0.0
+
+    most_popular = await db.execute(
+        select(
+            Product.name,
+            func.count(OrderItem.id).label("order_count"),
+            func.sum(OrderItem.quantity).label("total_sold"),
+        )
+        .join(OrderItem, OrderItem.product_id == Product.id)
+        .group_by(Product.id, Product.name)
+        .order_by(desc("order_count"))
+        .limit(10)
+    )
+
+    least_popular = await db.execute(
+        select(Product.name, Product.stock_quantity)
+        .outerjoin(OrderItem, OrderItem.product_id == Product.id)
+        .where(Product.is_active == True)
+        .group_by(Product.id, Product.name, Product.stock_quantity)
+        .having(func.count(OrderItem.id) == 0)
+        .limit(10)
+    )
+
+    return ProductStatistics(
+        total_products=await _count(db, Product),
+        active_products=await _count(db, Product, Product.is_active == True),
+        out_of_stock=await _count(db, Product, Product.stock_quantity == 0),
+        low_stock=await _count(
+            db,
+            Product,
+            and_(
+                Product.stock_quantity > 0,
+                Product.stock_quantity <= low_stock_threshold,
+            ),
+        ),
+        most_popular=[
+            {"name": name, "order_count": order_count, "total_sold": int(total_sold)}
+            for name, order_count, total_sold in most_popular.all()
+        ],
+        least_popular=[
+            {"name": name, "stock_quantity": stock_quantity, "order_count": 0}
+            for name, stock_quantity in least_popular.all()
+        ],
+        avg_price=round(avg_price, 2),
+    )
+
+
+@async_stats_router.get("/inventory/alerts")
+async def get_inventory_alerts_async(
+    current_admin: User = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    low_stock_threshold: int = Query(10, ge=1),
+):
+    """Powiadomienia o stanie magazynu"""
+    out_of_stock = await db.scalars(
+        select(Product).where(Product.stock_quantity == 0, Product.is_active == True)
+    )
+    low_stock = await db.scalars(
+        select(Product).where(
+            Product.stock_quantity > 0,
+            Product.stock_quantity <= low_stock_threshold,
+            Product.is_active == True,
+        )
+    )
+
+    return {
+        "out_of_stock": [
+            {
+                "id": product.id,
+                "name": product.name,
+                "stock_quantity": product.stock_quantity,
+            }
+            for product in out_of_stock.all()
+        ],
+        "low_stock": [
+            {
+                "id": product.id,
+                "name": product.name,
+                "stock_quantity": product.stock_quantity,
+                "threshold": low_stock_threshold,
+            }
+            for product in low_stock.all()
+        ],
+    }
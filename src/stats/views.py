@@ -128,15 +128,16 @@ def get_sales_statistics(
         .all()
     )
 
-    # Najpopularniejsze produkty
+    # Najpopularniejsze produkty - złączenia z jawnymi warunkami, bo kolumny
+    # OrderItem na liście SELECT czynią złączenie bez warunku niejednoznacznym
     top_products = (
         db.query(
             Product.name,
             func.sum(OrderItem.quantity).label("total_sold"),
             func.sum(OrderItem.total_price).label("total_revenue"),
         )
-        .join(OrderItem)
-        .join(Order)
+        .join(OrderItem, OrderItem.product_id == Product.id)
+        .join(Order, Order.id == OrderItem.order_id)
         .filter(Order.created_at >= start_date)
         .group_by(Product.id, Product.name)
         .order_by(desc("total_sold"))
@@ -156,9 +157,9 @@ def get_sales_statistics(
     # Przychody według kategorii
     revenue_by_category = (
         db.query(Category.name, func.sum(OrderItem.total_price).label("revenue"))
-        .join(Product)
-        .join(OrderItem)
-        .join(Order)
+        .join(Product, Product.category_id == Category.id)
+        .join(OrderItem, OrderItem.product_id == Product.id)
+        .join(Order, Order.id == OrderItem.order_id)
         .filter(Order.created_at >= start_date)
         .group_by(Category.id, Category.name)
         .order_by(desc("revenue"))
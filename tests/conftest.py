@@ -0,0 +1,41 @@
+"""Wspólna konfiguracja testów: osobna baza i katalogi w katalogu tymczasowym
+
+Zmienne środowiskowe muszą być ustawione przed importem aplikacji - silnik bazy,
+pula hashowania i plik limitów logowania tworzone są przy imporcie modułów.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix="aszwoj_tests_")
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{TEST_DIR}/aszwoj_test.db",
+        "PASSWORD_HASH_WORKERS": "0",
+        "BULK_IMPORT_WORKERS": "0",
+        "LOGIN_THROTTLE_PATH": os.path.join(TEST_DIR, "login_throttle.bin"),
+        "BACKUP_SCHEDULE_ENABLED": "0",
+        "SLOW_QUERY_THRESHOLD_MS": "-1",
+    }
+)
+# Kopie zapasowe i zrzuty zapisywane są względem katalogu roboczego
+os.chdir(TEST_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        assert test_client.post("/database/init").status_code == 200
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    token = client.post("/auth/get-admin-token").json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,28 @@
+import time
+
+from src.database import scheduler
+from src.database.scheduler import BackupScheduler, run_lock
+
+
+def test_leader_waits_when_backup_is_already_running(client, monkeypatch):
+    calls = []
+    real_job = scheduler.run_backup_job
+
+    def counting_job(*args, **kwargs):
+        calls.append(time.monotonic())
+        return real_job(*args, **kwargs)
+
+    monkeypatch.setattr(scheduler, "run_backup_job", counting_job)
+    monkeypatch.setattr(scheduler, "LEADER_POLL_SECONDS", 0.2)
+    leader = BackupScheduler()
+
+    # Kopię wykonuje w tym czasie inny proces (zajęta blokada przebiegu)
+    with run_lock() as acquired:
+        assert acquired
+        leader.start()
+        time.sleep(0.5)
+        leader.stop()
+
+    assert leader.seconds_until_due() <= 0
+    assert 1 <= len(calls) <= 4
+    assert all(b - a >= 0.15 for a, b in zip(calls, calls[1:]))
@@ -0,0 +1,40 @@
+from benchmarks.endpoints import check_budget
+
+MEASUREMENT = {
+    "p99_ms": 10.0,
+    "sql_queries": 3,
+    "peak_memory_kb": 100.0,
+    "errors": 0,
+}
+
+
+def result(**endpoints):
+    return {"endpoints": endpoints}
+
+
+def test_matching_result_is_within_budget():
+    assert check_budget(result(a=MEASUREMENT), result(a=MEASUREMENT), 0.5) == []
+
+
+def test_baseline_with_errors_is_a_violation():
+    baseline = result(a={**MEASUREMENT, "errors": 5, "sql_queries": -1})
+
+    violations = check_budget(result(a={**MEASUREMENT, "errors": 5}), baseline, 0.5)
+
+    assert violations == ["a: błędy w wynikach bazowych (5)"]
+
+
+def test_endpoint_missing_from_baseline_is_a_violation():
+    violations = check_budget(
+        result(a=MEASUREMENT, b=MEASUREMENT), result(a=MEASUREMENT), 0.5
+    )
+
+    assert violations == ["b: brak wyników bazowych (--update-baseline)"]
+
+
+def test_more_queries_and_errors_than_baseline_are_violations():
+    current = {**MEASUREMENT, "sql_queries": 4, "errors": 1}
+
+    violations = check_budget(result(a=current), result(a=MEASUREMENT), 0.5)
+
+    assert violations == ["a: zapytania SQL 4 > 3", "a: błędy 1 > 0"]
@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import insert, update
+
+from src.database import utils
+from src.database.dumps import (
+    DUMP_EXTENSIONS,
+    iter_dump_chunks,
+    load_sql_dump,
+    zstandard,
+)
+from src.database.models import (
+    PRODUCT_SEARCH_TABLE,
+    Category,
+    Product,
+    engine,
+    get_database_path,
+)
+from src.database.utils import restore_sql_dump
+
+COMPRESSIONS = [
+    "none",
+    "gzip",
+    pytest.param(
+        "zstd",
+        marks=pytest.mark.skipif(zstandard is None, reason="brak pakietu zstandard"),
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def search_products(client):
+    """Produkty z polskimi znakami, apostrofem, znakiem nowej linii i NULL w opisie"""
+    with engine.begin() as connection:
+        category_id = connection.execute(
+            insert(Category).values(name="Zrzuty", description="test")
+        ).inserted_primary_key[0]
+        rows = [
+            ("Łódź żaglowa", "Kadłub z laminatu\nżagiel 12 m²"),
+            ("O'Reilly: SQLite", "Książka o bazach 'embedded'"),
+            ("Laptop Dell", None),
+            ("Plecak", "Na laptopa 15 cali"),
+        ]
+        connection.execute(
+            insert(Product),
+            [
+                {
+                    "name": name,
+                    "description": description,
+                    "price": 100.0,
+                    "stock_quantity": 5,
+                    "category_id": category_id,
+                }
+                for name, description in rows
+            ],
+        )
+        # Zmiana nazwy przechodzi przez wyzwalacz aktualizujący indeks FTS5
+        connection.execute(
+            update(Product)
+            .where(Product.name == "Plecak")
+            .values(name="Plecak turystyczny")
+        )
+    return category_id
+
+
+def schema(conn):
+    return sorted(
+        conn.execute(
+            "SELECT type, name, tbl_name, sql FROM sqlite_master "
+            "WHERE name NOT LIKE 'sqlite_%'"
+        )
+    )
+
+
+def table_rows(conn):
+    """Zawartość wszystkich zwykłych tabel (bez tabel wirtualnych FTS5)"""
+    tables = [
+        name
+        for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%'"
+        )
+        if not sql.startswith("CREATE VIRTUAL TABLE")
+    ]
+    return {
+        # Część tabel jest WITHOUT ROWID - porównanie posortowanych wierszy
+        table: sorted(conn.execute(f'SELECT * FROM "{table}"'), key=repr)
+        for table in tables
+    }
+
+
+def search(conn, phrase):
+    return conn.execute(
+        f"SELECT rowid FROM {PRODUCT_SEARCH_TABLE} "
+        f"WHERE {PRODUCT_SEARCH_TABLE} MATCH ? ORDER BY rowid",
+        (phrase,),
+    ).fetchall()
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_dump_round_trip_restores_data_schema_and_search_index(
+    search_products, tmp_path, compression
+):
+    dump_path = tmp_path / f"dump{DUMP_EXTENSIONS[compression]}"
+    restored_path = tmp_path / "restored.db"
+    source = sqlite3.connect(get_database_path())
+    try:
+        with open(dump_path, "wb") as f:
+            for chunk in iter_dump_chunks(source, compression):
+                f.write(chunk)
+
+        report = load_sql_dump(str(dump_path), str(restored_path))
+
+        restored = sqlite3.connect(restored_path)
+        try:
+            assert schema(restored) == schema(source)
+            assert table_rows(restored) == table_rows(source)
+            assert (
+                report["deferred_statements"]
+                == source.execute(
+                    "SELECT COUNT(*) FROM sqlite_master "
+                    "WHERE type IN ('index', 'trigger') AND sql IS NOT NULL"
+                ).fetchone()[0]
+            )
+            assert restored.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+            # Zgodność indeksu FTS5 z tabelą products (rank=1 - porównanie z treścią)
+            restored.execute(
+                f"INSERT INTO {PRODUCT_SEARCH_TABLE}({PRODUCT_SEARCH_TABLE}, rank) "
+                "VALUES ('integrity-check', 1)"
+            )
+            for phrase in ("zaglowa", "reilly", "laptop*", "turystyczny", "plecak"):
+                assert search(restored, phrase) == search(source, phrase)
+            assert search(restored, "turystyczny")
+
+            # Wyzwalacze odtworzone po danych nadal aktualizują indeks
+            restored.execute(
+                "INSERT INTO products (name, description, price, stock_quantity, "
+                "category_id, is_active, popularity) "
+                "VALUES ('Kajak dwuosobowy', 'test', 1, 1, ?, 1, 0)",
+                (search_products,),
+            )
+            assert len(search(restored, "kajak")) == 1
+        finally:
+            restored.close()
+    finally:
+        source.close()
+
+
+def test_restore_dump_endpoint_keeps_search_working(client, search_products):
+    before = client.get("/products/search", params={"q": "zaglowa lamin"})
+    assert before.status_code == 200 and len(before.json()) == 1
+
+    dump = client.post("/database/dump", params={"compression": "gzip"})
+    assert dump.status_code == 200, dump.text
+    restore = client.post(
+        "/database/restore-dump", params={"dump_path": dump.json()["dump_path"]}
+    )
+    assert restore.status_code == 200, restore.text
+
+    after = client.get("/products/search", params={"q": "zaglowa lamin"})
+    assert after.status_code == 200
+    assert after.json() == before.json()
+    assert restore.json()["deferred_statements"] > 0
+
+
+def test_concurrent_dump_restores_use_separate_staging_files(
+    client, search_products, monkeypatch
+):
+    dump_path = client.post("/database/dump", params={"compression": "none"}).json()[
+        "dump_path"
+    ]
+    loading = threading.Barrier(2, timeout=10)
+    targets = []
+
+    def load_together(path, target_path):
+        targets.append(target_path)
+        # Oba przywracania ładują zrzut w tym samym czasie
+        loading.wait()
+        return load_sql_dump(path, target_path)
+
+    monkeypatch.setattr(utils, "load_sql_dump", load_together)
+    reports = []
+    workers = [
+        threading.Thread(target=lambda: reports.append(restore_sql_dump(dump_path)))
+        for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert len(set(targets)) == 2
+    # Podmianę bazy wykonuje najwyżej jedno z nich, ale żadne ładowanie nie jest przerwane
+    assert any(report.get("rows") for report in reports)
+    assert not any(os.path.exists(path) for path in targets)
+    with sqlite3.connect(get_database_path()) as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
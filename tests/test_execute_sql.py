@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+import pytest
+
+NUMBERS = (
+    "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < {last}) "
+)
+
+
+def execute(client, sql_query, output_format, **params):
+    response = client.post(
+        "/database/execute-sql",
+        params={"sql_query": sql_query, "format": output_format, **params},
+    )
+    assert response.status_code == 200, response.text
+    return response.text
+
+
+def csv_rows(body):
+    return list(csv.reader(io.StringIO(body)))
+
+
+def ndjson_rows(body):
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_empty_result_keeps_csv_header(client):
+    body = execute(client, "SELECT id, name FROM products WHERE 1 = 0", "csv")
+
+    assert csv_rows(body) == [["id", "name"]]
+
+
+def test_empty_result_in_ndjson_is_empty(client):
+    assert execute(client, "SELECT id FROM products WHERE 1 = 0", "ndjson") == ""
+
+
+@pytest.mark.parametrize("rows", [5, 10])
+def test_complete_result_has_no_marker(client, rows):
+    query = NUMBERS.format(last=rows) + "SELECT x FROM n"
+
+    assert csv_rows(execute(client, query, "csv", max_rows=10)) == [["x"]] + [
+        [str(x)] for x in range(1, rows + 1)
+    ]
+    assert ndjson_rows(execute(client, query, "ndjson", max_rows=10)) == [
+        {"x": x} for x in range(1, rows + 1)
+    ]
+
+
+def test_truncated_result_ends_with_marker(client):
+    query = NUMBERS.format(last=50) + "SELECT x FROM n"
+
+    rows = csv_rows(execute(client, query, "csv", max_rows=10))
+    assert rows[0] == ["x"]
+    assert rows[1:11] == [[str(x)] for x in range(1, 11)]
+    assert rows[11:] == [["#truncated", "10"]]
+
+    lines = ndjson_rows(execute(client, query, "ndjson", max_rows=10))
+    assert lines[:10] == [{"x": x} for x in range(1, 11)]
+    assert lines[10:] == [{"truncated": True, "row_limit": 10}]
+
+
+def test_timeout_during_streaming_ends_with_error_marker(client):
+    # Pierwszy wiersz od razu, kolejne dopiero po bardzo długim przebiegu
+    query = (
+        NUMBERS.format(last=10**10) + "SELECT x FROM n WHERE x = 1 OR x > 10000000000"
+    )
+
+    rows = csv_rows(execute(client, query, "csv", timeout=0.2))
+    assert rows[0] == ["x"]
+    assert rows[-1][0] == "#error"
+    assert "interrupted" in rows[-1][1]
+
+    lines = ndjson_rows(execute(client, query, "ndjson", timeout=0.2))
+    assert "interrupted" in lines[-1]["error"]
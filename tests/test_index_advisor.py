@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import insert, select
+
+from src.database.index_advisor import (
+    CardinalityEstimator,
+    candidate_columns,
+    workload_recorder,
+)
+from src.database.models import Category, Order, OrderItem, Product, User, engine
+
+COLUMNS = {
+    "orders": ["id", "user_id", "status", "created_at"],
+    "order_items": ["id", "order_id", "product_id"],
+}
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        "order_items.order_id = ?",
+        "? = order_items.order_id",
+        "? IS order_items.order_id",
+        "? IN (order_items.order_id)",
+        "order_items.order_id IN (?, ?)",
+    ],
+)
+def test_equality_is_found_in_both_operand_orders(condition):
+    statement = f"SELECT order_items.id FROM order_items WHERE {condition}"
+
+    candidates = candidate_columns(statement, COLUMNS)
+
+    assert candidates["order_items"]["equality"] == ["order_id"]
+
+
+@pytest.fixture(scope="module")
+def orders_with_items(client, admin_headers):
+    """Zamówienia z pozycjami, ładowanymi leniwie przez /orders/admin/all"""
+    with engine.begin() as connection:
+        user_id = connection.execute(
+            select(User.id).where(User.is_admin == True)
+        ).scalar()
+        category_id = connection.execute(
+            insert(Category).values(name="Doradca", description="test")
+        ).inserted_primary_key[0]
+        product_id = connection.execute(
+            insert(Product).values(
+                name="Produkt doradcy",
+                description="test",
+                price=10.0,
+                stock_quantity=100,
+                category_id=category_id,
+            )
+        ).inserted_primary_key[0]
+        for _ in range(5):
+            order_id = connection.execute(
+                insert(Order).values(
+                    user_id=user_id,
+                    total_amount=20.0,
+                    status="pending",
+                    shipping_address="Testowa 1",
+                )
+            ).inserted_primary_key[0]
+            connection.execute(
+                insert(OrderItem),
+                [
+                    {
+                        "order_id": order_id,
+                        "product_id": product_id,
+                        "quantity": 1,
+                        "unit_price": 10.0,
+                        "total_price": 10.0,
+                    }
+                ]
+                * 2,
+            )
+
+
+def test_lazy_loaded_order_items_get_an_index_proposal(
+    client, admin_headers, orders_with_items
+):
+    workload_recorder.reset()
+    response = client.get("/orders/admin/all", headers=admin_headers)
+    assert response.status_code == 200
+
+    advice = client.get("/database/test-indexes", headers=admin_headers).json()
+
+    assert any(
+        "SCAN order_items" in " ".join(finding["plan"])
+        for finding in advice["problem_statements"]
+    )
+    assert any(
+        recommendation["table"] == "order_items"
+        and recommendation["columns"] == ["order_id"]
+        for recommendation in advice["recommendations"]
+    )
+
+
+def test_row_estimate_ignores_the_id_offset():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE generated (id INTEGER PRIMARY KEY, value TEXT)")
+    conn.execute("CREATE TABLE empty (id INTEGER PRIMARY KEY)")
+    # Identyfikatory od GENERATOR_ID_BASE, jak w danych z generatora
+    conn.executemany(
+        "INSERT INTO generated VALUES (?, 'x')",
+        [(1000000 + n,) for n in range(300)],
+    )
+    stat1 = {"rows": {}, "distinct": {}}
+    estimator = CardinalityEstimator()
+
+    assert estimator.rows(conn, stat1, "generated") == 300
+    assert estimator.rows(conn, stat1, "empty") == 0
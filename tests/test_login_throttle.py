@@ -0,0 +1,78 @@
+import multiprocessing
+
+import pytest
+
+from src.auth.throttle import LoginThrottle
+
+EMAIL_BURST = 20
+PROCESSES = 4
+ATTEMPTS = 25
+
+
+def make_throttle(path):
+    # Uzupełnianie żetonów pomijalnie wolne - wynik zależy tylko od pojemności kubełka
+    return LoginThrottle(
+        str(path),
+        slots=1024,
+        ip_limit=(0.001, 1000),
+        email_limit=(0.001, EMAIL_BURST),
+    )
+
+
+def attempt_logins(throttle, path, start, results):
+    """Próby logowania na to samo konto z różnych adresów w osobnym procesie"""
+    throttle = throttle or make_throttle(path)
+    start.wait()
+    results.put(
+        sum(
+            throttle.check(f"10.0.0.{attempt}", "Shared@Example.com ") is None
+            for attempt in range(ATTEMPTS)
+        )
+    )
+
+
+@pytest.mark.parametrize("start_method", ["spawn", "fork"])
+def test_bucket_is_shared_between_processes(tmp_path, start_method):
+    path = tmp_path / "throttle.bin"
+    context = multiprocessing.get_context(start_method)
+    # Przy fork workery dziedziczą obiekt z otwartym już mmap (jak workery gunicorna)
+    inherited = make_throttle(path) if start_method == "fork" else None
+    consumed = 0
+    if inherited is not None:
+        assert inherited.check("10.0.0.254", "shared@example.com") is None
+        consumed = 1
+
+    start, results = context.Barrier(PROCESSES), context.Queue()
+    workers = [
+        context.Process(target=attempt_logins, args=(inherited, path, start, results))
+        for _ in range(PROCESSES)
+    ]
+    for worker in workers:
+        worker.start()
+    accepted = [results.get(timeout=30) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    assert sum(accepted) == EMAIL_BURST - consumed
+    stats = make_throttle(path).stats()
+    assert stats["accepted"] == EMAIL_BURST
+    assert stats["rejected_email"] == PROCESSES * ATTEMPTS - sum(accepted)
+    assert stats["rejected_ip"] == 0
+
+
+def test_rejected_attempt_reports_retry_after(tmp_path):
+    throttle = LoginThrottle(
+        str(tmp_path / "throttle.bin"),
+        slots=64,
+        ip_limit=(60, 2),
+        email_limit=(60, 100),
+    )
+
+    assert throttle.check("10.0.0.1", "a@example.com") is None
+    assert throttle.check("10.0.0.1", "b@example.com") is None
+    retry_after = throttle.check("10.0.0.1", "c@example.com")
+
+    # 1 żeton na sekundę - kolejna próba możliwa najpóźniej po sekundzie
+    assert retry_after is not None and 0 < retry_after <= 1
+    assert throttle.check("10.0.0.2", "c@example.com") is None
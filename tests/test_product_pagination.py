@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from src.database.models import Category, Product, engine
+from src.products.queries import PRODUCT_SORTS
+
+SAME_TIMESTAMP = datetime(2025, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture(scope="module")
+def category_products(client):
+    """Kategoria z produktami o powtarzających się kluczach sortowania i NULL w created_at"""
+    with engine.begin() as connection:
+        category_id = connection.execute(
+            insert(Category).values(name="Stronicowanie", description="test")
+        ).inserted_primary_key[0]
+        rows = [
+            {
+                "name": f"Produkt {n % 4}",
+                "description": "test",
+                "price": float(n % 3),
+                "stock_quantity": 10,
+                "category_id": category_id,
+                "is_active": n % 11 != 0,
+                # Większość produktów z identycznym znacznikiem czasu, kilka bez daty
+                "created_at": (
+                    None
+                    if n % 9 == 0
+                    else SAME_TIMESTAMP if n % 2 else datetime(2025, 1, 2, n % 5)
+                ),
+                "popularity": n % 2,
+            }
+            for n in range(1, 61)
+        ]
+        connection.execute(insert(Product), rows)
+        products = connection.execute(
+            Product.__table__.select().where(
+                Product.category_id == category_id, Product.is_active == True
+            )
+        ).all()
+    return category_id, products
+
+
+def expected_order(products, sort):
+    """Kolejność SQLite: NULL najmniejszy, remisy rozstrzyga id w tym samym kierunku"""
+    column, descending = PRODUCT_SORTS[sort]
+
+    def key(row):
+        value = getattr(row, column.key)
+        return (value is not None, value if value is not None else 0, row.id)
+
+    return [row.id for row in sorted(products, key=key, reverse=descending)]
+
+
+def fetch_all_pages(client, category_id, sort, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"category_id": category_id, "sort": sort, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/products/", params=params)
+        assert response.status_code == 200, response.text
+        ids += [product["id"] for product in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids, pages
+
+
+@pytest.mark.parametrize("sort", sorted(PRODUCT_SORTS))
+@pytest.mark.parametrize("limit", [1, 4, 7])
+def test_keyset_pages_have_no_gaps_or_duplicates(
+    client, category_products, sort, limit
+):
+    category_id, products = category_products
+
+    ids, pages = fetch_all_pages(client, category_id, sort, limit)
+
+    assert len(ids) == len(set(ids))
+    assert ids == expected_order(products, sort)
+    assert pages == -(-len(products) // limit)
+
+
+def test_equal_timestamps_are_paged_by_id(client, category_products):
+    category_id, products = category_products
+    same = [row.id for row in products if row.created_at == SAME_TIMESTAMP]
+
+    ids, _ = fetch_all_pages(client, category_id, "newest", 3)
+
+    positions = [ids.index(product_id) for product_id in same]
+    assert sorted(same, reverse=True) == [ids[p] for p in sorted(positions)]
+
+
+def test_cursor_from_other_sort_is_rejected(client, category_products):
+    category_id, _ = category_products
+    first = client.get(
+        "/products/", params={"category_id": category_id, "sort": "name", "limit": 2}
+    )
+
+    response = client.get(
+        "/products/",
+        params={"sort": "price_asc", "cursor": first.headers["X-Next-Cursor"]},
+    )
+
+    assert response.status_code == 400
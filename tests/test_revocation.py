@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from src.auth.revocation import BloomFilter, RevocationStore
+from src.database.models import (
+    RevokedToken,
+    bump_database_generation,
+    engine,
+    get_database_path,
+)
+
+
+def new_jti():
+    return uuid.uuid4().hex
+
+
+@pytest.mark.parametrize("keys", [1000, 5000])
+def test_bloom_filter_has_no_false_negatives(keys):
+    # 5000 kluczy przepełnia filtr o pojemności 1000 - rośnie tylko odsetek fałszywych trafień
+    bloom = BloomFilter(1000, 0.01)
+    added = [new_jti() for _ in range(keys)]
+    for key in added:
+        bloom.add(key)
+
+    assert all(key in bloom for key in added)
+    assert bloom.count == keys
+
+
+def test_bloom_filter_false_positive_rate_within_capacity():
+    bloom = BloomFilter(2000, 0.01)
+    for _ in range(2000):
+        bloom.add(new_jti())
+
+    false_positives = sum(new_jti() in bloom for _ in range(20000))
+
+    assert false_positives / 20000 < 0.03
+
+
+@pytest.fixture
+def stores(client):
+    """Dwa magazyny jak w dwóch workerach, synchronizowane przy każdym sprawdzeniu"""
+    return (
+        RevocationStore(capacity=100, sync_interval=0),
+        RevocationStore(capacity=100, sync_interval=0),
+    )
+
+
+def test_revocation_is_seen_by_other_worker(stores):
+    first, second = stores
+    jti = new_jti()
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    assert not second.is_revoked(jti)
+
+    assert first.revoke(jti, expires_at)
+
+    assert second.is_revoked(jti)
+    assert not second.revoke(jti, expires_at)
+    assert not second.is_revoked(new_jti())
+
+
+def test_unknown_tokens_skip_the_database(stores):
+    _, second = stores
+    checks = [new_jti() for _ in range(50)]
+
+    assert not any(second.is_revoked(jti) for jti in checks)
+    stats = second.stats()
+    assert stats["checks"] == 50
+    assert stats["database_checks"] == stats["false_positives"]
+    assert stats["bloom_negatives"] + stats["database_checks"] == 50
+
+
+def test_overfilled_filter_is_rebuilt_without_losing_revocations(client):
+    writer = RevocationStore(capacity=8, sync_interval=0)
+    reader = RevocationStore(capacity=8, sync_interval=0)
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    revoked = [new_jti() for _ in range(40)]
+    for jti in revoked:
+        assert writer.revoke(jti, expires_at)
+
+    assert all(reader.is_revoked(jti) for jti in revoked)
+    # Kolejna synchronizacja przebudowuje przepełniony filtr z większą pojemnością
+    reader.is_revoked(new_jti())
+    assert reader.stats()["bloom_capacity"] >= 80
+    assert all(reader.is_revoked(jti) for jti in revoked)
+
+
+def test_purge_removes_expired_entries_and_keeps_active_ones(client):
+    store = RevocationStore(sync_interval=0, purge_interval=3600)
+    now = datetime.utcnow()
+    expired, active = new_jti(), new_jti()
+    store.revoke(expired, now - timedelta(minutes=1))
+    store.revoke(active, now + timedelta(hours=1))
+    assert store.is_revoked(expired)
+
+    # Wymuszenie sprzątania przy najbliższej synchronizacji
+    store._next_purge = 0.0
+    assert store.is_revoked(active)
+
+    with engine.connect() as conn:
+        remaining = set(conn.execute(select(RevokedToken.jti)).scalars())
+    assert expired not in remaining
+    assert active in remaining
+    assert store.stats()["purged"] >= 1
+    assert not store.is_revoked(expired)
+
+
+def test_filter_is_rebuilt_after_database_generation_change(stores):
+    first, second = stores
+    jti = new_jti()
+    first.revoke(jti, datetime.utcnow() + timedelta(hours=1))
+    assert second.is_revoked(jti)
+
+    # Po przywróceniu kopii identyfikatory wpisów mogą się cofnąć - pełna synchronizacja
+    bump_database_generation()
+    second._last_id = 10**9
+
+    assert second.is_revoked(jti)
+    assert second._last_id < 10**9
+
+
+class ThreadRecordingEngine:
+    """Silnik synchroniczny zapamiętujący wątki, w których był używany"""
+
+    def __init__(self, target):
+        self.target = target
+        self.threads = set()
+
+    def begin(self):
+        self.threads.add(threading.current_thread())
+        return self.target.begin()
+
+    def connect(self):
+        self.threads.add(threading.current_thread())
+        return self.target.connect()
+
+
+def test_async_check_does_not_use_the_sync_engine_on_the_event_loop(
+    client, monkeypatch
+):
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from src.auth import revocation
+
+    revoked, unknown = new_jti(), new_jti()
+    RevocationStore().revoke(revoked, datetime.utcnow() + timedelta(hours=1))
+    recording = ThreadRecordingEngine(engine)
+    monkeypatch.setattr(revocation, "engine", recording)
+    # Nowy magazyn synchronizuje filtr przy pierwszym sprawdzeniu
+    store = RevocationStore(sync_interval=3600)
+
+    async def check():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{get_database_path()}")
+        try:
+            async with AsyncSession(async_engine) as db:
+                results = [
+                    await store.is_revoked_async(jti, db) for jti in (revoked, unknown)
+                ]
+            return results, threading.current_thread()
+        finally:
+            await async_engine.dispose()
+
+    results, loop_thread = asyncio.run(check())
+
+    assert results == [True, False]
+    assert store.stats()["syncs"] == 1
+    assert store.stats()["revoked_hits"] == 1
+    assert recording.threads and loop_thread not in recording.threads
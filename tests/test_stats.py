@@ -0,0 +1,41 @@
+def test_sales_statistics_include_ordered_products(client, admin_headers):
+    category = client.post(
+        "/products/categories/admin/",
+        json={"name": "Statystyki", "description": "test"},
+        headers=admin_headers,
+    ).json()
+    product = client.post(
+        "/products/admin/",
+        json={
+            "name": "Produkt statystyk",
+            "price": 25.0,
+            "stock_quantity": 10,
+            "category_id": category["id"],
+        },
+        headers=admin_headers,
+    ).json()
+    assert (
+        client.post(
+            "/cart/add",
+            json={"product_id": product["id"], "quantity": 2},
+            headers=admin_headers,
+        ).status_code
+        == 200
+    )
+    assert (
+        client.post(
+            "/orders/create",
+            json={"shipping_address": "ul. Testowa 1, Warszawa"},
+            headers=admin_headers,
+        ).status_code
+        == 200
+    )
+
+    response = client.get("/stats/sales", headers=admin_headers)
+
+    assert response.status_code == 200, response.text
+    sales = response.json()
+    assert {"name": "Produkt statystyk", "total_sold": 2, "total_revenue": 50.0} in (
+        sales["top_products"]
+    )
+    assert {"category": "Statystyki", "revenue": 50.0} in sales["revenue_by_category"]